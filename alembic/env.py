@@ -1,9 +1,11 @@
 import os
+import re
 import sys
 from logging.config import fileConfig
 
 from sqlalchemy import engine_from_config
 from sqlalchemy import pool
+from sqlalchemy import text
 
 from alembic import context
 
@@ -12,9 +14,16 @@ sys.path.append(os.path.dirname(os.path.dirname(__file__)))
 
 from app.core.config import get_settings
 from app.db.base import Base
+from app.db.partitions import PARTITIONED_TABLES
 
 settings = get_settings()
 
+# Arbitrary key for the session-level advisory lock that serializes
+# migrations when several replicas start at once
+MIGRATION_LOCK_ID = 7290215
+
+PARTITION_NAME = re.compile(rf"^({'|'.join(PARTITIONED_TABLES)})_y\d{{4}}m\d{{2}}$")
+
 # this is the Alembic Config object, which provides
 # access to the values within the .ini file in use.
 config = context.config
@@ -34,6 +43,13 @@ config.set_main_option(
     f"postgresql://{settings.DB_USER}:{settings.DB_PASSWORD}@{settings.DB_HOST}:{settings.DB_PORT}/{settings.DB_NAME}"
 )
 
+def include_name(name, type_, parent_names) -> bool:
+    """Leave monthly partitions out of autogenerate; app.db.partitions manages them"""
+    if type_ == "table":
+        return not PARTITION_NAME.match(name)
+    return True
+
+
 def run_migrations_offline() -> None:
     """Run migrations in 'offline' mode.
 
@@ -49,6 +65,7 @@ def run_migrations_offline() -> None:
     context.configure(
         url=url,
         target_metadata=target_metadata,
+        include_name=include_name,
         literal_binds=True,
         dialect_opts={"paramstyle": "named"},
     )
@@ -70,13 +87,23 @@ def run_migrations_online() -> None:
     )
 
     with connectable.connect() as connection:
-        context.configure(
-            connection=connection,
-            target_metadata=target_metadata
-        )
-
-        with context.begin_transaction():
-            context.run_migrations()
+        # Only one replica migrates at a time; the others wait here and then
+        # find the schema already at head
+        connection.execute(text("SELECT pg_advisory_lock(:id)"), {"id": MIGRATION_LOCK_ID})
+        connection.commit()
+
+        try:
+            context.configure(
+                connection=connection,
+                target_metadata=target_metadata,
+                include_name=include_name
+            )
+
+            with context.begin_transaction():
+                context.run_migrations()
+        finally:
+            connection.execute(text("SELECT pg_advisory_unlock(:id)"), {"id": MIGRATION_LOCK_ID})
+            connection.commit()
 
 
 if context.is_offline_mode():
@@ -0,0 +1,43 @@
+"""hash verification tokens
+
+Revision ID: 46b98dbd26b6
+Revises: 7232287bd2ce
+Create Date: 2026-10-19 16:24:47.495722
+
+Existing rows are backfilled with the SHA-256 of their stored token, so
+links already sent by email keep working.
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '46b98dbd26b6'
+down_revision: Union[str, None] = '7232287bd2ce'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('user_verifications', sa.Column('token_hash', sa.LargeBinary(length=32), nullable=True))
+    op.execute("UPDATE user_verifications SET token_hash = sha256(convert_to(verification_token, 'UTF8'))")
+    op.alter_column('user_verifications', 'token_hash', nullable=False)
+    op.drop_constraint('user_verifications_verification_token_key', 'user_verifications', type_='unique')
+    op.create_index('ix_user_verifications_expires_at_unverified', 'user_verifications', ['expires_at'], unique=False, postgresql_where=sa.text('NOT is_verified'))
+    op.create_index(op.f('ix_user_verifications_token_hash'), 'user_verifications', ['token_hash'], unique=True)
+    op.drop_column('user_verifications', 'verification_token')
+
+
+def downgrade() -> None:
+    # Tokens cannot be recovered from their hashes; pending links stop working
+    # and users get a new one on their next login attempt
+    op.add_column('user_verifications', sa.Column('verification_token', sa.VARCHAR(), autoincrement=False, nullable=True))
+    op.execute("UPDATE user_verifications SET verification_token = encode(token_hash, 'hex'), expires_at = least(expires_at, now())")
+    op.alter_column('user_verifications', 'verification_token', nullable=False)
+    op.drop_index(op.f('ix_user_verifications_token_hash'), table_name='user_verifications')
+    op.drop_index('ix_user_verifications_expires_at_unverified', table_name='user_verifications', postgresql_where=sa.text('NOT is_verified'))
+    op.create_unique_constraint('user_verifications_verification_token_key', 'user_verifications', ['verification_token'])
+    op.drop_column('user_verifications', 'token_hash')
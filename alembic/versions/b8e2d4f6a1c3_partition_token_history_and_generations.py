@@ -0,0 +1,138 @@
+"""partition token_history and generations by month
+
+Revision ID: b8e2d4f6a1c3
+Revises: a3f1c9d2e4b7
+Create Date: 2026-10-19 11:00:00.000000
+
+Rebuilds both tables as declarative range-partitioned tables keyed on
+created_at, one partition per UTC month, and copies existing rows over.
+The primary keys become (id, created_at) since a partitioned table's
+unique constraints must include the partition key.
+
+"""
+from datetime import datetime
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b8e2d4f6a1c3'
+down_revision: Union[str, None] = 'a3f1c9d2e4b7'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+MONTHS_AHEAD = 3
+
+
+def _add_months(month: datetime, months: int) -> datetime:
+    index = month.year * 12 + month.month - 1 + months
+    return datetime(index // 12, index % 12 + 1, 1)
+
+
+def _create_partitions(table: str) -> None:
+    """Monthly partitions from the oldest legacy row through MONTHS_AHEAD months ahead"""
+    bind = op.get_bind()
+    first, current = bind.execute(sa.text(
+        f"SELECT date_trunc('month', min(created_at) AT TIME ZONE 'UTC'), "
+        f"date_trunc('month', now() AT TIME ZONE 'UTC') FROM {table}_legacy"
+    )).one()
+    month = first or current
+    last = _add_months(current, MONTHS_AHEAD)
+    while month <= last:
+        upper = _add_months(month, 1)
+        op.execute(
+            f"CREATE TABLE {table}_y{month.year:04d}m{month.month:02d} PARTITION OF {table} "
+            f"FOR VALUES FROM ('{month.isoformat()}+00:00') TO ('{upper.isoformat()}+00:00')"
+        )
+        month = upper
+
+
+def _token_history_columns():
+    return [
+        sa.Column('id', sa.Integer(), server_default=sa.text("nextval('token_history_id_seq'::regclass)"), nullable=False),
+        sa.Column('user_id', sa.Integer(), nullable=False),
+        sa.Column('tokens', sa.Integer(), nullable=False),
+        sa.Column('action_type', sa.String(), nullable=False),
+        sa.Column('description', sa.String(), nullable=False),
+        sa.Column('extra_data', postgresql.JSONB(astext_type=sa.Text()), server_default='{}', nullable=False),
+        sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+        sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+        sa.ForeignKeyConstraint(['user_id'], ['users.id'], ondelete='CASCADE'),
+    ]
+
+
+def _generations_columns():
+    return [
+        sa.Column('id', sa.UUID(), nullable=False),
+        sa.Column('user_id', sa.Integer(), nullable=False),
+        sa.Column('prompt', sa.Text(), nullable=False),
+        sa.Column('type', sa.String(), nullable=False),
+        sa.Column('url', sa.String(), nullable=False),
+        sa.Column('reference_image_url', sa.String(), nullable=True),
+        sa.Column('status', sa.String(), nullable=False),
+        sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+        sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+        sa.ForeignKeyConstraint(['user_id'], ['users.id'], ondelete='CASCADE'),
+    ]
+
+
+def _rename_old(table: str, suffix: str, indexes: Sequence[str]) -> None:
+    op.rename_table(table, f'{table}_{suffix}')
+    op.execute(f'ALTER INDEX {table}_pkey RENAME TO {table}_{suffix}_pkey')
+    op.execute(f'ALTER TABLE {table}_{suffix} RENAME CONSTRAINT {table}_user_id_fkey TO {table}_{suffix}_user_id_fkey')
+    for index in indexes:
+        op.execute(f'ALTER INDEX {index} RENAME TO {index}_{suffix}')
+
+
+def upgrade() -> None:
+    # token_history; the redundant ix_token_history_id is not recreated
+    _rename_old('token_history', 'legacy', ['ix_token_history_id', 'ix_token_history_user_id_id'])
+    op.create_table('token_history',
+    *_token_history_columns(),
+    sa.PrimaryKeyConstraint('id', 'created_at'),
+    postgresql_partition_by='RANGE (created_at)'
+    )
+    op.create_index('ix_token_history_user_id_id', 'token_history', ['user_id', 'id'], unique=False)
+    _create_partitions('token_history')
+    op.execute('INSERT INTO token_history SELECT * FROM token_history_legacy')
+    # Keep the id sequence when the legacy table (its current owner) is dropped
+    op.execute('ALTER SEQUENCE token_history_id_seq OWNED BY token_history.id')
+    op.drop_table('token_history_legacy')
+
+    # generations
+    _rename_old('generations', 'legacy', ['ix_generations_user_id'])
+    op.create_table('generations',
+    *_generations_columns(),
+    sa.PrimaryKeyConstraint('id', 'created_at'),
+    postgresql_partition_by='RANGE (created_at)'
+    )
+    op.create_index('ix_generations_user_id', 'generations', ['user_id'], unique=False)
+    _create_partitions('generations')
+    op.execute('INSERT INTO generations SELECT * FROM generations_legacy')
+    op.drop_table('generations_legacy')
+
+
+def downgrade() -> None:
+    # Rows in partitions that were already archived are not restored
+    _rename_old('generations', 'partitioned', ['ix_generations_user_id'])
+    op.create_table('generations',
+    *_generations_columns(),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_generations_user_id'), 'generations', ['user_id'], unique=False)
+    op.execute('INSERT INTO generations SELECT * FROM generations_partitioned')
+    op.drop_table('generations_partitioned')
+
+    _rename_old('token_history', 'partitioned', ['ix_token_history_user_id_id'])
+    op.create_table('token_history',
+    *_token_history_columns(),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_token_history_id'), 'token_history', ['id'], unique=False)
+    op.create_index('ix_token_history_user_id_id', 'token_history', ['user_id', 'id'], unique=False)
+    op.execute('INSERT INTO token_history SELECT * FROM token_history_partitioned')
+    op.execute('ALTER SEQUENCE token_history_id_seq OWNED BY token_history.id')
+    op.drop_table('token_history_partitioned')
@@ -0,0 +1,66 @@
+"""index audit
+
+Revision ID: be951720f8ee
+Revises: 9675a4802f3d
+Create Date: 2026-10-19 16:45:28.693005
+
+Drops the secondary indexes the initial schema created on primary keys
+(the primary key index already covers them) and indexes the foreign keys
+that had none, so per-user queries and the ON DELETE CASCADE from users
+use an index instead of a sequential scan:
+
+* subscriptions.user_id, together with created_at for the per-user history
+* user_verifications.user_id
+
+refresh_tokens.expires_at is indexed as well for the purge job, like
+idempotency_keys.expires_at.
+
+token_history.user_id is covered by ix_token_history_user_id_id, and
+ix_token_history_id was already left out when token_history was
+partitioned. Every index is built and dropped CONCURRENTLY, outside a
+transaction, so writes are not blocked; tests/test_indexes.py checks
+the result.
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'be951720f8ee'
+down_revision: Union[str, None] = '9675a4802f3d'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+NEW_INDEXES = [
+    ('ix_subscriptions_user_id_created_at', 'subscriptions', ['user_id', 'created_at']),
+    ('ix_user_verifications_user_id', 'user_verifications', ['user_id']),
+    ('ix_refresh_tokens_expires_at', 'refresh_tokens', ['expires_at']),
+]
+PRIMARY_KEY_INDEXES = [
+    ('ix_users_id', 'users'),
+    ('ix_subscriptions_id', 'subscriptions'),
+    ('ix_user_verifications_id', 'user_verifications'),
+]
+
+
+def upgrade() -> None:
+    with op.get_context().autocommit_block():
+        for name, table, columns in NEW_INDEXES:
+            # A failed concurrent build leaves an invalid index behind; drop
+            # it so a rerun builds it again
+            op.drop_index(name, table_name=table, if_exists=True, postgresql_concurrently=True)
+            op.create_index(name, table, columns, unique=False, postgresql_concurrently=True)
+        for name, table in PRIMARY_KEY_INDEXES:
+            op.drop_index(name, table_name=table, if_exists=True, postgresql_concurrently=True)
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        for name, table in PRIMARY_KEY_INDEXES:
+            op.drop_index(name, table_name=table, if_exists=True, postgresql_concurrently=True)
+            op.create_index(name, table, ['id'], unique=False, postgresql_concurrently=True)
+        for name, table, columns in NEW_INDEXES:
+            op.drop_index(name, table_name=table, if_exists=True, postgresql_concurrently=True)
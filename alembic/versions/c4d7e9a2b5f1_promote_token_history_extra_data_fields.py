@@ -0,0 +1,66 @@
+"""promote token_history extra_data fields to columns
+
+Revision ID: c4d7e9a2b5f1
+Revises: b8e2d4f6a1c3
+Create Date: 2026-10-19 14:00:00.000000
+
+Moves generation_url (as generation_id), subscription_id and amount_paid
+out of extra_data into typed columns and drops the duplicated prompt,
+which is read from generations instead.
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c4d7e9a2b5f1'
+down_revision: Union[str, None] = 'b8e2d4f6a1c3'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('token_history', sa.Column('generation_id', sa.UUID(), nullable=True))
+    op.add_column('token_history', sa.Column('subscription_id', sa.String(), nullable=True))
+    op.add_column('token_history', sa.Column('amount_paid', sa.Float(), nullable=True))
+
+    op.execute("""
+        UPDATE token_history AS th
+        SET generation_id = g.id
+        FROM generations AS g
+        WHERE g.user_id = th.user_id
+          AND g.url = th.extra_data->>'generation_url'
+    """)
+    # Rows whose generation is gone keep their extra_data untouched
+    op.execute("""
+        UPDATE token_history
+        SET extra_data = extra_data - 'generation_url' - 'prompt'
+        WHERE generation_id IS NOT NULL
+    """)
+    op.execute("""
+        UPDATE token_history
+        SET subscription_id = extra_data->>'subscription_id',
+            amount_paid = (extra_data->>'amount_paid')::float,
+            extra_data = extra_data - 'subscription_id' - 'amount_paid'
+        WHERE extra_data ? 'subscription_id'
+    """)
+
+
+def downgrade() -> None:
+    op.execute("""
+        UPDATE token_history AS th
+        SET extra_data = th.extra_data || jsonb_build_object('prompt', g.prompt, 'generation_url', g.url)
+        FROM generations AS g
+        WHERE g.id = th.generation_id
+    """)
+    op.execute("""
+        UPDATE token_history
+        SET extra_data = extra_data || jsonb_build_object('subscription_id', subscription_id, 'amount_paid', amount_paid)
+        WHERE subscription_id IS NOT NULL
+    """)
+    op.drop_column('token_history', 'amount_paid')
+    op.drop_column('token_history', 'subscription_id')
+    op.drop_column('token_history', 'generation_id')
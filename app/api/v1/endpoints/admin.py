@@ -0,0 +1,114 @@
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response, status
+from fastapi.routing import APIRoute
+from sqlalchemy.orm import Session
+from typing import Optional
+import asyncio
+import json
+import os
+import time
+import tracemalloc
+from app.core.dependencies import get_current_admin_user, get_db
+from app.core.loop_monitor import loop_monitor
+from app.core.profiler import SamplingProfiler, memory_growth
+from app.models.user import User
+
+router = APIRouter()
+
+# One profiling window per worker at a time
+profile_lock = asyncio.Lock()
+
+def _route_code(request: Request, route: str):
+    """Code objects of the endpoints whose path ends with ``route``"""
+    route = "/" + route.strip("/")
+    codes = frozenset(
+        candidate.endpoint.__code__
+        for candidate in request.app.routes
+        if isinstance(candidate, APIRoute) and candidate.path.rstrip("/").endswith(route)
+    )
+    if not codes:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=f"No route matches {route}")
+    return codes
+
+@router.post("/profile/cpu")
+async def profile_cpu(
+    request: Request,
+    seconds: float = Query(10, gt=0, le=120),
+    interval_ms: float = Query(5, ge=1, le=100),
+    route: Optional[str] = Query(None, description="Only keep samples taken inside this route's endpoint, e.g. /generation/history"),
+    format: str = Query("speedscope", pattern="^(speedscope|collapsed)$"),
+    include_idle: bool = False,
+    db: Session = Depends(get_db),
+    admin: User = Depends(get_current_admin_user)
+):
+    """Sample this worker's stacks for a while and return a CPU profile.
+
+    ``speedscope`` opens in https://www.speedscope.app; ``collapsed`` is the
+    folded-stack input of flamegraph.pl. Each call profiles only the worker
+    process that serves it (see the X-Worker-Pid header).
+    """
+    code_filter = _route_code(request, route) if route else None
+    if profile_lock.locked():
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="A profile is already running on this worker")
+    # Don't hold a pooled connection for the length of the window
+    db.close()
+
+    async with profile_lock:
+        profiler = SamplingProfiler(interval_ms / 1000, code_filter, include_idle)
+        await asyncio.to_thread(profiler.run, seconds)
+
+    name = f"pid {os.getpid()} {route or 'all routes'} {time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime())}"
+    headers = {
+        "X-Worker-Pid": str(os.getpid()),
+        "X-Profile-Samples": str(profiler.samples),
+    }
+    if format == "collapsed":
+        return Response(profiler.collapsed(), media_type="text/plain", headers=headers)
+    headers["Content-Disposition"] = f'attachment; filename="profile-{os.getpid()}.speedscope.json"'
+    return Response(
+        content=json.dumps(profiler.speedscope(name)),
+        media_type="application/json",
+        headers=headers
+    )
+
+@router.post("/profile/memory")
+async def profile_memory(
+    seconds: float = Query(60, gt=0, le=900),
+    frames: int = Query(10, ge=1, le=50, description="Stack depth recorded per allocation"),
+    group_by: str = Query("traceback", pattern="^(traceback|lineno|filename)$"),
+    limit: int = Query(25, ge=1, le=200),
+    db: Session = Depends(get_db),
+    admin: User = Depends(get_current_admin_user)
+):
+    """Trace allocations for a while and return what grew the most.
+
+    tracemalloc only runs for the length of the window; allocations made
+    before it started are not counted.
+    """
+    if profile_lock.locked() or tracemalloc.is_tracing():
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="A profile is already running on this worker")
+    db.close()
+
+    async with profile_lock:
+        tracemalloc.start(frames)
+        try:
+            # Snapshots of a long window are large; take them off the loop
+            before = await asyncio.to_thread(tracemalloc.take_snapshot)
+            await asyncio.sleep(seconds)
+            after = await asyncio.to_thread(tracemalloc.take_snapshot)
+            traced, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+        growth = await asyncio.to_thread(memory_growth, before, after, group_by, limit)
+
+    return {
+        "pid": os.getpid(),
+        "seconds": seconds,
+        "traced_bytes": traced,
+        "peak_bytes": peak,
+        "top": growth,
+    }
+
+@router.get("/loop/blocks")
+async def recent_loop_blocks(admin: User = Depends(get_current_admin_user)):
+    """Recent event loop stalls on this worker with the blocking stack and request"""
+    return {"pid": os.getpid(), "threshold_seconds": loop_monitor.threshold, "blocks": loop_monitor.recent_blocks()}
@@ -1,15 +1,18 @@
 from fastapi import APIRouter, HTTPException, Depends
 from sqlalchemy.orm import Session
-from app.schemas.auth import UserSignUp, UserLogin, Token, VerifyEmailResponse
+from app.schemas.auth import UserSignUp, UserLogin, Token, VerifyEmailResponse, RefreshRequest, RefreshResponse
 from app.db.session import get_db
 from app.core.config import get_settings
-from app.models.user import User
 from app.models.user_verification import UserVerification
+from app.db.queries import get_login_row, insert_user_with_verification
 from app.services.email_service import send_verification_email
+from app.services.refresh_token_service import refresh_token_service
+from app.services.verification_service import verification_service
+import asyncio
 import bcrypt
 from datetime import datetime, timedelta
 import pytz
-from jose import JWTError, jwt
+from jose import jwt
 
 router = APIRouter()
 settings = get_settings()
@@ -52,38 +55,24 @@ async def signup(user_data: UserSignUp, db: Session = Depends(get_db)):
         if not user_data.password:
             raise HTTPException(status_code=400, detail="Password is required")
 
-        # Check if user already exists
-        existing_user = db.query(User).filter(User.email == user_data.email).first()
-        if existing_user:
-            raise HTTPException(status_code=400, detail="Email already registered")
-
-        # Hash the password
-        hashed_password = hash_password(user_data.password)
+        # bcrypt takes most of a second; keep it off the event loop
+        hashed_password = await asyncio.to_thread(hash_password, user_data.password)
 
-        # Create new user
-        new_user = User(
+        # User and verification in one statement; a taken email is detected
+        # by the unique index instead of a separate lookup
+        verification_token, token_hash, expires_at = verification_service.new_token()
+        user_id = insert_user_with_verification(
+            db,
             email=user_data.email,
             full_name=user_data.full_name,
             hashed_password=hashed_password,
-            is_active=False
+            token_hash=token_hash,
+            expires_at=expires_at
         )
-        
-        db.add(new_user)
-        db.flush()  # Get the user ID without committing
-
-        # Create verification record
-        verification_token = create_access_token(
-            {"email": user_data.email, "type": "verification"}
-        )
-        verification = UserVerification(
-            user_id=new_user.id,
-            verification_token=verification_token,
-            expires_at=get_utc_now() + timedelta(hours=settings.VERIFICATION_TOKEN_EXPIRE_HOURS)
-        )
-        
-        db.add(verification)
+        if user_id is None:
+            db.rollback()
+            raise HTTPException(status_code=400, detail="Email already registered")
         db.commit()
-        db.refresh(new_user)
 
         # Send verification email
         try:
@@ -98,7 +87,7 @@ async def signup(user_data: UserSignUp, db: Session = Depends(get_db)):
         
         return {
             "message": "User created successfully. Please check your email for verification.",
-            "user_id": new_user.id
+            "user_id": user_id
         }
     except HTTPException:
         raise
@@ -112,8 +101,8 @@ async def login(user_data: UserLogin, db: Session = Depends(get_db)):
         if not user_data.password:
             raise HTTPException(status_code=400, detail="Password is required")
 
-        # Get user from database
-        user = db.query(User).filter(User.email == user_data.email).first()
+        # Get the columns needed to check credentials
+        user = get_login_row(db, user_data.email)
         if not user:
             raise HTTPException(status_code=400, detail="Invalid email or password")
 
@@ -137,20 +126,7 @@ async def login(user_data: UserLogin, db: Session = Depends(get_db)):
                     )
                 # If no verification record or expired, create new one and send email
                 else:
-                    verification_token = create_access_token(
-                        {"email": user.email, "type": "verification"}
-                    )
-                    if verification:
-                        verification.verification_token = verification_token
-                        verification.expires_at = current_time + timedelta(hours=settings.VERIFICATION_TOKEN_EXPIRE_HOURS)
-                    else:
-                        verification = UserVerification(
-                            user_id=user.id,
-                            verification_token=verification_token,
-                            expires_at=current_time + timedelta(hours=settings.VERIFICATION_TOKEN_EXPIRE_HOURS)
-                        )
-                        db.add(verification)
-                    
+                    verification_token = verification_service.issue(db, user.id, verification)
                     db.commit()
                     
                     try:
@@ -171,11 +147,14 @@ async def login(user_data: UserLogin, db: Session = Depends(get_db)):
         access_token = create_access_token(
             data={"sub": str(user.id), "email": user.email}
         )
+        refresh_token = refresh_token_service.issue(db, user.id)
+        db.commit()
             
         return {
             "access_token": access_token,
             "token_type": "bearer",
-            "user": user
+            "user": user,
+            "refresh_token": refresh_token
         }
             
     except HTTPException:
@@ -187,46 +166,20 @@ async def login(user_data: UserLogin, db: Session = Depends(get_db)):
 @router.post("/verify-email", response_model=VerifyEmailResponse)
 async def verify_email(token: str, db: Session = Depends(get_db)):
     try:
-        # Decode token
-        payload = jwt.decode(token, settings.JWT_SECRET, algorithms=[settings.ALGORITHM])
-        email = payload.get("email")
-        token_type = payload.get("type")
-
-        if not email or token_type != "verification":
-            raise HTTPException(status_code=400, detail="Invalid verification token")
-
-        # Get user and verification
-        user = db.query(User).filter(User.email == email).first()
-        if not user:
-            raise HTTPException(status_code=404, detail="User not found")
-
-        verification = db.query(UserVerification).filter(
-            UserVerification.user_id == user.id,
-            UserVerification.verification_token == token
-        ).first()
-
+        # One probe on the token hash index, loading the user in the same query
+        verification = verification_service.find(db, token)
         if not verification:
             raise HTTPException(status_code=400, detail="Invalid verification token")
+        user = verification.user
 
         if verification.is_verified:
-            # Create access token even if already verified
-            access_token = create_access_token(
-                data={"sub": str(user.id), "email": user.email}
-            )
-            return VerifyEmailResponse(
-                message="Email already verified",
-                user=user,
-                access_token=access_token
-            )
+            # A replayed link must not mint tokens; the user signs in instead
+            return VerifyEmailResponse(message="Email already verified", user=user)
 
         current_time = get_utc_now()
         if verification.expires_at < current_time:
             # Create new verification token and send email
-            new_token = create_access_token(
-                {"email": user.email, "type": "verification"}
-            )
-            verification.verification_token = new_token
-            verification.expires_at = current_time + timedelta(hours=settings.VERIFICATION_TOKEN_EXPIRE_HOURS)
+            new_token = verification_service.issue(db, user.id, verification)
             db.commit()
             
             try:
@@ -249,6 +202,7 @@ async def verify_email(token: str, db: Session = Depends(get_db)):
         
         # Activate the user
         user.is_active = True
+        refresh_token = refresh_token_service.issue(db, user.id)
         
         db.commit()
         db.refresh(user)  # Refresh to get updated user data
@@ -261,12 +215,36 @@ async def verify_email(token: str, db: Session = Depends(get_db)):
         return VerifyEmailResponse(
             message="Email verified successfully",
             user=user,
-            access_token=access_token
+            access_token=access_token,
+            refresh_token=refresh_token
         )
-    except JWTError:
-        raise HTTPException(status_code=400, detail="Invalid verification token")
     except HTTPException:
         raise
     except Exception as e:
         db.rollback()
-        raise HTTPException(status_code=500, detail=str(e)) 
\ No newline at end of file
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.post("/refresh", response_model=RefreshResponse)
+async def refresh(request: RefreshRequest, db: Session = Depends(get_db)):
+    """New access token for a refresh token, without the password.
+
+    The refresh token is rotated: the response carries its replacement and
+    the presented one stops working.
+    """
+    try:
+        rotated = refresh_token_service.rotate(db, request.refresh_token)
+    except Exception as e:
+        db.rollback()
+        print(f"Refresh error: {str(e)}")
+        raise HTTPException(status_code=500, detail="Could not refresh the session")
+    if rotated is None:
+        raise HTTPException(
+            status_code=401,
+            detail="Invalid or expired refresh token",
+            headers={"WWW-Authenticate": "Bearer"}
+        )
+    user_id, email, refresh_token = rotated
+    return RefreshResponse(
+        access_token=create_access_token(data={"sub": str(user_id), "email": email}),
+        refresh_token=refresh_token
+    )
@@ -1,12 +1,18 @@
-from fastapi import APIRouter, HTTPException, Depends, UploadFile, File, Form
+from fastapi import APIRouter, HTTPException, Depends, UploadFile, File, Form, Header, Request, Response
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
 from typing import List, Dict, Optional
 from app.core.dependencies import get_current_user, get_db
+from app.core.rate_limit import generation_limiter
+from app.core.serialization import ListSerializer
+from app.core.http_cache import REVALIDATE, not_modified, set_cache_headers, user_etag
 from app.models.user import User
 from app.models.generation import Generation, GenerationType
 from app.services.dalle_service import generate_image
 from app.services.runway_service import runway_service
 from app.services.storage_service import storage_service
+from app.services.export_service import export_service
+from app.services.idempotency_service import fingerprint, idempotency_service
 from app.schemas.generation import (
     ImageGenerationRequest,
     GenerationResponse,
@@ -14,29 +20,58 @@ from app.schemas.generation import (
 )
 from datetime import datetime
 from app.core.config import get_settings
+import hashlib
 import os
 
 settings = get_settings()
 router = APIRouter()
+generation_log_serializer = ListSerializer(GenerationLog)
 
-@router.post("/generate-image", response_model=GenerationResponse)
+IDEMPOTENCY_KEY_HEADER = Header(
+    None,
+    alias="Idempotency-Key",
+    max_length=255,
+    description="Retries with the same key return the first request's result instead of generating again"
+)
+
+def generation_response(result: Dict, replayed: bool, response: Response) -> Dict:
+    """Response body for a stored generation result, with a freshly signed URL"""
+    if replayed:
+        response.headers["Idempotent-Replayed"] = "true"
+    file_path = result["file_path"]
+    return {
+        # Get filename from path for content disposition
+        "url": storage_service.get_signed_url(file_path, display_name=os.path.basename(file_path)),
+        "status": "success",
+        "generated_at": result["generated_at"]
+    }
+
+@router.post(
+    "/generate-image",
+    response_model=GenerationResponse
+)
 async def create_image(
     request: ImageGenerationRequest,
+    response: Response,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_db),
+    idempotency_key: Optional[str] = IDEMPOTENCY_KEY_HEADER
 ):
     """
     Generate an image using DALL-E model.
     """
+    # Admission only for the attempt that actually generates; duplicates
+    # and replays of an Idempotency-Key take no rate token or slot
+    async def produce() -> Dict:
+        async with generation_limiter.slot(current_user.id):
+            file_path = await generate_image(request.prompt, current_user.id, db)
+        return {"file_path": file_path, "generated_at": datetime.now().isoformat()}
+
     try:
-        file_path = await generate_image(request.prompt, current_user.id, db)
-        # Get filename from path for content disposition
-        filename = os.path.basename(file_path)
-        return {
-            "url": storage_service.get_signed_url(file_path, display_name=filename),
-            "status": "success",
-            "generated_at": datetime.now()
-        }
+        result, replayed = await idempotency_service.run(
+            db, current_user.id, idempotency_key, "generate-image", fingerprint(request.prompt), produce
+        )
+        return generation_response(result, replayed, response)
     
     except HTTPException as http_error:
         # Re-raise HTTP exceptions with their original status code and detail
@@ -52,25 +87,32 @@ async def create_image(
     response_description="Returns the URL of the generated video"
 )
 async def create_video(
+    response: Response,
     prompt: str = Form(..., description=""),
     reference_image: UploadFile = File(..., description=""),
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_db),
+    idempotency_key: Optional[str] = IDEMPOTENCY_KEY_HEADER
 ):
+    async def produce() -> Dict:
+        async with generation_limiter.slot(current_user.id):
+            file_path = await runway_service.generate_video(
+                prompt,
+                current_user.id,
+                reference_image,
+                db
+            )
+        return {"file_path": file_path, "generated_at": datetime.now().isoformat()}
+
     try:
-        file_path = await runway_service.generate_video(
-            prompt,
-            current_user.id,
-            reference_image,
-            db
+        request_hash = None
+        if idempotency_key is not None:
+            request_hash = fingerprint(prompt, hashlib.sha256(await reference_image.read()).digest())
+            await reference_image.seek(0)
+        result, replayed = await idempotency_service.run(
+            db, current_user.id, idempotency_key, "generate-video", request_hash, produce
         )
-        # Get filename from path for content disposition
-        filename = os.path.basename(file_path)
-        return {
-            "url": storage_service.get_signed_url(file_path, display_name=filename),
-            "status": "success",
-            "generated_at": datetime.now()
-        }
+        return generation_response(result, replayed, response)
     except HTTPException as http_error:
         # Re-raise HTTP exceptions with their original status code and detail
         raise http_error
@@ -84,12 +126,30 @@ async def create_video(
     description="Retrieve the history of all your image and video generations"
 )
 async def get_generation_history(
+    request: Request,
     current_user: User = Depends(get_current_user),
     type: Optional[str] = None,
     db: Session = Depends(get_db)
 ):
     try:
-        query = db.query(Generation).filter(Generation.user_id == current_user.id)
+        # URLs below are signed for this window, which the ETag includes
+        signed_at = storage_service.signing_window()
+        etag = user_etag(current_user, request, signed_at.timestamp())
+        cached = not_modified(request, etag, REVALIDATE)
+        if cached:
+            return cached
+
+        query = db.query(
+            Generation.id,
+            Generation.user_id,
+            Generation.prompt,
+            Generation.type,
+            Generation.url,
+            Generation.reference_image_url,
+            Generation.status,
+            Generation.created_at,
+            Generation.updated_at
+        ).filter(Generation.user_id == current_user.id)
         
         # Add type filter if specified
         if type:
@@ -100,19 +160,44 @@ async def get_generation_history(
         # Execute query with ordering
         generations = query.order_by(Generation.created_at.desc()).all()
         
-        # Generate signed URLs for all media
-        for gen in generations:
-            filename = os.path.basename(gen.url)
-            gen.url = storage_service.get_signed_url(gen.url, display_name=filename)
-            if gen.reference_image_url:
-                ref_filename = os.path.basename(gen.reference_image_url)
-                gen.reference_image_url = storage_service.get_signed_url(
-                    gen.reference_image_url,
-                    display_name=ref_filename
-                )
-        
-        return generations
+        # Generate signed URLs for all media in one batch
+        urls = storage_service.get_signed_urls([gen.url for gen in generations], signed_at=signed_at)
+        reference_urls = storage_service.get_signed_urls(
+            [gen.reference_image_url for gen in generations], signed_at=signed_at
+        )
+        response = generation_log_serializer.response([
+            {**gen._mapping, "url": url, "reference_image_url": reference_url}
+            for gen, url, reference_url in zip(generations, urls, reference_urls)
+        ])
+        return set_cache_headers(response, etag, REVALIDATE)
     except HTTPException:
         raise
     except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e)) 
\ No newline at end of file
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.get(
+    "/export",
+    summary="Export all generations",
+    description="Download all your generations and a manifest of their prompts as a ZIP archive",
+    response_class=StreamingResponse
+)
+async def export_generations(
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    generations = db.query(
+        Generation.id,
+        Generation.type,
+        Generation.prompt,
+        Generation.url,
+        Generation.created_at
+    ).filter(
+        Generation.user_id == current_user.id
+    ).order_by(Generation.created_at).all()
+
+    filename = f"generations-{datetime.now().strftime('%Y%m%d')}.zip"
+    return StreamingResponse(
+        export_service.stream_zip(generations),
+        media_type="application/zip",
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'}
+    )
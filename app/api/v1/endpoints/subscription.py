@@ -1,14 +1,18 @@
-from fastapi import APIRouter, HTTPException, Depends, status, Request, Response
+from fastapi import APIRouter, HTTPException, Depends, status, Request, Response, Query
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session
 from typing import List, Dict
-from app.core.dependencies import get_current_user, get_db
+from app.core.dependencies import get_current_admin_user, get_current_user, get_db
 from app.models.user import User
 from app.models.subscription import Subscription
 from app.models.token_history import TokenHistory, TokenActionType
+from app.db.queries import change_token_balance, get_payment_status, subscription_exists
 from app.services.stripe_service import stripe_service
 from app.services.token_history import token_history_service
+from app.services.usage_rollup import usage_rollup_service
 from app.core.config import get_settings
 from app.schemas.subscription import SubscriptionResponse, CreateCheckoutSession
+from app.schemas.usage import DailyRevenueResponse
 
 router = APIRouter()
 settings = get_settings()
@@ -31,11 +35,7 @@ async def create_subscription(
 ) -> bool:
     """Create subscription record if not exists"""
     # Check if this payment was already processed
-    existing_subscription = db.query(Subscription).filter(
-        Subscription.transaction_id == session["id"]
-    ).first()
-    
-    if existing_subscription:
+    if subscription_exists(db, session["id"]):
         return False
         
     try:
@@ -91,23 +91,17 @@ async def create_subscription(
                 tokens=tokens,  # positive value for tokens added
                 action_type=TokenActionType.ADDED,
                 description="Subscription purchase",
-                extra_data={
-                    "subscription_id": session["id"],
-                    "payment_method": "stripe",
-                    "amount_paid": session["amount_total"] / 100
-                }
+                extra_data={"payment_method": "stripe"},
+                subscription_id=session["id"],
+                amount_paid=session["amount_total"] / 100
             )
             
             # Update user's token balance
-            user = db.query(User).filter(User.id == user_id).first()
-            if not user:
+            if change_token_balance(db, user_id, tokens) is None:
                 raise HTTPException(
                     status_code=status.HTTP_404_NOT_FOUND,
                     detail=f"User not found with ID: {user_id}"
                 )
-                
-            user.tokens += tokens
-            db.add(user)
         
         db.commit()
         return True
@@ -115,6 +109,15 @@ async def create_subscription(
     except HTTPException:
         db.rollback()
         raise
+    except IntegrityError as e:
+        db.rollback()
+        # A concurrent webhook or verification recorded it first
+        if subscription_exists(db, session["id"]):
+            return False
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Failed to process payment: {str(e)}"
+        )
     except Exception as e:
         db.rollback()
         raise HTTPException(
@@ -156,7 +159,14 @@ async def verify_payment(
 ):
     """Verify payment status and process if needed"""
     try:
-        # Get session from Stripe
+        # Sessions already recorded as paid need no Stripe call
+        if get_payment_status(db, session_id) == "paid":
+            return {
+                "status": "success",
+                "message": "Payment was already processed"
+            }
+
+        # Get session from Stripe; concurrent polls share one request
         session = await stripe_service.get_session(session_id)
         
         # Only process completed payments
@@ -193,4 +203,13 @@ def get_subscription_history(
         Subscription.created_at.desc()
     ).offset(skip).limit(limit).all()
     
-    return subscriptions 
\ No newline at end of file
+    return subscriptions
+
+@router.get("/revenue", response_model=List[DailyRevenueResponse])
+def get_daily_revenue(
+    days: int = Query(30, ge=1, le=366),
+    db: Session = Depends(get_db),
+    admin: User = Depends(get_current_admin_user)
+):
+    """Get daily revenue from paid subscriptions"""
+    return usage_rollup_service.daily_totals(db, days)
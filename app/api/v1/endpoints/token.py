@@ -1,31 +1,107 @@
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
 from sqlalchemy.orm import Session
 from typing import List
-from app.core.dependencies import get_current_user, get_db
+from datetime import datetime
+from app.core.config import get_settings
+from app.core.dependencies import get_current_admin_user, get_current_user, get_db
 from app.services.token_history import token_history_service
+from app.services.ledger import ledger_service
+from app.services.usage_rollup import usage_rollup_service
 from app.models.user import User
 from app.schemas.token_history import TokenHistoryResponse
+from app.core.serialization import ListSerializer
+from app.core.http_cache import REVALIDATE, not_modified, set_cache_headers, user_etag
+from app.services.storage_service import storage_service
+from app.schemas.usage import DailyActivityResponse, DailyUsageResponse, GlobalDailyUsageResponse
 
+settings = get_settings()
 router = APIRouter()
+token_history_serializer = ListSerializer(TokenHistoryResponse)
+
+# When extra_data.generation_url and extra_data.prompt go away, along with
+# TOKEN_HISTORY_LEGACY_EXTRA_DATA
+LEGACY_EXTRA_DATA_SUNSET = "Sun, 31 Jan 2027 00:00:00 GMT"
 
 @router.get("/balance")
 def get_token_balance(
+    request: Request,
+    response: Response,
     current_user: User = Depends(get_current_user)
 ):
     """Get current token balance for the user"""
+    etag = user_etag(current_user, request)
+    cached = not_modified(request, etag, REVALIDATE)
+    if cached:
+        return cached
+    set_cache_headers(response, etag, REVALIDATE)
     return {"tokens": current_user.tokens}
 
+@router.get("/balance/as-of")
+def get_token_balance_as_of(
+    at: datetime,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """Get the user's ledger token balance at a point in time"""
+    try:
+        tokens = ledger_service.balance_as_of(db, current_user.id, at)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return {"tokens": tokens, "as_of": at}
+
 @router.get("/history", response_model=List[TokenHistoryResponse])
 def get_token_history(
+    request: Request,
     skip: int = 0,
     limit: int = 100,
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
     """Get token history for current user"""
-    return token_history_service.get_user_token_history(
+    # The ETag rotates with the URL signing window, so a revalidated copy
+    # never holds URLs closer to expiry than one window
+    signed_at = storage_service.signing_window()
+    etag = user_etag(current_user, request, signed_at.timestamp())
+    cached = not_modified(request, etag, REVALIDATE)
+    if cached:
+        return cached
+    legacy = settings.TOKEN_HISTORY_LEGACY_EXTRA_DATA
+    response = token_history_serializer.response(token_history_service.get_user_token_history(
         db=db,
         user_id=current_user.id,
         skip=skip,
-        limit=limit
-    ) 
\ No newline at end of file
+        limit=limit,
+        signed_at=signed_at,
+        legacy_extra_data=legacy
+    ))
+    if legacy:
+        response.headers["Deprecation"] = "true"
+        response.headers["Sunset"] = LEGACY_EXTRA_DATA_SUNSET
+    return set_cache_headers(response, etag, REVALIDATE)
+
+@router.get("/usage", response_model=List[DailyUsageResponse])
+def get_token_usage(
+    days: int = Query(30, ge=1, le=366),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """Get the current user's daily token consumption by generation type"""
+    return usage_rollup_service.user_usage(db, current_user.id, days)
+
+@router.get("/usage/global", response_model=List[GlobalDailyUsageResponse])
+def get_global_token_usage(
+    days: int = Query(30, ge=1, le=366),
+    db: Session = Depends(get_db),
+    admin: User = Depends(get_current_admin_user)
+):
+    """Get daily token consumption and active users of all users by generation type"""
+    return usage_rollup_service.global_usage(db, days)
+
+@router.get("/usage/daily", response_model=List[DailyActivityResponse])
+def get_daily_activity(
+    days: int = Query(30, ge=1, le=366),
+    db: Session = Depends(get_db),
+    admin: User = Depends(get_current_admin_user)
+):
+    """Get daily active users and total token consumption"""
+    return usage_rollup_service.daily_totals(db, days)
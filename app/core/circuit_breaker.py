@@ -0,0 +1,199 @@
+import asyncio
+import enum
+import math
+import time
+from collections import deque
+from typing import Any, Callable, Deque, Optional, Tuple
+from fastapi import HTTPException, status
+from app.core.config import get_settings
+from app.core.tracing import span
+
+settings = get_settings()
+
+
+class CircuitState(str, enum.Enum):
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+
+class CircuitOpenError(HTTPException):
+    """Raised without calling the provider while its circuit is open"""
+
+    def __init__(self, name: str, retry_after: float):
+        super().__init__(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail=f"{name} is temporarily unavailable. Please retry later.",
+            headers={"Retry-After": str(max(1, math.ceil(retry_after)))},
+        )
+
+
+# Timeout and connection error base classes of the provider SDKs, by
+# (top-level module, class name) so checking them imports no SDK
+TRANSIENT_ERRORS = {
+    ("openai", "APIConnectionError"),
+    ("runwayml", "APIConnectionError"),
+    ("httpx", "TransportError"),
+}
+
+
+def is_provider_failure(error: Exception) -> bool:
+    """Count timeouts, connection errors, throttling and 5xx; not client errors.
+
+    Anything else, including bugs in our own code, leaves the breaker alone.
+    """
+    if isinstance(error, (TimeoutError, ConnectionError)):
+        return True
+    if any((cls.__module__.split(".")[0], cls.__name__) in TRANSIENT_ERRORS for cls in type(error).__mro__):
+        return True
+    status_code = getattr(error, "status_code", None)
+    if status_code is None:
+        status_code = getattr(getattr(error, "response", None), "status_code", None)
+    return isinstance(status_code, int) and (status_code == 429 or status_code >= 500)
+
+
+def _call_name(func: Callable[..., Any]) -> str:
+    """SDK method name for span names, e.g. ``Images.generate``"""
+    return getattr(func, "__qualname__", getattr(func, "__name__", "call"))
+
+
+async def hedged(func: Callable[..., Any], *args, delay: float, attempts: int = 2, **kwargs) -> Any:
+    """Run a blocking idempotent call in a thread, starting a duplicate if it
+    has not finished after ``delay`` seconds, and return the first success."""
+    pending = set()
+    last_error: Optional[BaseException] = None
+    try:
+        for attempt in range(attempts):
+            pending.add(asyncio.ensure_future(asyncio.to_thread(func, *args, **kwargs)))
+            timeout = delay if attempt < attempts - 1 else None
+            while pending:
+                done, pending = await asyncio.wait(pending, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+                if not done:
+                    break  # hedge delay elapsed; launch another attempt
+                for task in done:
+                    if task.exception() is None:
+                        return task.result()
+                    last_error = task.exception()
+        raise last_error
+    finally:
+        # Losing attempts keep running in their threads; their results are dropped
+        for task in pending:
+            task.cancel()
+
+
+class CircuitBreaker:
+    """Failure-rate circuit breaker for blocking provider SDK calls.
+
+    Closed: calls go through and outcomes are tracked over a sliding window.
+    Once at least ``min_calls`` outcomes are in the window and the failure
+    rate reaches ``failure_rate`` the circuit opens and calls fail fast with
+    ``CircuitOpenError``. After ``open_seconds`` a limited number of probe
+    calls are let through (half-open); a success closes the circuit again,
+    a failure re-opens it. Outcomes of calls started before the latest state
+    change are ignored.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        failure_rate: Optional[float] = None,
+        min_calls: Optional[int] = None,
+        window_seconds: Optional[float] = None,
+        open_seconds: Optional[float] = None,
+        half_open_max_calls: int = 1,
+        is_failure: Callable[[Exception], bool] = is_provider_failure
+    ):
+        self.name = name
+        self.failure_rate = failure_rate if failure_rate is not None else settings.PROVIDER_BREAKER_FAILURE_RATE
+        self.min_calls = min_calls if min_calls is not None else settings.PROVIDER_BREAKER_MIN_CALLS
+        self.window_seconds = window_seconds if window_seconds is not None else settings.PROVIDER_BREAKER_WINDOW_SECONDS
+        self.open_seconds = open_seconds if open_seconds is not None else settings.PROVIDER_BREAKER_OPEN_SECONDS
+        self.half_open_max_calls = half_open_max_calls
+        self.is_failure = is_failure
+
+        self._state = CircuitState.CLOSED
+        self._opened_at = 0.0
+        self._probes = 0
+        self._outcomes: Deque[Tuple[float, bool]] = deque()  # (timestamp, failed)
+        self._failures = 0
+        self._generation = 0  # bumped on every state change
+
+    @property
+    def state(self) -> CircuitState:
+        if self._state == CircuitState.OPEN and time.monotonic() - self._opened_at >= self.open_seconds:
+            self._state = CircuitState.HALF_OPEN
+            self._probes = 0
+            self._generation += 1
+        return self._state
+
+    async def call(self, func: Callable[..., Any], *args, **kwargs) -> Any:
+        """Run a blocking provider call in a worker thread through the breaker"""
+        with span(f"{self.name} {_call_name(func)}", provider=self.name):
+            return await self._guard(asyncio.to_thread(func, *args, **kwargs))
+
+    async def call_hedged(self, hedge_delay: float, func: Callable[..., Any], *args, **kwargs) -> Any:
+        """Like ``call`` for idempotent requests, hedged after ``hedge_delay`` seconds"""
+        if not hedge_delay:
+            return await self.call(func, *args, **kwargs)
+        with span(f"{self.name} {_call_name(func)}", provider=self.name, hedge_delay=hedge_delay):
+            return await self._guard(hedged(func, *args, delay=hedge_delay, **kwargs))
+
+    async def _guard(self, awaitable) -> Any:
+        try:
+            generation = self._before_call()
+        except CircuitOpenError:
+            awaitable.close()
+            raise
+        try:
+            result = await awaitable
+        except Exception as e:
+            self._record(self.is_failure(e), generation)
+            raise
+        self._record(False, generation)
+        return result
+
+    def _before_call(self) -> int:
+        """Admit a call; returns the state generation it started in"""
+        state = self.state
+        if state == CircuitState.OPEN:
+            raise CircuitOpenError(self.name, self.open_seconds - (time.monotonic() - self._opened_at))
+        if state == CircuitState.HALF_OPEN:
+            if self._probes >= self.half_open_max_calls:
+                raise CircuitOpenError(self.name, self.open_seconds)
+            self._probes += 1
+        return self._generation
+
+    def _record(self, failed: bool, generation: int) -> None:
+        if generation != self._generation:
+            return  # late result from a call started before the state changed
+        now = time.monotonic()
+        if self._state == CircuitState.HALF_OPEN:
+            if failed:
+                self._open(now)
+            else:
+                self._close()
+            return
+
+        self._outcomes.append((now, failed))
+        self._failures += failed
+        while self._outcomes and now - self._outcomes[0][0] > self.window_seconds:
+            _, old_failed = self._outcomes.popleft()
+            self._failures -= old_failed
+
+        if len(self._outcomes) >= self.min_calls and self._failures / len(self._outcomes) >= self.failure_rate:
+            self._open(now)
+
+    def _open(self, now: float) -> None:
+        print(f"Circuit for {self.name} opened")
+        self._state = CircuitState.OPEN
+        self._generation += 1
+        self._opened_at = now
+        self._outcomes.clear()
+        self._failures = 0
+
+    def _close(self) -> None:
+        print(f"Circuit for {self.name} closed")
+        self._state = CircuitState.CLOSED
+        self._generation += 1
+        self._outcomes.clear()
+        self._failures = 0
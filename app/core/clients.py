@@ -0,0 +1,144 @@
+import asyncio
+import threading
+from typing import Any, Callable, Dict, Optional
+from app.core.config import get_settings
+from app.core.tracing import instrument_boto3_client, instrument_engine
+
+settings = get_settings()
+
+
+class ClientRegistry:
+    """Lazily constructed, process-wide provider clients.
+
+    Heavy SDK imports and client construction happen on first use (or all at
+    once, in parallel, from the application lifespan) instead of at import.
+    """
+
+    def __init__(self):
+        self._factories: Dict[str, Callable[[], Any]] = {}
+        self._clients: Dict[str, Any] = {}
+        self._closers: Dict[str, Callable[[Any], None]] = {}
+        self._locks: Dict[str, threading.Lock] = {}
+
+    def register(
+        self,
+        name: str,
+        factory: Callable[[], Any],
+        close: Optional[Callable[[Any], None]] = None
+    ) -> None:
+        self._factories[name] = factory
+        self._locks[name] = threading.Lock()
+        if close is not None:
+            self._closers[name] = close
+
+    def get(self, name: str) -> Any:
+        client = self._clients.get(name)
+        if client is not None:
+            return client
+        with self._locks[name]:
+            if name not in self._clients:
+                self._clients[name] = self._factories[name]()
+            return self._clients[name]
+
+    def is_initialized(self, name: str) -> bool:
+        return name in self._clients
+
+    async def startup(self) -> None:
+        """Create every registered client concurrently in worker threads"""
+        names = list(self._factories)
+        results = await asyncio.gather(
+            *(asyncio.to_thread(self.get, name) for name in names),
+            return_exceptions=True
+        )
+        for name, result in zip(names, results):
+            if isinstance(result, Exception):
+                # Leave it uninitialized; first use will retry and surface the error
+                print(f"Failed to initialize {name} client: {str(result)}")
+
+    def shutdown(self) -> None:
+        """Release connection pools held by initialized clients"""
+        for name, client in list(self._clients.items()):
+            close = self._closers.get(name)
+            if close is None:
+                continue
+            try:
+                close(client)
+            except Exception as e:
+                print(f"Error closing {name} client: {str(e)}")
+        self._clients.clear()
+
+
+def _create_database():
+    from sqlalchemy import create_engine
+    engine = create_engine(
+        f"postgresql://{settings.DB_USER}:{settings.DB_PASSWORD}@{settings.DB_HOST}:{settings.DB_PORT}/{settings.DB_NAME}"
+    )
+    instrument_engine(engine)
+    return engine
+
+
+def _create_s3():
+    import boto3
+    from botocore.config import Config
+
+    # Configure S3 client with increased timeouts and retries
+    config = Config(
+        retries=dict(max_attempts=3),
+        connect_timeout=300,  # 5 minutes
+        read_timeout=300,
+        max_pool_connections=50,
+        signature_version='s3v4'  # Use signature v4 for Supabase
+    )
+    client = boto3.client(
+        's3',
+        aws_access_key_id=settings.S3_ACCESS_KEY,
+        aws_secret_access_key=settings.S3_SECRET_KEY,
+        region_name=settings.S3_REGION,
+        endpoint_url=settings.S3_ENDPOINT,
+        config=config
+    )
+    instrument_boto3_client(client)
+    return client
+
+
+def _create_openai():
+    from openai import OpenAI
+    return OpenAI(api_key=settings.AI_MODEL_KEY, base_url=settings.OPENAI_BASE_URL)
+
+
+def _create_runway():
+    from runwayml import RunwayML
+    return RunwayML(api_key=settings.RUNWAY_API_KEY, base_url=settings.RUNWAY_BASE_URL)
+
+
+def _create_mailjet():
+    from mailjet_rest import Client
+    return Client(
+        auth=(settings.MAILJET_API_KEY, settings.MAILJET_SECRET_KEY),
+        version='v3.1',
+        api_url=settings.MAILJET_API_URL
+    )
+
+
+def _create_redis():
+    from redis import asyncio as redis
+    return redis.from_url(settings.REDIS_URL)
+
+
+def _create_stripe():
+    import stripe
+    stripe.api_key = settings.STRIPE_SECRET_KEY
+    if settings.STRIPE_API_BASE:
+        stripe.api_base = settings.STRIPE_API_BASE
+    return stripe
+
+
+clients = ClientRegistry()
+clients.register("database", _create_database, close=lambda engine: engine.dispose())
+clients.register("s3", _create_s3, close=lambda s3: s3.close())
+clients.register("openai", _create_openai, close=lambda client: client.close())
+clients.register("runway", _create_runway, close=lambda client: client.close())
+clients.register("mailjet", _create_mailjet)
+clients.register("stripe", _create_stripe)
+if settings.REDIS_URL:
+    clients.register("redis", _create_redis)
@@ -1,6 +1,7 @@
+from pydantic import model_validator
 from pydantic_settings import BaseSettings, SettingsConfigDict
 from functools import lru_cache
-from typing import List, Union
+from typing import List, Optional, Union
 import json
 
 class Settings(BaseSettings):
@@ -17,7 +18,11 @@ class Settings(BaseSettings):
     # JWT settings
     JWT_SECRET: str
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 30
+    REFRESH_TOKEN_EXPIRE_DAYS: int = 30
     ALGORITHM: str = "HS256"
+    # Verified access tokens kept to skip signature checks on repeat
+    # requests (per worker); 0 disables
+    JWT_CACHE_SIZE: int = 10000
     
     # Email verification settings
     VERIFICATION_TOKEN_EXPIRE_HOURS: int = 24
@@ -25,6 +30,12 @@ class Settings(BaseSettings):
     # AI Model settings
     AI_MODEL_KEY: str
     RUNWAY_API_KEY: str
+    # Provider API base URLs; unset uses each SDK's default. Pointed at the
+    # local fakes in scripts/fake_providers.py for load tests
+    OPENAI_BASE_URL: Optional[str] = None
+    RUNWAY_BASE_URL: Optional[str] = None
+    STRIPE_API_BASE: Optional[str] = None
+    MAILJET_API_URL: Optional[str] = None
     
     # Database settings
     DB_HOST: str
@@ -48,10 +59,98 @@ class Settings(BaseSettings):
     S3_BUCKET_NAME: str
     S3_REGION: str = "ap-southeast-1"
     S3_ENDPOINT: str
+    # Signed URL lifetime; batches are signed at the start of a window of
+    # SIGNED_URL_WINDOW seconds so repeated polls get identical URLs
+    SIGNED_URL_EXPIRATION: int = 3600
+    SIGNED_URL_WINDOW: int = 1800
     
     # Stripe Settings
     STRIPE_SECRET_KEY: str
     STRIPE_WEBHOOK_SECRET: str
+    # Paid or expired checkout sessions kept per worker for /subscription/verify
+    STRIPE_SESSION_CACHE_SIZE: int = 1000
+
+    # Users allowed to read global dashboards, e.g. ["ops@example.com"]
+    ADMIN_EMAILS: List[str] = []
+
+    # Create provider clients at startup instead of on first request
+    WARM_UP_CLIENTS: bool = True
+
+    # Generation admission control; "memory" limits per worker, "redis"
+    # shares limits across workers through REDIS_URL
+    RATE_LIMIT_BACKEND: str = "memory"
+    REDIS_URL: Optional[str] = None
+    GENERATION_USER_RATE_PER_MINUTE: float = 6
+    GENERATION_USER_BURST: int = 3
+    GENERATION_GLOBAL_RATE_PER_MINUTE: float = 600
+    GENERATION_GLOBAL_BURST: int = 100
+    GENERATION_USER_MAX_CONCURRENT: int = 2
+    # Upper bound on how long a crashed worker's slot stays held in Redis
+    GENERATION_SLOT_TTL_SECONDS: int = 900
+
+    # Idempotency-Key on generation requests: how long results are replayed,
+    # when an unfinished attempt is considered abandoned, and how often a
+    # duplicate checks whether the first attempt finished
+    IDEMPOTENCY_KEY_TTL_HOURS: int = 24
+    IDEMPOTENCY_LOCK_SECONDS: int = 900
+    IDEMPOTENCY_POLL_INTERVAL: float = 1.0
+
+    # Deprecated, removed after 2027-01-31: also return generation_url and
+    # prompt inside extra_data on /tokens/history for clients not yet
+    # reading the top-level fields
+    TOKEN_HISTORY_LEGACY_EXTRA_DATA: bool = True
+
+    # Provider circuit breakers (OpenAI, RunwayML)
+    PROVIDER_BREAKER_FAILURE_RATE: float = 0.5
+    PROVIDER_BREAKER_MIN_CALLS: int = 5
+    PROVIDER_BREAKER_WINDOW_SECONDS: float = 60
+    PROVIDER_BREAKER_OPEN_SECONDS: float = 30
+    # Threads for blocking provider SDK calls run off the event loop
+    PROVIDER_CALL_THREADS: int = 64
+    # Seconds between Runway task status polls
+    RUNWAY_POLL_INTERVAL: float = 10
+    # Start a duplicate Runway status poll if one takes longer than this; 0 disables
+    RUNWAY_POLL_HEDGE_DELAY: float = 2.0
+
+    # Response compression (brotli when installed and accepted, else gzip)
+    COMPRESSION_ENABLED: bool = True
+    COMPRESSION_MINIMUM_SIZE: int = 1024
+    COMPRESSION_CONTENT_TYPES: List[str] = ["application/json", "text/html", "text/plain"]
+    COMPRESSION_GZIP_LEVEL: int = 6
+    COMPRESSION_BROTLI_QUALITY: int = 4
+
+    # Event loop lag monitor: heartbeat interval and the stall that gets its
+    # stack captured and logged
+    LOOP_MONITOR_ENABLED: bool = True
+    LOOP_MONITOR_INTERVAL: float = 0.05
+    LOOP_BLOCK_THRESHOLD: float = 0.1
+    # Bearer token the scraper must send to /metrics; unset disables /metrics
+    METRICS_TOKEN: Optional[str] = None
+
+    # Tracing (needs opentelemetry-sdk); exporter is console, file, otlp or
+    # "package.module:factory"
+    TRACING_ENABLED: bool = False
+    TRACING_EXPORTER: str = "console"
+    TRACING_FILE: str = "traces.jsonl"
+    TRACING_SAMPLE_RATIO: float = 0.05
+    TRACING_SERVICE_NAME: str = "vidgen-api"
+
+    # Generation export: parallel S3 reads and read size per chunk
+    EXPORT_CONCURRENCY: int = 4
+    EXPORT_CHUNK_SIZE: int = 1024 * 1024
+
+    # Monthly partitions of token_history and generations
+    PARTITION_MONTHS_AHEAD: int = 3
+    PARTITION_RETAIN_MONTHS: int = 12
+
+    @model_validator(mode="after")
+    def check_rate_limit_backend(self) -> "Settings":
+        # Fail at startup rather than on every generation request
+        if self.RATE_LIMIT_BACKEND not in ("memory", "redis"):
+            raise ValueError(f"RATE_LIMIT_BACKEND must be 'memory' or 'redis', not {self.RATE_LIMIT_BACKEND!r}")
+        if self.RATE_LIMIT_BACKEND == "redis" and not self.REDIS_URL:
+            raise ValueError("RATE_LIMIT_BACKEND=redis requires REDIS_URL")
+        return self
 
 @lru_cache()
 def get_settings() -> Settings:
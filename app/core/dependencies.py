@@ -1,8 +1,12 @@
+import secrets
+from typing import Optional
 from fastapi import Depends, HTTPException, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
-from jose import JWTError, jwt
+from jose import JWTError
 from app.core.config import get_settings
-from app.db.session import SessionLocal
+from app.core.jwt_cache import token_cache
+from app.db.queries import get_user_row
+from app.db.session import SessionLocal, get_engine
 from sqlalchemy.orm import Session
 from app.models.user import User
 
@@ -10,7 +14,7 @@ settings = get_settings()
 security = HTTPBearer()
 
 def get_db():
-    db = SessionLocal()
+    db = SessionLocal(bind=get_engine())
     try:
         yield db
     finally:
@@ -21,8 +25,8 @@ async def get_current_user(
     db: Session = Depends(get_db)
 ):
     try:
-        # Verify JWT token
-        payload = jwt.decode(
+        # Verify JWT token, or reuse the claims of an earlier verification
+        payload = token_cache.decode(
             credentials.credentials,
             settings.JWT_SECRET,
             algorithms=[settings.ALGORITHM]
@@ -35,8 +39,8 @@ async def get_current_user(
                 headers={"WWW-Authenticate": "Bearer"},
             )
         
-        # Get user from database
-        user = db.query(User).filter(User.id == user_id).first()
+        # Read-only projection of the user; see app/db/queries.py
+        user = get_user_row(db, int(user_id))
         if user is None:
             raise HTTPException(
                 status_code=status.HTTP_401_UNAUTHORIZED,
@@ -56,4 +60,25 @@ async def get_current_user(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail=str(e),
             headers={"WWW-Authenticate": "Bearer"},
-        ) 
\ No newline at end of file
+        ) 
+
+async def get_current_admin_user(current_user: User = Depends(get_current_user)):
+    if current_user.email not in settings.ADMIN_EMAILS:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Admin access required"
+        )
+    return current_user
+
+async def verify_metrics_token(
+    credentials: Optional[HTTPAuthorizationCredentials] = Depends(HTTPBearer(auto_error=False))
+):
+    """Scrapers authenticate with the static METRICS_TOKEN instead of a user JWT"""
+    if not settings.METRICS_TOKEN:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Not Found")
+    if credentials is None or not secrets.compare_digest(credentials.credentials, settings.METRICS_TOKEN):
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Invalid metrics token",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
@@ -0,0 +1,37 @@
+import hashlib
+from typing import Optional
+from fastapi import Request, Response
+
+# Clients may keep a copy but must revalidate it with If-None-Match before
+# each use, so polls see new data immediately and get 304s otherwise
+REVALIDATE = "private, no-cache"
+
+def user_etag(user, request: Request, *parts) -> str:
+    """Weak ETag for a per-user response.
+
+    Changes whenever the user's data_version is bumped, and differs per
+    path, query string and any extra ``parts`` (e.g. a signing window).
+    """
+    variant = "|".join([request.url.path, request.url.query, *map(str, parts)])
+    digest = hashlib.blake2b(variant.encode(), digest_size=8).hexdigest()
+    return f'W/"{user.id}-{user.data_version}-{digest}"'
+
+def _matches(if_none_match: Optional[str], etag: str) -> bool:
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    # Weak comparison: ignore W/ prefixes
+    opaque = etag.removeprefix("W/")
+    return any(tag.strip().removeprefix("W/") == opaque for tag in if_none_match.split(","))
+
+def not_modified(request: Request, etag: str, cache_control: str) -> Optional[Response]:
+    """A 304 response if the client already has this version, else None"""
+    if _matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers={"ETag": etag, "Cache-Control": cache_control})
+    return None
+
+def set_cache_headers(response: Response, etag: str, cache_control: str) -> Response:
+    response.headers["ETag"] = etag
+    response.headers["Cache-Control"] = cache_control
+    return response
@@ -0,0 +1,59 @@
+"""Cache of verified access tokens.
+
+Clients send the same bearer token on every request until it expires, so
+the claims of a token whose signature has been checked once are kept,
+keyed by a digest of the token, until the token's ``exp``. Repeat requests
+skip HMAC verification and base64/JSON parsing. Tokens without ``exp`` are
+never cached.
+"""
+import hashlib
+import time
+from collections import OrderedDict
+from typing import Dict, Tuple
+from jose import jwt
+from app.core.config import get_settings
+
+settings = get_settings()
+
+
+class VerifiedTokenCache:
+    """LRU of token digest -> (claims, exp), bounded to ``maxsize`` tokens"""
+
+    def __init__(self, maxsize: int = 10000):
+        self.maxsize = maxsize
+        self._entries: "OrderedDict[bytes, Tuple[Dict, float]]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def decode(self, token: str, secret: str, algorithms) -> Dict:
+        """Claims of ``token``; raises JWTError like ``jwt.decode`` when invalid.
+
+        The returned dict is shared between requests and must not be modified.
+        """
+        key = hashlib.blake2b(token.encode(), digest_size=16).digest()
+        entry = self._entries.get(key)
+        if entry is not None:
+            claims, exp = entry
+            if exp > time.time():
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return claims
+            del self._entries[key]
+
+        self.misses += 1
+        claims = jwt.decode(token, secret, algorithms=algorithms)
+        exp = claims.get("exp")
+        if self.maxsize > 0 and isinstance(exp, (int, float)):
+            self._entries[key] = (claims, exp)
+            if len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+        return claims
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+token_cache = VerifiedTokenCache(settings.JWT_CACHE_SIZE)
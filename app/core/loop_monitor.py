@@ -0,0 +1,189 @@
+"""Event loop lag monitor.
+
+A heartbeat coroutine wakes every ``interval`` seconds and records how late
+it woke up (the loop lag) in a histogram. A watchdog thread checks the
+heartbeat; once the loop has been stuck for longer than ``threshold`` it
+captures the loop thread's stack and the request being handled, and the
+block is logged and counted per route when the loop comes back.
+
+A stall with the loop thread idle in the selector means the loop was
+waiting for the GIL. The stdlib loop is idle in ``selectors.select``;
+uvloop polls in C, so there the idle stack ends at the frame that entered
+the loop, which ``start`` records. A C extension that blocks while holding
+the GIL under uvloop is indistinguishable from that and is reported as GIL
+contention too.
+"""
+import asyncio
+import inspect
+import os
+import sys
+import threading
+import time
+import traceback
+from collections import Counter, deque
+from typing import Deque, Dict, List, Optional
+from app.core.config import get_settings
+
+settings = get_settings()
+
+LAG_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+ASYNC_CODE_FLAGS = inspect.CO_COROUTINE | inspect.CO_ITERABLE_COROUTINE | inspect.CO_ASYNC_GENERATOR
+
+def _request_label(frame) -> str:
+    """Method and path of the ASGI request whose handling is on the stack"""
+    while frame is not None:
+        # Only frames that have a ``scope`` variable, without materialising
+        # the locals of every frame
+        if "scope" in frame.f_code.co_varnames:
+            scope = frame.f_locals.get("scope")
+            if isinstance(scope, dict) and scope.get("type") == "http":
+                # The raw path of an unmatched request would make the
+                # route label unbounded
+                route = scope.get("route")
+                path = route.path if route is not None else "unmatched"
+                return f"{scope.get('method', '')} {path}"
+        frame = frame.f_back
+    return "no request"
+
+def _loop_entry(frame):
+    """Code of the innermost frame outside any coroutine, i.e. the caller of run_until_complete"""
+    in_task = False
+    while frame is not None:
+        if frame.f_code.co_flags & ASYNC_CODE_FLAGS:
+            in_task = True
+        elif in_task:
+            return frame.f_code
+        frame = frame.f_back
+    return None
+
+
+class LoopMonitor:
+    def __init__(self, interval: float = 0.05, threshold: float = 0.1, stack_limit: int = 40, keep: int = 50):
+        self.interval = interval
+        self.threshold = threshold
+        self.stack_limit = stack_limit
+        self.buckets = [0] * (len(LAG_BUCKETS) + 1)
+        self.lag_sum = 0.0
+        self.lag_count = 0
+        self.lag_max = 0.0
+        self.blocked = Counter()
+        self.blocked_seconds = Counter()
+        self.recent: Deque[Dict] = deque(maxlen=keep)
+
+        self._beat = time.monotonic()
+        self._pending: Optional[Dict] = None
+        self._loop_thread: Optional[int] = None
+        self._idle_code = None
+        self._task: Optional[asyncio.Task] = None
+        self._stop = threading.Event()
+        self._watchdog: Optional[threading.Thread] = None
+
+    def start(self) -> None:
+        """Start on the running loop"""
+        self._loop_thread = threading.get_ident()
+        loop = asyncio.get_running_loop()
+        if type(loop).__module__.startswith("uvloop"):
+            self._idle_code = _loop_entry(sys._getframe())
+        self._beat = time.monotonic()
+        self._stop.clear()
+        self._task = loop.create_task(self._heartbeat())
+        self._watchdog = threading.Thread(target=self._watch, name="loop-watchdog", daemon=True)
+        self._watchdog.start()
+
+    async def stop(self) -> None:
+        self._stop.set()
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+
+    async def _heartbeat(self) -> None:
+        while True:
+            expected = time.monotonic() + self.interval
+            self._beat = expected
+            await asyncio.sleep(self.interval)
+            lag = max(0.0, time.monotonic() - expected)
+            self._observe(lag)
+            self._beat = time.monotonic()
+
+    def _observe(self, lag: float) -> None:
+        index = next((i for i, bound in enumerate(LAG_BUCKETS) if lag <= bound), len(LAG_BUCKETS))
+        self.buckets[index] += 1
+        self.lag_sum += lag
+        self.lag_count += 1
+        self.lag_max = max(self.lag_max, lag)
+
+        event, self._pending = self._pending, None
+        if event is None:
+            return
+        event["blocked_ms"] = round(lag * 1000, 1)
+        self.blocked[event["route"]] += 1
+        self.blocked_seconds[event["route"]] += lag
+        self.recent.append(event)
+        print(
+            f"Event loop blocked for {event['blocked_ms']} ms in {event['route']}:\n"
+            + "".join(event["stack"])
+        )
+
+    def _watch(self) -> None:
+        while not self._stop.wait(self.interval):
+            beat = self._beat
+            if time.monotonic() - beat < self.threshold or self._pending is not None:
+                continue
+            frame = sys._current_frames().get(self._loop_thread)
+            if frame is None:
+                continue
+            # The loop thread is idle in the selector but didn't run the
+            # overdue heartbeat: it is waiting for the GIL held by another thread
+            waiting = (
+                frame.f_code is self._idle_code
+                or (frame.f_code.co_name == "select" and frame.f_code.co_filename.endswith("selectors.py"))
+            )
+            event = {
+                "at": time.time(),
+                "route": "GIL held by another thread" if waiting else _request_label(frame),
+                "stack": traceback.format_stack(frame, limit=self.stack_limit),
+            }
+            # Only keep it if the heartbeat still hasn't run, i.e. the stack
+            # was taken while the loop was stuck
+            if self._beat == beat:
+                self._pending = event
+
+    def recent_blocks(self) -> List[Dict]:
+        return list(self.recent)
+
+    def metrics(self) -> str:
+        """Prometheus text exposition of the lag histogram and block counters"""
+        labels = f'pid="{os.getpid()}"'
+        lines = [
+            "# HELP event_loop_lag_seconds How late the loop heartbeat woke up",
+            "# TYPE event_loop_lag_seconds histogram",
+        ]
+        cumulative = 0
+        for bound, count in zip(LAG_BUCKETS + (float("inf"),), self.buckets):
+            cumulative += count
+            le = "+Inf" if bound == float("inf") else repr(bound)
+            lines.append(f'event_loop_lag_seconds_bucket{{{labels},le="{le}"}} {cumulative}')
+        lines += [
+            f"event_loop_lag_seconds_sum{{{labels}}} {self.lag_sum:.6f}",
+            f"event_loop_lag_seconds_count{{{labels}}} {self.lag_count}",
+            "# HELP event_loop_lag_max_seconds Largest loop lag seen by this worker",
+            "# TYPE event_loop_lag_max_seconds gauge",
+            f"event_loop_lag_max_seconds{{{labels}}} {self.lag_max:.6f}",
+            f"# HELP event_loop_blocked_total Loop stalls longer than {self.threshold}s by request",
+            "# TYPE event_loop_blocked_total counter",
+        ]
+        for route, count in sorted(self.blocked.items()):
+            lines.append(f'event_loop_blocked_total{{{labels},route="{route}"}} {count}')
+        lines += [
+            "# HELP event_loop_blocked_seconds_total Time the loop spent stalled by request",
+            "# TYPE event_loop_blocked_seconds_total counter",
+        ]
+        for route, seconds in sorted(self.blocked_seconds.items()):
+            lines.append(f'event_loop_blocked_seconds_total{{{labels},route="{route}"}} {seconds:.6f}')
+        return "\n".join(lines) + "\n"
+
+loop_monitor = LoopMonitor(settings.LOOP_MONITOR_INTERVAL, settings.LOOP_BLOCK_THRESHOLD)
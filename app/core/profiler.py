@@ -0,0 +1,149 @@
+"""On-demand CPU sampling and memory growth profiles of the current worker.
+
+Nothing is installed or running outside a profiling window: the CPU
+sampler is a thread that lives for the window only, and tracemalloc is
+started and stopped around each memory window.
+"""
+import os
+import sys
+import threading
+import time
+import tracemalloc
+from collections import Counter
+from types import CodeType
+from typing import Dict, FrozenSet, List, Optional, Tuple
+
+Frame = Tuple[str, str, int]  # (function, file, first line)
+Stack = Tuple[Frame, ...]     # root first
+
+# Leaf frames of threads that are waiting rather than running
+IDLE_FRAMES = {
+    ("select", "selectors.py"),
+    ("wait", "threading.py"),
+    ("get", "queue.py"),
+    ("_worker", "thread.py"),
+}
+
+class SamplingProfiler:
+    """Samples every thread's Python stack at a fixed interval.
+
+    With ``code_filter`` only samples that have one of the given code
+    objects on the stack are kept, e.g. the endpoint function of one route.
+    Since an async endpoint's frame is on the event loop thread's stack only
+    while that request is actually running, this attributes CPU to a route
+    even though all requests share the thread.
+    """
+
+    def __init__(
+        self,
+        interval: float = 0.005,
+        code_filter: Optional[FrozenSet[CodeType]] = None,
+        include_idle: bool = False
+    ):
+        self.interval = interval
+        self.code_filter = code_filter
+        self.include_idle = include_idle
+        self.stacks: Counter = Counter()
+        self.samples = 0
+        self.duration = 0.0
+
+    def run(self, seconds: float) -> "SamplingProfiler":
+        """Sample from the calling thread (a worker thread) for ``seconds``"""
+        own = threading.get_ident()
+        start = time.perf_counter()
+        deadline = start + seconds
+        while True:
+            names = {thread.ident: thread.name for thread in threading.enumerate()}
+            for ident, frame in sys._current_frames().items():
+                if ident != own:
+                    self._record(names.get(ident, str(ident)), frame)
+            self.samples += 1
+            now = time.perf_counter()
+            if now >= deadline:
+                break
+            time.sleep(min(self.interval, deadline - now))
+        self.duration = time.perf_counter() - start
+        return self
+
+    def _record(self, thread_name: str, frame) -> None:
+        stack: List[Frame] = []
+        matched = self.code_filter is None
+        while frame is not None:
+            code = frame.f_code
+            if not matched and code in self.code_filter:
+                matched = True
+            stack.append((code.co_name, code.co_filename, code.co_firstlineno))
+            frame = frame.f_back
+        if not matched or not stack:
+            return
+        leaf = stack[0]
+        if not self.include_idle and (leaf[0], os.path.basename(leaf[1])) in IDLE_FRAMES:
+            return
+        stack.append((f"thread {thread_name}", "", 0))
+        self.stacks[tuple(reversed(stack))] += 1
+
+    def collapsed(self) -> str:
+        """Folded stacks, the input format of flamegraph.pl and speedscope"""
+        lines = []
+        for stack, count in self.stacks.most_common():
+            frames = ";".join(f"{name} ({_short(file)}:{line})" if file else name for name, file, line in stack)
+            lines.append(f"{frames} {count}")
+        return "\n".join(lines) + "\n"
+
+    def speedscope(self, name: str) -> Dict:
+        """Sampled profile in speedscope's file format"""
+        frames: List[Dict] = []
+        index: Dict[Frame, int] = {}
+        samples, weights = [], []
+        for stack, count in self.stacks.most_common():
+            ids = []
+            for frame in stack:
+                if frame not in index:
+                    index[frame] = len(frames)
+                    function, file, line = frame
+                    frames.append({"name": function, "file": file, "line": line} if file else {"name": function})
+                ids.append(index[frame])
+            samples.append(ids)
+            weights.append(count * self.interval)
+        return {
+            "$schema": "https://www.speedscope.app/file-format-schema.json",
+            "name": name,
+            "exporter": "vidgen-api",
+            "shared": {"frames": frames},
+            "profiles": [{
+                "type": "sampled",
+                "name": name,
+                "unit": "seconds",
+                "startValue": 0,
+                "endValue": sum(weights),
+                "samples": samples,
+                "weights": weights,
+            }],
+        }
+
+def _short(file: str) -> str:
+    """Path relative to the app or site-packages, to keep frames readable"""
+    for marker in ("/site-packages/", "/app/"):
+        position = file.rfind(marker)
+        if position != -1:
+            return file[position + 1:]
+    return os.path.basename(file)
+
+def memory_growth(before: tracemalloc.Snapshot, after: tracemalloc.Snapshot, key_type: str, limit: int) -> List[Dict]:
+    """Largest allocation differences between two tracemalloc snapshots"""
+    ignore = (
+        tracemalloc.Filter(False, tracemalloc.__file__),
+        tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+        tracemalloc.Filter(False, "<unknown>"),
+    )
+    stats = after.filter_traces(ignore).compare_to(before.filter_traces(ignore), key_type)
+    return [
+        {
+            "size_diff": stat.size_diff,
+            "size": stat.size,
+            "count_diff": stat.count_diff,
+            "count": stat.count,
+            "traceback": [f"{_short(frame.filename)}:{frame.lineno}" for frame in stat.traceback],
+        }
+        for stat in stats[:limit]
+    ]
@@ -0,0 +1,207 @@
+import math
+import time
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Dict, Tuple
+from fastapi import HTTPException, status
+from app.core.clients import clients
+from app.core.config import get_settings
+
+settings = get_settings()
+
+# Retry hint when a user is at their concurrency cap; the real wait depends
+# on how long their in-flight generation takes
+CONCURRENCY_RETRY_AFTER = 5.0
+
+
+class TokenBucket:
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate  # tokens per second
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+
+    def refill(self, now: float) -> None:
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def wait_time(self) -> float:
+        """Seconds until one token is available (0 when one is available now)"""
+        if self.tokens >= 1:
+            return 0.0
+        return (1 - self.tokens) / self.rate
+
+
+class InMemoryRateLimitBackend:
+    """Per-process admission state. Limits only hold within one worker."""
+
+    def __init__(self, user_rate: float, user_burst: int, global_rate: float, global_burst: int, max_concurrent: int):
+        self.user_rate = user_rate
+        self.user_burst = user_burst
+        self.max_concurrent = max_concurrent
+        self.global_bucket = TokenBucket(global_rate, global_burst)
+        self.user_buckets: Dict[int, TokenBucket] = {}
+        self.in_flight: Dict[int, int] = {}
+
+    async def try_acquire(self, user_id: int) -> float:
+        # No awaits below, so the check-and-take is atomic on the event loop
+        if self.in_flight.get(user_id, 0) >= self.max_concurrent:
+            return CONCURRENCY_RETRY_AFTER
+
+        now = time.monotonic()
+        user_bucket = self.user_buckets.get(user_id)
+        if user_bucket is None:
+            self._prune(now)
+            user_bucket = self.user_buckets[user_id] = TokenBucket(self.user_rate, self.user_burst)
+        user_bucket.refill(now)
+        self.global_bucket.refill(now)
+
+        retry_after = max(user_bucket.wait_time(), self.global_bucket.wait_time())
+        if retry_after:
+            return retry_after
+
+        user_bucket.tokens -= 1
+        self.global_bucket.tokens -= 1
+        self.in_flight[user_id] = self.in_flight.get(user_id, 0) + 1
+        return 0.0
+
+    async def release(self, user_id: int) -> None:
+        remaining = self.in_flight.get(user_id, 0) - 1
+        if remaining > 0:
+            self.in_flight[user_id] = remaining
+        else:
+            self.in_flight.pop(user_id, None)
+
+    def _prune(self, now: float, max_entries: int = 10000) -> None:
+        """Drop idle buckets that have refilled completely"""
+        if len(self.user_buckets) < max_entries:
+            return
+        for user_id, bucket in list(self.user_buckets.items()):
+            bucket.refill(now)
+            if bucket.tokens >= bucket.capacity and user_id not in self.in_flight:
+                del self.user_buckets[user_id]
+
+
+# KEYS: user bucket, global bucket, user in-flight counter
+# ARGV: now, user rate, user burst, global rate, global burst, max concurrent,
+#       in-flight ttl, concurrency retry hint
+ACQUIRE_SCRIPT = """
+local now = tonumber(ARGV[1])
+
+local function refill(key, rate, burst)
+    local state = redis.call('HMGET', key, 'tokens', 'ts')
+    local tokens = tonumber(state[1]) or burst
+    local ts = tonumber(state[2]) or now
+    return math.min(burst, tokens + math.max(0, now - ts) * rate)
+end
+
+local in_flight = tonumber(redis.call('GET', KEYS[3]) or '0')
+if in_flight >= tonumber(ARGV[6]) then
+    return ARGV[8]
+end
+
+local user_rate, user_burst = tonumber(ARGV[2]), tonumber(ARGV[3])
+local global_rate, global_burst = tonumber(ARGV[4]), tonumber(ARGV[5])
+local user_tokens = refill(KEYS[1], user_rate, user_burst)
+local global_tokens = refill(KEYS[2], global_rate, global_burst)
+
+local wait = 0
+if user_tokens < 1 then wait = math.max(wait, (1 - user_tokens) / user_rate) end
+if global_tokens < 1 then wait = math.max(wait, (1 - global_tokens) / global_rate) end
+if wait > 0 then
+    return tostring(wait)
+end
+
+redis.call('HSET', KEYS[1], 'tokens', user_tokens - 1, 'ts', now)
+redis.call('EXPIRE', KEYS[1], math.ceil(user_burst / user_rate) + 1)
+redis.call('HSET', KEYS[2], 'tokens', global_tokens - 1, 'ts', now)
+redis.call('EXPIRE', KEYS[2], math.ceil(global_burst / global_rate) + 1)
+redis.call('INCR', KEYS[3])
+redis.call('EXPIRE', KEYS[3], tonumber(ARGV[7]))
+return '0'
+"""
+
+RELEASE_SCRIPT = """
+if redis.call('DECR', KEYS[1]) <= 0 then
+    redis.call('DEL', KEYS[1])
+end
+"""
+
+
+class RedisRateLimitBackend:
+    """Admission state shared by all workers through Redis.
+
+    Works against any client exposing the ``redis.asyncio`` interface, so a
+    local stand-in such as fakeredis can replace a real server.
+    """
+
+    def __init__(
+        self,
+        user_rate: float,
+        user_burst: int,
+        global_rate: float,
+        global_burst: int,
+        max_concurrent: int,
+        in_flight_ttl: int,
+        prefix: str = "admission:generation"
+    ):
+        self.args = (user_rate, user_burst, global_rate, global_burst, max_concurrent, in_flight_ttl, CONCURRENCY_RETRY_AFTER)
+        self.prefix = prefix
+
+    def _keys(self, user_id: int) -> Tuple[str, str, str]:
+        return (
+            f"{self.prefix}:bucket:{user_id}",
+            f"{self.prefix}:bucket:global",
+            f"{self.prefix}:in_flight:{user_id}",
+        )
+
+    async def try_acquire(self, user_id: int) -> float:
+        redis = clients.get("redis")
+        result = await redis.eval(ACQUIRE_SCRIPT, 3, *self._keys(user_id), time.time(), *self.args)
+        return float(result)
+
+    async def release(self, user_id: int) -> None:
+        redis = clients.get("redis")
+        await redis.eval(RELEASE_SCRIPT, 1, self._keys(user_id)[2])
+
+
+class GenerationRateLimiter:
+    def __init__(self, backend):
+        self.backend = backend
+
+    async def admit(self, user_id: int) -> None:
+        """Take a rate-limit token and a concurrency slot, or fail fast with 429"""
+        retry_after = await self.backend.try_acquire(user_id)
+        if retry_after:
+            raise HTTPException(
+                status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+                detail="Too many generation requests. Please retry later.",
+                headers={"Retry-After": str(math.ceil(retry_after))},
+            )
+
+    async def release(self, user_id: int) -> None:
+        await self.backend.release(user_id)
+
+    @asynccontextmanager
+    async def slot(self, user_id: int) -> AsyncIterator[None]:
+        """Admit, and hold the slot for the duration of the block"""
+        await self.admit(user_id)
+        try:
+            yield
+        finally:
+            await self.release(user_id)
+
+
+def _create_backend():
+    limits = dict(
+        user_rate=settings.GENERATION_USER_RATE_PER_MINUTE / 60,
+        user_burst=settings.GENERATION_USER_BURST,
+        global_rate=settings.GENERATION_GLOBAL_RATE_PER_MINUTE / 60,
+        global_burst=settings.GENERATION_GLOBAL_BURST,
+        max_concurrent=settings.GENERATION_USER_MAX_CONCURRENT,
+    )
+    if settings.RATE_LIMIT_BACKEND == "redis":
+        return RedisRateLimitBackend(in_flight_ttl=settings.GENERATION_SLOT_TTL_SECONDS, **limits)
+    return InMemoryRateLimitBackend(**limits)
+
+
+generation_limiter = GenerationRateLimiter(_create_backend())
@@ -0,0 +1,32 @@
+from typing import Any, Iterable, List, Mapping, Type
+import orjson
+from fastapi.responses import Response
+from pydantic import BaseModel, TypeAdapter
+from typing_extensions import NotRequired, TypedDict
+
+
+class ListSerializer:
+    """Fast path for list endpoints returning plain rows.
+
+    Rows are validated in one call against a TypedDict built from the
+    response model's field types, so no model instances are created, and
+    the result is encoded with orjson. Routes keep ``response_model`` for
+    the OpenAPI schema and return ``response(rows)`` directly, which
+    FastAPI passes through without validating it again.
+    """
+
+    def __init__(self, model: Type[BaseModel]):
+        self.fields = list(model.model_fields)
+        row = TypedDict(f"{model.__name__}Row", {
+            name: field.annotation if field.is_required() else NotRequired[field.annotation]
+            for name, field in model.model_fields.items()
+        })
+        self.adapter = TypeAdapter(List[row])
+
+    def validate(self, rows: Iterable[Mapping[str, Any]]) -> List[dict]:
+        return self.adapter.validate_python(rows if isinstance(rows, list) else list(rows))
+
+    def response(self, rows: Iterable[Mapping[str, Any]], **kwargs) -> Response:
+        # OPT_UTC_Z renders UTC datetimes with "Z", like pydantic does
+        body = orjson.dumps(self.validate(rows), option=orjson.OPT_UTC_Z)
+        return Response(body, media_type="application/json", **kwargs)
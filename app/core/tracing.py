@@ -0,0 +1,192 @@
+"""Request tracing with OpenTelemetry.
+
+Disabled unless TRACING_ENABLED is set; the OpenTelemetry SDK is optional and
+nothing here costs more than a flag check while tracing is off. When on,
+requests, SQL statements, S3 calls, provider calls and the explicit
+``span(...)`` blocks in the services are recorded for a TRACING_SAMPLE_RATIO
+share of traces and exported through TRACING_EXPORTER:
+
+* ``console``: human-readable spans on stdout
+* ``file``: one JSON span per line appended to TRACING_FILE
+* ``otlp``: OTLP/HTTP to OTEL_EXPORTER_OTLP_ENDPOINT (needs
+  opentelemetry-exporter-otlp-proto-http)
+* ``package.module:factory``: any callable returning a SpanExporter
+"""
+import functools
+import importlib
+from contextlib import contextmanager
+from typing import Any, Iterator, Optional
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+from app.core.config import get_settings
+
+settings = get_settings()
+
+_tracer = None
+
+def _file_exporter():
+    from opentelemetry.sdk.trace.export import ConsoleSpanExporter
+    return ConsoleSpanExporter(
+        out=open(settings.TRACING_FILE, "a", buffering=1),
+        formatter=lambda span: span.to_json(indent=None) + "\n"
+    )
+
+def _console_exporter():
+    from opentelemetry.sdk.trace.export import ConsoleSpanExporter
+    return ConsoleSpanExporter()
+
+def _otlp_exporter():
+    from opentelemetry.exporter.otlp.proto.http.trace_exporter import OTLPSpanExporter
+    return OTLPSpanExporter()
+
+EXPORTERS = {
+    "console": _console_exporter,
+    "file": _file_exporter,
+    "otlp": _otlp_exporter,
+}
+
+def _load_exporter(name: str):
+    if name in EXPORTERS:
+        return EXPORTERS[name]()
+    module, _, factory = name.partition(":")
+    return getattr(importlib.import_module(module), factory)()
+
+def setup_tracing() -> bool:
+    """Install the tracer provider once per process; returns whether tracing is on"""
+    global _tracer
+    if _tracer is not None or not settings.TRACING_ENABLED:
+        return _tracer is not None
+    try:
+        from opentelemetry import trace
+    except ImportError:
+        print("TRACING_ENABLED is set but opentelemetry-sdk is not installed; tracing disabled")
+        return False
+    from opentelemetry.sdk.resources import Resource
+    from opentelemetry.sdk.trace import TracerProvider
+    from opentelemetry.sdk.trace.export import BatchSpanProcessor
+    from opentelemetry.sdk.trace.sampling import ParentBased, TraceIdRatioBased
+
+    try:
+        exporter = _load_exporter(settings.TRACING_EXPORTER)
+    except Exception as e:
+        print(f"Failed to create trace exporter {settings.TRACING_EXPORTER}: {str(e)}")
+        return False
+    provider = TracerProvider(
+        resource=Resource.create({"service.name": settings.TRACING_SERVICE_NAME}),
+        # Follow the caller's sampling decision when a traceparent is present
+        sampler=ParentBased(TraceIdRatioBased(settings.TRACING_SAMPLE_RATIO))
+    )
+    provider.add_span_processor(BatchSpanProcessor(exporter))
+    trace.set_tracer_provider(provider)
+    _tracer = trace.get_tracer("app")
+    return True
+
+def shutdown_tracing() -> None:
+    """Flush spans still queued for export"""
+    if _tracer is not None:
+        from opentelemetry import trace
+        trace.get_tracer_provider().shutdown()
+
+@contextmanager
+def span(name: str, **attributes: Any) -> Iterator[Optional[Any]]:
+    """Child span of the current one; yields None while tracing is off"""
+    if _tracer is None:
+        yield None
+        return
+    with _tracer.start_as_current_span(name, attributes=attributes) as current:
+        yield current
+
+def set_attribute(current: Optional[Any], key: str, value: Any) -> None:
+    if current is not None:
+        current.set_attribute(key, value)
+
+
+class TracingMiddleware:
+    """Server span per HTTP request, continuing an incoming traceparent"""
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or _tracer is None:
+            await self.app(scope, receive, send)
+            return
+
+        from opentelemetry import propagate
+        from opentelemetry.trace import SpanKind, Status, StatusCode
+        headers = {key.decode("latin-1"): value.decode("latin-1") for key, value in scope["headers"]}
+        with _tracer.start_as_current_span(
+            f"{scope['method']} {scope['path']}",
+            context=propagate.extract(headers),
+            kind=SpanKind.SERVER,
+            attributes={"http.method": scope["method"], "http.target": scope["path"]}
+        ) as current:
+            async def traced_send(message: Message) -> None:
+                if message["type"] == "http.response.start":
+                    current.set_attribute("http.status_code", message["status"])
+                    if message["status"] >= 500:
+                        current.set_status(Status(StatusCode.ERROR))
+                await send(message)
+
+            try:
+                await self.app(scope, receive, traced_send)
+            finally:
+                # The router stores the matched route in the scope; name the
+                # span by its template so spans group per endpoint
+                route = scope.get("route")
+                if route is not None:
+                    current.update_name(f"{scope['method']} {route.path}")
+                    current.set_attribute("http.route", route.path)
+
+
+def instrument_engine(engine) -> None:
+    """Span per SQL statement executed through ``engine``"""
+    if _tracer is None:
+        return
+    from sqlalchemy import event
+    from opentelemetry.trace import SpanKind, Status, StatusCode
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        current = _tracer.start_span(
+            statement.split(None, 1)[0].upper() if statement else "SQL",
+            kind=SpanKind.CLIENT,
+            attributes={"db.system": "postgresql", "db.statement": statement[:1000]}
+        )
+        conn.info.setdefault("tracing_spans", []).append(current)
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        spans = conn.info.get("tracing_spans")
+        if spans:
+            current = spans.pop()
+            current.set_attribute("db.rows", cursor.rowcount)
+            current.end()
+
+    @event.listens_for(engine, "handle_error")
+    def handle_error(context):
+        spans = context.connection.info.get("tracing_spans") if context.connection is not None else None
+        if spans:
+            current = spans.pop()
+            current.record_exception(context.original_exception)
+            current.set_status(Status(StatusCode.ERROR))
+            current.end()
+
+def instrument_boto3_client(client) -> None:
+    """Span per API call made with a boto3 client, e.g. ``S3.PutObject``"""
+    if _tracer is None:
+        return
+    from opentelemetry.trace import SpanKind
+    service = client.meta.service_model.service_id
+    make_api_call = client._make_api_call
+
+    @functools.wraps(make_api_call)
+    def traced(operation_name, api_params):
+        attributes = {"rpc.system": "aws-api", "rpc.service": service, "rpc.method": operation_name}
+        if "Bucket" in api_params:
+            attributes["aws.s3.bucket"] = api_params["Bucket"]
+        if "Key" in api_params:
+            attributes["aws.s3.key"] = api_params["Key"]
+        with _tracer.start_as_current_span(f"{service}.{operation_name}", kind=SpanKind.CLIENT, attributes=attributes):
+            return make_api_call(operation_name, api_params)
+
+    client._make_api_call = traced
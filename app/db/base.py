@@ -1,6 +1,10 @@
 from app.db.base_class import Base
 from app.models.user import User
 from app.models.user_verification import UserVerification
+from app.models.refresh_token import RefreshToken
 from app.models.subscription import Subscription
 from app.models.token_history import TokenHistory
-from app.models.generation import Generation 
\ No newline at end of file
+from app.models.token_balance_snapshot import TokenBalanceSnapshot
+from app.models.generation import Generation 
+from app.models.idempotency_key import IdempotencyKey
+from app.models.usage_rollup import TokenUsageDaily, UsageDailyTotal, DailyTotal, RollupWatermark
\ No newline at end of file
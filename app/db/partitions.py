@@ -0,0 +1,86 @@
+"""Monthly range partitions of the time-series tables.
+
+``token_history`` and ``generations`` are partitioned by ``created_at`` with
+one partition per calendar month (UTC), named ``<table>_yYYYYmMM``.
+"""
+import gzip
+import re
+import tempfile
+from datetime import datetime
+from typing import List, Tuple
+import pytz
+from sqlalchemy import text
+from sqlalchemy.engine import Connection, Engine
+
+PARTITIONED_TABLES = ("token_history", "generations")
+
+# Serializes partition creation between workers starting at the same time
+PARTITION_LOCK_ID = 7290216
+
+def month_start(value: datetime) -> datetime:
+    value = value.astimezone(pytz.UTC)
+    return datetime(value.year, value.month, 1, tzinfo=pytz.UTC)
+
+def add_months(month: datetime, months: int) -> datetime:
+    index = month.year * 12 + month.month - 1 + months
+    return datetime(index // 12, index % 12 + 1, 1, tzinfo=pytz.UTC)
+
+def partition_name(table: str, month: datetime) -> str:
+    return f"{table}_y{month.year:04d}m{month.month:02d}"
+
+def create_partition_sql(table: str, month: datetime) -> str:
+    return (
+        f"CREATE TABLE IF NOT EXISTS {partition_name(table, month)} PARTITION OF {table} "
+        f"FOR VALUES FROM ('{month.isoformat()}') TO ('{add_months(month, 1).isoformat()}')"
+    )
+
+def ensure_partitions(connection: Connection, months_ahead: int = 3) -> None:
+    """Create partitions from the current month through ``months_ahead`` months ahead"""
+    current = month_start(datetime.now(pytz.UTC))
+    connection.execute(text("SELECT pg_advisory_xact_lock(:id)"), {"id": PARTITION_LOCK_ID})
+    for table in PARTITIONED_TABLES:
+        for offset in range(months_ahead + 1):
+            connection.execute(text(create_partition_sql(table, add_months(current, offset))))
+
+def list_partitions(connection: Connection, table: str) -> List[Tuple[str, datetime]]:
+    """Attached monthly partitions of a table as (name, month), oldest first"""
+    pattern = re.compile(rf"^{table}_y(\d{{4}})m(\d{{2}})$")
+    names = connection.execute(
+        text(
+            "SELECT c.relname FROM pg_inherits i "
+            "JOIN pg_class c ON c.oid = i.inhrelid "
+            "WHERE i.inhparent = CAST(:table AS regclass)"
+        ),
+        {"table": table}
+    ).scalars()
+    partitions = []
+    for name in names:
+        match = pattern.match(name)
+        if match:
+            partitions.append((name, datetime(int(match[1]), int(match[2]), 1, tzinfo=pytz.UTC)))
+    return sorted(partitions, key=lambda partition: partition[1])
+
+def expired_partitions(connection: Connection, table: str, retain_months: int) -> List[str]:
+    """Partitions whose whole month is older than the retention window"""
+    cutoff = add_months(month_start(datetime.now(pytz.UTC)), -retain_months)
+    return [name for name, month in list_partitions(connection, table) if month < cutoff]
+
+def detach_partition(engine: Engine, table: str, name: str) -> None:
+    """Detach without blocking inserts into the parent (needs autocommit)"""
+    with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as connection:
+        connection.execute(text(f"ALTER TABLE {table} DETACH PARTITION {name} CONCURRENTLY"))
+
+def archive_table(engine: Engine, name: str, s3_client, bucket: str, key: str) -> int:
+    """Stream a detached partition to S3 as gzipped CSV; returns the compressed size"""
+    raw = engine.raw_connection()
+    try:
+        with tempfile.TemporaryFile() as buffer:
+            with gzip.GzipFile(fileobj=buffer, mode="wb") as archive:
+                with raw.cursor() as cursor:
+                    cursor.copy_expert(f"COPY {name} TO STDOUT WITH (FORMAT csv, HEADER)", archive)
+            size = buffer.tell()
+            buffer.seek(0)
+            s3_client.upload_fileobj(buffer, bucket, key, ExtraArgs={"ContentType": "application/gzip"})
+            return size
+    finally:
+        raw.close()
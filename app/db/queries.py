@@ -0,0 +1,97 @@
+"""Column projections for hot read paths.
+
+These return plain rows instead of ORM entities: nothing is added to the
+session's identity map or tracked for changes, so reads cannot be flushed
+back by accident. Balance changes are single UPDATE statements rather than
+load-modify-flush, so concurrent requests cannot overwrite each other.
+"""
+from datetime import datetime
+from typing import Optional
+from sqlalchemy import exists, insert, literal, select, update
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.engine import Row
+from sqlalchemy.orm import Session
+from app.models.subscription import Subscription
+from app.models.user import User
+from app.models.user_verification import UserVerification
+
+# Everything UserResponse and the ETag checks need; never the password hash
+USER_COLUMNS = (
+    User.id,
+    User.email,
+    User.full_name,
+    User.is_active,
+    User.tokens,
+    User.data_version,
+    User.created_at,
+    User.updated_at
+)
+
+def get_user_row(db: Session, user_id: int) -> Optional[Row]:
+    return db.execute(select(*USER_COLUMNS).where(User.id == user_id)).first()
+
+def get_login_row(db: Session, email: str) -> Optional[Row]:
+    """User columns plus the password hash, for checking credentials"""
+    return db.execute(
+        select(*USER_COLUMNS, User.hashed_password).where(User.email == email)
+    ).first()
+
+def get_token_balance(db: Session, user_id: int) -> Optional[int]:
+    return db.execute(select(User.tokens).where(User.id == user_id)).scalar()
+
+def change_token_balance(db: Session, user_id: int, delta: int) -> Optional[int]:
+    """Add ``delta`` (negative to consume) in the current transaction; returns
+    the new balance, or None if the user does not exist.
+
+    Every balance change comes with a token history row and possibly a
+    generation, so this also bumps the user's data_version.
+    """
+    return db.execute(
+        update(User)
+        .where(User.id == user_id)
+        .values(tokens=User.tokens + delta, data_version=User.data_version + 1)
+        .returning(User.tokens)
+        .execution_options(synchronize_session=False)
+    ).scalar()
+
+def get_payment_status(db: Session, transaction_id: str) -> Optional[str]:
+    """payment_status recorded for a Stripe session, or None if not recorded"""
+    return db.execute(
+        select(Subscription.payment_status).where(Subscription.transaction_id == transaction_id)
+    ).scalar()
+
+def subscription_exists(db: Session, transaction_id: str) -> bool:
+    return db.execute(
+        select(exists().where(Subscription.transaction_id == transaction_id))
+    ).scalar()
+
+def insert_user_with_verification(
+    db: Session,
+    email: str,
+    full_name: str,
+    hashed_password: str,
+    token_hash: bytes,
+    expires_at: datetime
+) -> Optional[int]:
+    """Insert an inactive user and their email verification in one statement.
+
+    Returns the new user id, or None if the email is already registered;
+    the unique index on users.email decides, so concurrent signups with the
+    same email cannot both succeed.
+    """
+    new_user = (
+        pg_insert(User.__table__)
+        .values(email=email, full_name=full_name, hashed_password=hashed_password, is_active=False)
+        .on_conflict_do_nothing(index_elements=["email"])
+        .returning(User.__table__.c.id)
+        .cte("new_user")
+    )
+    verifications = UserVerification.__table__
+    return db.execute(
+        insert(verifications)
+        .from_select(
+            ["user_id", "token_hash", "expires_at", "is_verified"],
+            select(new_user.c.id, literal(token_hash), literal(expires_at), literal(False))
+        )
+        .returning(verifications.c.user_id)
+    ).scalar()
@@ -0,0 +1,4 @@
+"""
+Periodic maintenance jobs, run as ``python -m app.jobs.<name>`` from cron or
+a scheduler.
+"""
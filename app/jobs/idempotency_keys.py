@@ -0,0 +1,29 @@
+"""Purge expired idempotency keys.
+
+Usage:
+    python -m app.jobs.idempotency_keys [--batch-size N]
+
+Deletes Idempotency-Key records past IDEMPOTENCY_KEY_TTL_HOURS. A retry
+with one of those keys runs as a new request.
+"""
+import argparse
+import sys
+from app.db.session import SessionLocal, get_engine
+from app.services.idempotency_service import idempotency_service
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Purge expired idempotency keys")
+    parser.add_argument("--batch-size", type=int, default=1000,
+                        help="Rows deleted per transaction")
+    args = parser.parse_args(argv)
+
+    db = SessionLocal(bind=get_engine())
+    try:
+        deleted = idempotency_service.purge_expired(db, batch_size=args.batch_size)
+        print(f"Purged {deleted} expired idempotency keys")
+        return 0
+    finally:
+        db.close()
+
+if __name__ == "__main__":
+    sys.exit(main())
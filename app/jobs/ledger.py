@@ -0,0 +1,41 @@
+"""Token ledger maintenance.
+
+Usage:
+    python -m app.jobs.ledger snapshot [--lag-seconds N]
+    python -m app.jobs.ledger reconcile
+
+``snapshot`` writes balance snapshots for users with new token history.
+``reconcile`` reports users whose ``users.tokens`` differs from the ledger
+and exits non-zero when drift is found.
+"""
+import argparse
+import sys
+from app.db.session import SessionLocal, get_engine
+from app.services.ledger import ledger_service
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Token ledger maintenance")
+    commands = parser.add_subparsers(dest="command", required=True)
+    snapshot = commands.add_parser("snapshot", help="Snapshot balances of users with new history")
+    snapshot.add_argument("--lag-seconds", type=int, default=300,
+                          help="Leave history rows newer than this for the next run")
+    commands.add_parser("reconcile", help="Report drift between users.tokens and the ledger")
+    args = parser.parse_args(argv)
+
+    db = SessionLocal(bind=get_engine())
+    try:
+        if args.command == "snapshot":
+            count = ledger_service.take_snapshots(db, lag_seconds=args.lag_seconds)
+            print(f"Wrote {count} balance snapshots")
+            return 0
+
+        drift = ledger_service.find_drift(db)
+        for row in drift:
+            print(f"user_id={row.user_id} tokens={row.tokens} ledger={row.ledger_balance} diff={row.tokens - row.ledger_balance}")
+        print(f"{len(drift)} users with balance drift")
+        return 1 if drift else 0
+    finally:
+        db.close()
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,75 @@
+"""Partition maintenance for token_history and generations.
+
+Usage:
+    python -m app.jobs.partitions ensure [--months-ahead N]
+    python -m app.jobs.partitions archive [--retain-months N] [--keep-table] [--dry-run]
+
+``ensure`` creates the monthly partitions that upcoming inserts will need.
+``archive`` detaches partitions older than the retention window, streams
+them to S3 under ``archive/<table>/<partition>.csv.gz`` and drops them.
+"""
+import argparse
+import sys
+from sqlalchemy import text
+from app.core.config import get_settings
+from app.db.partitions import (
+    PARTITIONED_TABLES,
+    archive_table,
+    detach_partition,
+    ensure_partitions,
+    expired_partitions
+)
+from app.db.session import SessionLocal, get_engine, get_s3_client
+from app.services.ledger import ledger_service
+
+settings = get_settings()
+
+def archive(retain_months: int, keep_table: bool, dry_run: bool) -> int:
+    engine = get_engine()
+    db = SessionLocal(bind=engine)
+    try:
+        snapshot_floor = ledger_service.snapshot_floor(db)
+        for table in PARTITIONED_TABLES:
+            for name in expired_partitions(db.connection(), table, retain_months):
+                if table == "token_history":
+                    # Rows not yet folded into a balance snapshot must stay queryable
+                    max_id = db.execute(text(f"SELECT max(id) FROM {name}")).scalar()
+                    if max_id is not None and max_id > snapshot_floor:
+                        print(f"Skipping {name}: rows after the last ledger snapshot")
+                        continue
+                key = f"archive/{table}/{name}.csv.gz"
+                if dry_run:
+                    print(f"Would archive {name} to {key}")
+                    continue
+
+                db.rollback()  # release locks before detaching concurrently
+                detach_partition(engine, table, name)
+                size = archive_table(engine, name, get_s3_client(), settings.S3_BUCKET_NAME, key)
+                print(f"Archived {name} to {key} ({size} bytes)")
+                if not keep_table:
+                    with engine.begin() as connection:
+                        connection.execute(text(f"DROP TABLE {name}"))
+        return 0
+    finally:
+        db.close()
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Partition maintenance")
+    commands = parser.add_subparsers(dest="command", required=True)
+    ensure = commands.add_parser("ensure", help="Create upcoming monthly partitions")
+    ensure.add_argument("--months-ahead", type=int, default=settings.PARTITION_MONTHS_AHEAD)
+    archive_parser = commands.add_parser("archive", help="Move expired partitions to cold storage")
+    archive_parser.add_argument("--retain-months", type=int, default=settings.PARTITION_RETAIN_MONTHS)
+    archive_parser.add_argument("--keep-table", action="store_true", help="Detach and archive but do not drop")
+    archive_parser.add_argument("--dry-run", action="store_true")
+    args = parser.parse_args(argv)
+
+    if args.command == "ensure":
+        with get_engine().begin() as connection:
+            ensure_partitions(connection, months_ahead=args.months_ahead)
+        print(f"Partitions ensured through {args.months_ahead} months ahead")
+        return 0
+    return archive(args.retain_months, args.keep_table, args.dry_run)
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,29 @@
+"""Purge expired refresh tokens.
+
+Usage:
+    python -m app.jobs.refresh_tokens [--batch-size N]
+
+Deletes refresh tokens past their expiry, rotated or not. Clients holding
+one have to log in again anyway.
+"""
+import argparse
+import sys
+from app.db.session import SessionLocal, get_engine
+from app.services.refresh_token_service import refresh_token_service
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Purge expired refresh tokens")
+    parser.add_argument("--batch-size", type=int, default=1000,
+                        help="Rows deleted per transaction")
+    args = parser.parse_args(argv)
+
+    db = SessionLocal(bind=get_engine())
+    try:
+        deleted = refresh_token_service.purge_expired(db, batch_size=args.batch_size)
+        print(f"Purged {deleted} expired refresh tokens")
+        return 0
+    finally:
+        db.close()
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,30 @@
+"""Usage and revenue rollups.
+
+Usage:
+    python -m app.jobs.rollups [--lag-seconds N]
+
+Folds token_history and subscriptions rows written since the last run into
+the daily rollup tables read by the usage and revenue endpoints.
+"""
+import argparse
+import sys
+from app.db.session import SessionLocal, get_engine
+from app.services.usage_rollup import usage_rollup_service
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Usage and revenue rollups")
+    parser.add_argument("--lag-seconds", type=int, default=300,
+                        help="Leave rows newer than this for the next run")
+    args = parser.parse_args(argv)
+
+    db = SessionLocal(bind=get_engine())
+    try:
+        usage_days = usage_rollup_service.roll_up_usage(db, lag_seconds=args.lag_seconds)
+        revenue_days = usage_rollup_service.roll_up_revenue(db, lag_seconds=args.lag_seconds)
+        print(f"Rolled up usage for {usage_days} days and revenue for {revenue_days} days")
+        return 0
+    finally:
+        db.close()
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,29 @@
+"""Purge expired email verifications.
+
+Usage:
+    python -m app.jobs.verifications [--batch-size N]
+
+Deletes unverified verification records past their expiry. Users who have
+not verified get a fresh record and email on their next login attempt.
+"""
+import argparse
+import sys
+from app.db.session import SessionLocal, get_engine
+from app.services.verification_service import verification_service
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Purge expired email verifications")
+    parser.add_argument("--batch-size", type=int, default=1000,
+                        help="Rows deleted per transaction")
+    args = parser.parse_args(argv)
+
+    db = SessionLocal(bind=get_engine())
+    try:
+        deleted = verification_service.purge_expired(db, batch_size=args.batch_size)
+        print(f"Purged {deleted} expired verifications")
+        return 0
+    finally:
+        db.close()
+
+if __name__ == "__main__":
+    sys.exit(main())
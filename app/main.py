@@ -1,18 +1,66 @@
-from fastapi import FastAPI, status
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager
+from fastapi import Depends, FastAPI, status
+from fastapi.responses import PlainTextResponse
 from fastapi.middleware.cors import CORSMiddleware
 from app.core.config import get_settings
-from app.api.v1.endpoints import auth, generation, token, subscription
-from app.db.session import engine, s3_client
+from app.core.clients import clients
+from app.core.dependencies import verify_metrics_token
+from app.core.compression import CompressionMiddleware
+from app.core.loop_monitor import loop_monitor
+from app.core.tracing import TracingMiddleware, setup_tracing, shutdown_tracing
+from app.api.v1.endpoints import admin, auth, generation, token, subscription
+from app.db.partitions import ensure_partitions
+from app.db.session import get_engine, get_s3_client
 import psutil
 import os
 
 settings = get_settings()
+# Before any client is created, so the engine and S3 client get instrumented
+setup_tracing()
+
+def _ensure_partitions():
+    with get_engine().begin() as connection:
+        ensure_partitions(connection, months_ahead=settings.PARTITION_MONTHS_AHEAD)
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Provider SDK calls block for seconds in worker threads; size the pool
+    # for that instead of the CPU-based default
+    asyncio.get_running_loop().set_default_executor(
+        ThreadPoolExecutor(max_workers=settings.PROVIDER_CALL_THREADS)
+    )
+    if settings.LOOP_MONITOR_ENABLED:
+        loop_monitor.start()
+    if settings.WARM_UP_CLIENTS:
+        await clients.startup()
+    try:
+        # Inserts fail outright without a partition for the current month
+        await asyncio.to_thread(_ensure_partitions)
+    except Exception as e:
+        print(f"Error ensuring partitions: {str(e)}")
+    yield
+    if settings.LOOP_MONITOR_ENABLED:
+        await loop_monitor.stop()
+    clients.shutdown()
+    shutdown_tracing()
 
 app = FastAPI(
     title="VidGen API",
-    version=settings.VERSION
+    version=settings.VERSION,
+    lifespan=lifespan
 )
 
+if settings.COMPRESSION_ENABLED:
+    app.add_middleware(
+        CompressionMiddleware,
+        minimum_size=settings.COMPRESSION_MINIMUM_SIZE,
+        content_types=settings.COMPRESSION_CONTENT_TYPES,
+        gzip_level=settings.COMPRESSION_GZIP_LEVEL,
+        brotli_quality=settings.COMPRESSION_BROTLI_QUALITY
+    )
+
 # CORS middleware
 app.add_middleware(
     CORSMiddleware,
@@ -22,11 +70,15 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Outermost, so request spans cover the other middleware
+app.add_middleware(TracingMiddleware)
+
 # Include routers
 app.include_router(auth.router, prefix=f"{settings.API_V1_STR}/auth", tags=["Authentication"])
 app.include_router(generation.router, prefix=f"{settings.API_V1_STR}/generation", tags=["Generation"])
 app.include_router(token.router, prefix=f"{settings.API_V1_STR}/tokens", tags=["Tokens"])
 app.include_router(subscription.router, prefix=f"{settings.API_V1_STR}/subscription", tags=["Subscriptions"])
+app.include_router(admin.router, prefix=f"{settings.API_V1_STR}/admin", tags=["Admin"])
 
 @app.get("/")
 async def root():
@@ -36,6 +88,16 @@ async def root():
         "docs_url": "/docs"
     }
 
+@app.get(
+    "/metrics",
+    response_class=PlainTextResponse,
+    include_in_schema=False,
+    dependencies=[Depends(verify_metrics_token)]
+)
+async def metrics():
+    """Event loop lag and stalls of this worker in Prometheus text format"""
+    return loop_monitor.metrics()
+
 @app.get("/health", status_code=status.HTTP_200_OK)
 async def health_check():
     health_status = {
@@ -54,7 +116,7 @@ async def health_check():
 
     try:
         # Test database connection
-        with engine.connect() as connection:
+        with get_engine().connect() as connection:
             connection.execute("SELECT 1")
         health_status["services"]["database"] = "healthy"
     except Exception as e:
@@ -62,7 +124,7 @@ async def health_check():
 
     try:
         # Test S3 connection
-        s3_client.list_objects_v2(Bucket=settings.S3_BUCKET_NAME, MaxKeys=1)
+        get_s3_client().list_objects_v2(Bucket=settings.S3_BUCKET_NAME, MaxKeys=1)
         health_status["services"]["storage"] = "healthy"
     except Exception as e:
         health_status["services"]["storage"] = str(e)
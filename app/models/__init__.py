@@ -1,15 +1,26 @@
 from app.models.user import User
 from app.models.user_verification import UserVerification
+from app.models.refresh_token import RefreshToken
 from app.models.subscription import Subscription
 from app.models.token_history import TokenHistory, TokenActionType
+from app.models.token_balance_snapshot import TokenBalanceSnapshot
 from app.models.generation import Generation, GenerationType
+from app.models.idempotency_key import IdempotencyKey
+from app.models.usage_rollup import TokenUsageDaily, UsageDailyTotal, DailyTotal, RollupWatermark
 
 __all__ = [
     "User",
     "UserVerification",
+    "RefreshToken",
     "Subscription",
     "TokenHistory",
     "TokenActionType",
+    "TokenBalanceSnapshot",
     "Generation",
-    "GenerationType"
+    "GenerationType",
+    "IdempotencyKey",
+    "TokenUsageDaily",
+    "UsageDailyTotal",
+    "DailyTotal",
+    "RollupWatermark"
 ] 
\ No newline at end of file
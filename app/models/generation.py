@@ -1,4 +1,5 @@
-from sqlalchemy import Column, String, ForeignKey, Text, Integer
+from sqlalchemy import Column, String, ForeignKey, Text, Integer, DateTime
+from sqlalchemy.sql import func
 from sqlalchemy.orm import relationship
 from sqlalchemy.dialects.postgresql import UUID
 from uuid import uuid4
@@ -11,6 +12,8 @@ class GenerationType(str, enum.Enum):
 
 class Generation(Base, TimestampMixin):
     __tablename__ = "generations"
+    # Monthly partitions, see app/db/partitions.py
+    __table_args__ = {"postgresql_partition_by": "RANGE (created_at)"}
 
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid4)
     user_id = Column(Integer, ForeignKey("users.id", ondelete='CASCADE'), nullable=False, index=True)
@@ -19,6 +22,8 @@ class Generation(Base, TimestampMixin):
     url = Column(String, nullable=False)
     reference_image_url = Column(String, nullable=True)
     status = Column(String, nullable=False, default="success")
+    # Part of the primary key since it is the partition key
+    created_at = Column(DateTime(timezone=True), primary_key=True, server_default=func.now(), nullable=False)
 
     # Relationships
     user = relationship("User", back_populates="generations")
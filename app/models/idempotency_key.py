@@ -0,0 +1,24 @@
+from sqlalchemy import BigInteger, Column, Integer, String, DateTime, ForeignKey, Index, LargeBinary, UniqueConstraint
+from sqlalchemy.dialects.postgresql import JSONB
+from app.db.base_class import Base, TimestampMixin
+
+class IdempotencyKey(Base, TimestampMixin):
+    __tablename__ = "idempotency_keys"
+    __table_args__ = (
+        UniqueConstraint("user_id", "key", name="uq_idempotency_keys_user_id_key"),
+        Index("ix_idempotency_keys_expires_at", "expires_at"),
+    )
+
+    id = Column(BigInteger, primary_key=True)
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
+    key = Column(String(255), nullable=False)  # Idempotency-Key header sent by the client
+    endpoint = Column(String, nullable=False)
+    request_hash = Column(LargeBinary(32), nullable=False)  # SHA-256 of the request parameters
+    locked_at = Column(DateTime(timezone=True), nullable=False)  # when the current attempt started
+    # set once the request succeeded; None must be SQL NULL, not JSON null,
+    # for abandoned attempts to be taken over
+    result = Column(JSONB(none_as_null=True), nullable=True)
+    expires_at = Column(DateTime(timezone=True), nullable=False)
+
+    def __repr__(self):
+        return f"<IdempotencyKey user_id={self.user_id} key={self.key} done={self.result is not None}>"
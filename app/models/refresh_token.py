@@ -0,0 +1,15 @@
+from sqlalchemy import BigInteger, Column, Integer, DateTime, ForeignKey, LargeBinary
+from app.db.base_class import Base, TimestampMixin
+
+class RefreshToken(Base, TimestampMixin):
+    __tablename__ = "refresh_tokens"
+
+    id = Column(BigInteger, primary_key=True)
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False, index=True)
+    token_hash = Column(LargeBinary(32), unique=True, nullable=False)  # SHA-256 of the issued token
+    family_id = Column(LargeBinary(16), nullable=False)  # shared by every rotation of one login
+    expires_at = Column(DateTime(timezone=True), nullable=False, index=True)  # for the purge job
+    used_at = Column(DateTime(timezone=True), nullable=True)  # set when rotated or revoked
+
+    def __repr__(self):
+        return f"<RefreshToken user_id={self.user_id} used={self.used_at is not None}>"
@@ -0,0 +1,17 @@
+from sqlalchemy import Column, Integer, DateTime, ForeignKey, Index
+from app.db.base_class import Base, TimestampMixin
+
+class TokenBalanceSnapshot(Base, TimestampMixin):
+    __tablename__ = "token_balance_snapshots"
+    __table_args__ = (
+        Index("ix_token_balance_snapshots_user_id_taken_at", "user_id", "taken_at"),
+    )
+
+    id = Column(Integer, primary_key=True)
+    user_id = Column(Integer, ForeignKey("users.id", ondelete='CASCADE'), nullable=False)
+    balance = Column(Integer, nullable=False)  # ledger balance including every history row up to last_history_id
+    last_history_id = Column(Integer, nullable=False)  # highest token_history.id included in the balance
+    taken_at = Column(DateTime(timezone=True), nullable=False)  # created_at of the newest included history row
+
+    def __repr__(self):
+        return f"<TokenBalanceSnapshot user_id={self.user_id} balance={self.balance} last_history_id={self.last_history_id}>"
@@ -1,7 +1,7 @@
-from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Enum
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Enum, Index, Float
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
-from sqlalchemy.dialects.postgresql import JSONB
+from sqlalchemy.dialects.postgresql import JSONB, UUID
 from app.db.base_class import Base, TimestampMixin
 import enum
 
@@ -11,13 +11,26 @@ class TokenActionType(str, enum.Enum):
 
 class TokenHistory(Base, TimestampMixin):
     __tablename__ = "token_history"
+    __table_args__ = (
+        # Per-user range scans past a ledger snapshot's last_history_id
+        Index("ix_token_history_user_id_id", "user_id", "id"),
+        # Monthly partitions, see app/db/partitions.py
+        {"postgresql_partition_by": "RANGE (created_at)"},
+    )
 
-    id = Column(Integer, primary_key=True, index=True)
+    id = Column(Integer, primary_key=True, autoincrement=True)
     user_id = Column(Integer, ForeignKey("users.id", ondelete='CASCADE'), nullable=False)
     tokens = Column(Integer, nullable=False)  # can be positive (added) or negative (consumed)
     action_type = Column(String, nullable=False)  # Will store "consumed" or "added"
     description = Column(String, nullable=False)  # e.g., "Subscription purchase", "Competitor search"
     extra_data = Column(JSONB, nullable=False, server_default='{}')  # store additional info like search query
+    # Frequently read details kept out of extra_data. generation_id is not a
+    # database foreign key: generations' primary key is (id, created_at)
+    generation_id = Column(UUID(as_uuid=True), nullable=True)  # generation the tokens were consumed for
+    subscription_id = Column(String, nullable=True)  # Stripe checkout session of a purchase
+    amount_paid = Column(Float, nullable=True)
+    # Part of the primary key since it is the partition key
+    created_at = Column(DateTime(timezone=True), primary_key=True, server_default=func.now(), nullable=False)
     
     user = relationship("User", back_populates="token_history")
 
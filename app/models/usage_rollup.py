@@ -0,0 +1,40 @@
+from sqlalchemy import Column, Integer, String, Date, Float, ForeignKey
+from app.db.base_class import Base, TimestampMixin
+
+class TokenUsageDaily(Base, TimestampMixin):
+    """Tokens consumed per user, UTC day and generation type"""
+    __tablename__ = "token_usage_daily"
+
+    user_id = Column(Integer, ForeignKey("users.id", ondelete='CASCADE'), primary_key=True)
+    day = Column(Date, primary_key=True)
+    generation_type = Column(String, primary_key=True)  # "image", "video" or "other"
+    tokens_consumed = Column(Integer, nullable=False, default=0)
+    generations = Column(Integer, nullable=False, default=0)
+
+class UsageDailyTotal(Base, TimestampMixin):
+    """Tokens consumed across all users per UTC day and generation type"""
+    __tablename__ = "usage_daily_totals"
+
+    day = Column(Date, primary_key=True)
+    generation_type = Column(String, primary_key=True)
+    tokens_consumed = Column(Integer, nullable=False, default=0)
+    generations = Column(Integer, nullable=False, default=0)
+    active_users = Column(Integer, nullable=False, default=0)
+
+class DailyTotal(Base, TimestampMixin):
+    """Usage and revenue across all users per UTC day"""
+    __tablename__ = "daily_totals"
+
+    day = Column(Date, primary_key=True)
+    active_users = Column(Integer, nullable=False, default=0)  # users who consumed tokens that day
+    tokens_consumed = Column(Integer, nullable=False, default=0)
+    revenue = Column(Float, nullable=False, default=0)  # paid subscriptions, in USD
+    purchases = Column(Integer, nullable=False, default=0)
+    tokens_sold = Column(Integer, nullable=False, default=0)
+
+class RollupWatermark(Base, TimestampMixin):
+    """Highest source row id folded into the rollups, per source table"""
+    __tablename__ = "rollup_watermarks"
+
+    name = Column(String, primary_key=True)
+    last_id = Column(Integer, nullable=False, default=0)
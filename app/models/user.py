@@ -6,12 +6,14 @@ from app.db.base_class import Base, TimestampMixin
 class User(Base, TimestampMixin):
     __tablename__ = "users"
 
-    id = Column(Integer, primary_key=True, index=True)
+    id = Column(Integer, primary_key=True)
     email = Column(String, unique=True, index=True, nullable=False)
     full_name = Column(String, nullable=False)
     hashed_password = Column(String, nullable=False)
     is_active = Column(Boolean, default=False)
     tokens = Column(Integer, server_default='300', nullable=False)
+    # Bumped whenever the balance, token history or generations change; used for ETags
+    data_version = Column(Integer, server_default='0', nullable=False)
     
     token_history = relationship("TokenHistory", back_populates="user", cascade="all, delete-orphan")
     verification = relationship("UserVerification", back_populates="user", uselist=False, cascade="all, delete-orphan")
@@ -1,15 +1,17 @@
-from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Boolean
+from sqlalchemy import Column, Integer, DateTime, ForeignKey, Boolean, Index, LargeBinary, text
 from sqlalchemy.orm import relationship
-from sqlalchemy.sql import func
 from app.db.base_class import Base, TimestampMixin
-import uuid
 
 class UserVerification(Base, TimestampMixin):
     __tablename__ = "user_verifications"
+    __table_args__ = (
+        # Small partial index for the purge job; verified rows are never purged
+        Index("ix_user_verifications_expires_at_unverified", "expires_at", postgresql_where=text("NOT is_verified")),
+    )
 
-    id = Column(Integer, primary_key=True, index=True)
-    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
-    verification_token = Column(String, unique=True, nullable=False, default=lambda: str(uuid.uuid4()))
+    id = Column(Integer, primary_key=True)
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False, index=True)
+    token_hash = Column(LargeBinary(32), unique=True, index=True, nullable=False)  # SHA-256 of the emailed token
     is_verified = Column(Boolean, default=False)
     verified_at = Column(DateTime(timezone=True), nullable=True)
     expires_at = Column(DateTime(timezone=True), nullable=False)
@@ -17,4 +19,4 @@ class UserVerification(Base, TimestampMixin):
     user = relationship("User", back_populates="verification")
 
     def __repr__(self):
-        return f"<UserVerification user_id={self.user_id}>" 
\ No newline at end of file
+        return f"<UserVerification user_id={self.user_id}>" 
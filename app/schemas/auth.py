@@ -27,12 +27,22 @@ class Token(BaseModel):
     access_token: str
     token_type: str
     user: UserResponse
+    refresh_token: Optional[str] = None
+
+class RefreshRequest(BaseModel):
+    refresh_token: str
+
+class RefreshResponse(BaseModel):
+    access_token: str
+    refresh_token: str
+    token_type: str = "bearer"
 
 class VerifyEmailResponse(BaseModel):
     message: str
     user: UserResponse
-    access_token: str
+    access_token: Optional[str] = None
     token_type: str = "bearer"
+    refresh_token: Optional[str] = None
 
     class Config:
         from_attributes = True 
\ No newline at end of file
@@ -1,6 +1,7 @@
 from pydantic import BaseModel
 from datetime import datetime
 from typing import Dict, Optional
+from uuid import UUID
 
 class TokenHistoryResponse(BaseModel):
     id: int
@@ -9,9 +10,13 @@ class TokenHistoryResponse(BaseModel):
     action_type: str
     description: str
     extra_data: Dict
+    generation_id: Optional[UUID] = None
+    subscription_id: Optional[str] = None
+    amount_paid: Optional[float] = None
     created_at: datetime
     updated_at: datetime
     generation_url: Optional[str] = None  # For storing signed URLs
+    prompt: Optional[str] = None
 
     class Config:
         from_attributes = True 
\ No newline at end of file
@@ -0,0 +1,31 @@
+from pydantic import BaseModel
+from datetime import date
+
+class DailyUsageResponse(BaseModel):
+    day: date
+    generation_type: str
+    tokens_consumed: int
+    generations: int
+
+    class Config:
+        from_attributes = True
+
+class GlobalDailyUsageResponse(DailyUsageResponse):
+    active_users: int
+
+class DailyActivityResponse(BaseModel):
+    day: date
+    active_users: int
+    tokens_consumed: int
+
+    class Config:
+        from_attributes = True
+
+class DailyRevenueResponse(BaseModel):
+    day: date
+    revenue: float
+    purchases: int
+    tokens_sold: int
+
+    class Config:
+        from_attributes = True
@@ -1,5 +1,7 @@
-from openai import OpenAI
 from app.core.config import get_settings
+from app.core.clients import clients
+from app.core.circuit_breaker import CircuitBreaker
+from app.core.tracing import set_attribute, span
 import requests
 from datetime import datetime
 import uuid
@@ -7,30 +9,30 @@ from sqlalchemy.orm import Session
 from app.models.generation import Generation, GenerationType
 from app.services.storage_service import storage_service
 from app.services.token_history import token_history_service, TokenActionType
-from app.models.user import User
+from app.db.queries import change_token_balance, get_token_balance
 from fastapi import HTTPException
 
 settings = get_settings()
-print(f"Initializing OpenAI client with key: {settings.AI_MODEL_KEY[:8]}...")
-client = OpenAI(api_key=settings.AI_MODEL_KEY)
+openai_breaker = CircuitBreaker("OpenAI")
 
 async def generate_image(prompt: str, user_id: int, db: Session):
     try:
         # Check if user has enough tokens
-        user = db.query(User).filter(User.id == user_id).first()
-        if not user:
+        balance = get_token_balance(db, user_id)
+        if balance is None:
             raise HTTPException(status_code=404, detail="User not found")
         
         required_tokens = 15  # Cost for image generation
-        if user.tokens < required_tokens:
+        if balance < required_tokens:
             raise HTTPException(
                 status_code=400,
-                detail=f"Insufficient tokens. You need {required_tokens} tokens to generate an image, but you only have {user.tokens} tokens."
+                detail=f"Insufficient tokens. You need {required_tokens} tokens to generate an image, but you only have {balance} tokens."
             )
 
         print(f"Attempting to generate image with prompt: {prompt}")
         # Generate image using DALL-E
-        response = client.images.generate(
+        response = await openai_breaker.call(
+            clients.get("openai").images.generate,
             model="dall-e-3",  # Explicitly specify the model
             prompt=prompt,
             n=1,
@@ -44,8 +46,10 @@ async def generate_image(prompt: str, user_id: int, db: Session):
         
         try:
             # Download the image
-            image_response = requests.get(image_url)
-            image_data = image_response.content
+            with span("Download image") as download_span:
+                image_response = requests.get(image_url)
+                image_data = image_response.content
+                set_attribute(download_span, "bytes", len(image_data))
             
             # Generate file path
             file_path = f"generated/{user_id}/{datetime.now().timestamp()}.png"
@@ -71,15 +75,14 @@ async def generate_image(prompt: str, user_id: int, db: Session):
                 db.add(generation)
                 
                 # Deduct tokens and log token history
-                user.tokens -= required_tokens
+                change_token_balance(db, user_id, -required_tokens)
                 token_history_service.create_token_history(
                     db=db,
                     user_id=user_id,
                     tokens=-required_tokens,  # Negative value for consumption
                     action_type=TokenActionType.CONSUMED,
                     description="Image generation",
-                    extra_data={"prompt": prompt},
-                    generation_url=file_path
+                    generation_id=generation.id
                 )
                 
                 db.commit()
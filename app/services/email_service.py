@@ -1,11 +1,11 @@
-from mailjet_rest import Client
 from app.core.config import get_settings
+from app.core.clients import clients
+from app.core.tracing import span
 from pathlib import Path
 from datetime import datetime, timedelta
 import jinja2
 
 settings = get_settings()
-mailjet = Client(auth=(settings.MAILJET_API_KEY, settings.MAILJET_SECRET_KEY), version='v3.1')
 
 # Setup Jinja2 template environment
 template_dir = Path(__file__).parent.parent / "templates"
@@ -49,7 +49,8 @@ def send_verification_email(user_email: str, user_name: str, verification_token:
         }
         
         # Send the email
-        result = mailjet.send.create(data=data)
+        with span("Mailjet send", template="verification"):
+            result = clients.get("mailjet").send.create(data=data)
         
         if result.status_code > 299:
             print(f"Failed to send email: {result.json()}")
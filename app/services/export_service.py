@@ -0,0 +1,166 @@
+import asyncio
+import json
+import os
+import zipfile
+from collections import deque
+from datetime import datetime
+from typing import AsyncIterator, Deque, List, Optional, Sequence, Tuple
+from app.core.config import get_settings
+from app.services.storage_service import storage_service
+
+settings = get_settings()
+
+_END = object()
+
+
+class _ZipSink:
+    """Write-only, unseekable file object; zipfile then emits data
+    descriptors instead of seeking back to patch entry headers."""
+
+    def __init__(self):
+        self._chunks: List[bytes] = []
+
+    def write(self, data) -> int:
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self) -> None:
+        pass
+
+    def drain(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+class _Fetch:
+    """Reads one S3 object in chunks into a small bounded queue"""
+
+    def __init__(self, key: str, chunk_size: int, queue_chunks: int):
+        self.key = key
+        self.chunk_size = chunk_size
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=queue_chunks)
+        self.size: Optional[int] = None
+        self.started = asyncio.get_running_loop().create_future()
+        self.task = asyncio.create_task(self._run())
+
+    async def _run(self) -> None:
+        body = None
+        try:
+            response = await asyncio.to_thread(
+                storage_service.s3_client.get_object, Bucket=storage_service.bucket_name, Key=self.key
+            )
+            body = response["Body"]
+            self.size = response.get("ContentLength")
+            self.started.set_result(None)
+            while True:
+                chunk = await asyncio.to_thread(body.read, self.chunk_size)
+                if not chunk:
+                    break
+                await self.queue.put(chunk)
+            await self.queue.put(_END)
+        except Exception as e:
+            if not self.started.done():
+                self.started.set_exception(e)
+            else:
+                await self.queue.put(e)
+        finally:
+            if body is not None:
+                body.close()
+
+    async def chunks(self) -> AsyncIterator[bytes]:
+        while True:
+            item = await self.queue.get()
+            if item is _END:
+                return
+            if isinstance(item, Exception):
+                raise item
+            yield item
+
+    def cancel(self) -> None:
+        self.task.cancel()
+        if not self.started.done():
+            self.started.cancel()
+
+
+class ExportService:
+    """Streams a user's generations as a ZIP archive built on the fly.
+
+    Objects are read from S3 in chunks by at most ``concurrency`` fetches
+    running ahead of the archive writer, each buffering a few chunks, so
+    memory stays bounded regardless of archive size and nothing touches disk.
+    Media is stored uncompressed; PNG and MP4 are already compressed.
+    """
+
+    def __init__(self, concurrency: int = None, chunk_size: int = None, queue_chunks: int = 4):
+        self.concurrency = concurrency or settings.EXPORT_CONCURRENCY
+        self.chunk_size = chunk_size or settings.EXPORT_CHUNK_SIZE
+        self.queue_chunks = queue_chunks
+
+    def _archive_name(self, generation) -> str:
+        return f"{generation.type}s/{os.path.basename(generation.url)}"
+
+    async def stream_zip(self, generations: Sequence) -> AsyncIterator[bytes]:
+        """Yield the archive bytes for generations with ``id, type, prompt, url, created_at``"""
+        sink = _ZipSink()
+        archive = zipfile.ZipFile(sink, mode="w", compression=zipfile.ZIP_STORED)
+        pending: Deque[Tuple[object, _Fetch]] = deque()
+        remaining = iter(generations)
+        manifest = []
+        fetch = None
+
+        def fill() -> None:
+            while len(pending) < self.concurrency:
+                generation = next(remaining, None)
+                if generation is None:
+                    return
+                pending.append((generation, _Fetch(generation.url, self.chunk_size, self.queue_chunks)))
+
+        try:
+            fill()
+            while pending:
+                generation, fetch = pending.popleft()
+                fill()
+                entry = {
+                    "id": str(generation.id),
+                    "type": generation.type,
+                    "prompt": generation.prompt,
+                    "created_at": generation.created_at.isoformat(),
+                    "file": self._archive_name(generation)
+                }
+                manifest.append(entry)
+                try:
+                    await fetch.started
+                except Exception as e:
+                    print(f"Export: failed to fetch {generation.url}: {str(e)}")
+                    entry["file"] = None
+                    entry["error"] = "File not available"
+                    continue
+
+                info = zipfile.ZipInfo(entry["file"], date_time=generation.created_at.timetuple()[:6])
+                info.compress_type = zipfile.ZIP_STORED
+                info.file_size = fetch.size or 0
+                with archive.open(info, mode="w") as member:
+                    try:
+                        async for chunk in fetch.chunks():
+                            member.write(chunk)
+                            yield sink.drain()
+                    except Exception as e:
+                        # Headers are already sent; keep what was read and flag it
+                        print(f"Export: interrupted reading {generation.url}: {str(e)}")
+                        entry["error"] = "File incomplete"
+
+            archive.writestr(
+                zipfile.ZipInfo("manifest.json", date_time=datetime.now().timetuple()[:6]),
+                json.dumps({"generations": manifest}, indent=2, ensure_ascii=False)
+            )
+            archive.close()
+            yield sink.drain()
+        finally:
+            # Client went away or the export failed; stop reading ahead
+            if fetch is not None:
+                fetch.cancel()
+            for _, queued in pending:
+                queued.cancel()
+
+export_service = ExportService()
@@ -0,0 +1,143 @@
+import asyncio
+import hashlib
+import math
+import time
+from datetime import timedelta
+from typing import Awaitable, Callable, Dict, Optional, Tuple
+from fastapi import HTTPException, status
+from sqlalchemy import and_, delete, func, or_, select, update
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.orm import Session
+from app.core.config import get_settings
+from app.models.idempotency_key import IdempotencyKey
+
+settings = get_settings()
+
+def fingerprint(*parts) -> bytes:
+    """Digest of the request parameters a key was first used with"""
+    digest = hashlib.sha256()
+    for part in parts:
+        data = part if isinstance(part, bytes) else str(part).encode("utf-8")
+        digest.update(len(data).to_bytes(8, "big"))
+        digest.update(data)
+    return digest.digest()
+
+class IdempotencyService:
+    """Idempotency-Key handling for expensive POSTs.
+
+    The first request with a key claims a row in idempotency_keys and runs;
+    its result is stored for IDEMPOTENCY_KEY_TTL_HOURS. Duplicates arriving
+    meanwhile, on any worker, poll the row until the result is there and
+    return it instead of running again, for up to IDEMPOTENCY_LOCK_SECONDS
+    before answering 409. A failed attempt releases the key so
+    the client's retry runs for real, and an attempt that never finished
+    (a crashed worker) can be taken over after IDEMPOTENCY_LOCK_SECONDS.
+    """
+
+    async def run(
+        self,
+        db: Session,
+        user_id: int,
+        key: Optional[str],
+        endpoint: str,
+        request_hash: bytes,
+        produce: Callable[[], Awaitable[Dict]]
+    ) -> Tuple[Dict, bool]:
+        """Result of ``produce()`` for this key, and whether it was replayed"""
+        if key is None:
+            return await produce(), False
+
+        deadline = time.monotonic() + settings.IDEMPOTENCY_LOCK_SECONDS
+        while True:
+            record_id = self._claim(db, user_id, key, endpoint, request_hash)
+            if record_id is not None:
+                break
+            existing = db.execute(
+                select(IdempotencyKey.endpoint, IdempotencyKey.request_hash, IdempotencyKey.result)
+                .where(IdempotencyKey.user_id == user_id, IdempotencyKey.key == key)
+            ).first()
+            # End the read transaction so no connection is held while waiting
+            db.commit()
+            if existing is None:
+                # The other attempt failed and released the key
+                continue
+            if existing.endpoint != endpoint or existing.request_hash != request_hash:
+                raise HTTPException(
+                    status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+                    detail="Idempotency-Key was already used with a different request"
+                )
+            if existing.result is not None:
+                return existing.result, True
+            if time.monotonic() >= deadline:
+                raise HTTPException(
+                    status_code=status.HTTP_409_CONFLICT,
+                    detail="A request with this Idempotency-Key is still in progress",
+                    headers={"Retry-After": str(max(1, math.ceil(settings.IDEMPOTENCY_POLL_INTERVAL)))}
+                )
+            await asyncio.sleep(settings.IDEMPOTENCY_POLL_INTERVAL)
+
+        try:
+            result = await produce()
+        except BaseException:
+            db.rollback()
+            db.execute(delete(IdempotencyKey).where(IdempotencyKey.id == record_id))
+            db.commit()
+            raise
+        db.execute(
+            update(IdempotencyKey)
+            .where(IdempotencyKey.id == record_id)
+            .values(result=result)
+            .execution_options(synchronize_session=False)
+        )
+        db.commit()
+        return result, False
+
+    def _claim(self, db: Session, user_id: int, key: str, endpoint: str, request_hash: bytes) -> Optional[int]:
+        """Insert the key, or take over an expired or abandoned one; None if it is taken"""
+        table = IdempotencyKey.__table__
+        values = dict(
+            endpoint=endpoint,
+            request_hash=request_hash,
+            locked_at=func.now(),
+            result=None,
+            expires_at=func.now() + timedelta(hours=settings.IDEMPOTENCY_KEY_TTL_HOURS)
+        )
+        statement = pg_insert(table).values(user_id=user_id, key=key, **values)
+        record_id = db.execute(
+            statement.on_conflict_do_update(
+                constraint="uq_idempotency_keys_user_id_key",
+                set_=values,
+                where=or_(
+                    table.c.expires_at < func.now(),
+                    and_(
+                        table.c.result.is_(None),
+                        table.c.locked_at < func.now() - timedelta(seconds=settings.IDEMPOTENCY_LOCK_SECONDS)
+                    )
+                )
+            )
+            .returning(table.c.id)
+        ).scalar()
+        db.commit()
+        return record_id
+
+    def purge_expired(self, db: Session, batch_size: int = 1000) -> int:
+        """Delete expired keys in batches; returns the number deleted"""
+        deleted = 0
+        while True:
+            batch = (
+                select(IdempotencyKey.id)
+                .where(IdempotencyKey.expires_at < func.now())
+                .limit(batch_size)
+                .scalar_subquery()
+            )
+            result = db.execute(
+                delete(IdempotencyKey)
+                .where(IdempotencyKey.id.in_(batch))
+                .execution_options(synchronize_session=False)
+            )
+            db.commit()
+            deleted += result.rowcount
+            if result.rowcount < batch_size:
+                return deleted
+
+idempotency_service = IdempotencyService()
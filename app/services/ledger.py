@@ -0,0 +1,166 @@
+from datetime import datetime, timedelta
+from typing import List, Optional
+import pytz
+from sqlalchemy import func, insert, literal, select
+from sqlalchemy.engine import Row
+from sqlalchemy.orm import Session
+from app.db.partitions import list_partitions
+from app.models.token_balance_snapshot import TokenBalanceSnapshot
+from app.models.token_history import TokenHistory
+from app.models.user import User
+
+# users.tokens starts at its server default and the signup grant is not
+# written to token_history, so every ledger balance starts from here
+OPENING_BALANCE = 300
+
+class LedgerService:
+    """Token balances derived from token_history plus per-user snapshots.
+
+    A snapshot stores the balance including every history row with
+    ``id <= last_history_id``, so any balance is one snapshot lookup plus a
+    short indexed range scan over the rows written after it.
+    """
+
+    def balance_as_of(self, db: Session, user_id: int, at: Optional[datetime] = None) -> int:
+        """Ledger balance for a user including history rows created at or before ``at``.
+
+        Raises ValueError when ``at`` falls before the oldest attached
+        token_history partition, since archived rows can no longer be summed.
+        """
+        if at is None:
+            at = datetime.now(pytz.UTC)
+        elif at.tzinfo is None:
+            at = at.replace(tzinfo=pytz.UTC)
+        start = self.history_start(db)
+        if start is not None and at < start:
+            raise ValueError(f"Token history before {start.isoformat()} is no longer available")
+
+        snapshot = db.execute(
+            select(TokenBalanceSnapshot.balance, TokenBalanceSnapshot.last_history_id)
+            .where(
+                TokenBalanceSnapshot.user_id == user_id,
+                TokenBalanceSnapshot.taken_at <= at
+            )
+            .order_by(TokenBalanceSnapshot.taken_at.desc())
+            .limit(1)
+        ).first()
+        balance, last_history_id = snapshot if snapshot else (OPENING_BALANCE, 0)
+
+        delta = db.execute(
+            select(func.coalesce(func.sum(TokenHistory.tokens), 0))
+            .where(
+                TokenHistory.user_id == user_id,
+                TokenHistory.id > last_history_id,
+                TokenHistory.created_at <= at
+            )
+        ).scalar_one()
+        return balance + delta
+
+    def history_start(self, db: Session) -> Optional[datetime]:
+        """Start of the oldest token_history partition still attached"""
+        partitions = list_partitions(db.connection(), "token_history")
+        return partitions[0][1] if partitions else None
+
+    def _latest_snapshots(self):
+        """Most recent snapshot per user"""
+        return (
+            select(
+                TokenBalanceSnapshot.user_id,
+                TokenBalanceSnapshot.balance,
+                TokenBalanceSnapshot.last_history_id
+            )
+            .distinct(TokenBalanceSnapshot.user_id)
+            .order_by(TokenBalanceSnapshot.user_id, TokenBalanceSnapshot.last_history_id.desc())
+            .cte("latest_snapshots")
+        )
+
+    def snapshot_floor(self, db: Session) -> int:
+        """Every history row at or below this id is covered by a snapshot"""
+        return db.execute(
+            select(func.coalesce(func.max(TokenBalanceSnapshot.last_history_id), 0))
+        ).scalar_one()
+
+    def take_snapshots(self, db: Session, lag_seconds: int = 300) -> int:
+        """Snapshot every user with history rows since their last snapshot.
+
+        Rows newer than ``lag_seconds`` are left for the next run so that a
+        row whose id was allocated by a still-open transaction is never
+        skipped. Returns the number of snapshots written.
+        """
+        floor = self.snapshot_floor(db)
+        cutoff = datetime.now(pytz.UTC) - timedelta(seconds=lag_seconds)
+
+        # Stop below the first row that is too recent to be final
+        high_water = db.execute(
+            select(func.coalesce(
+                select(func.min(TokenHistory.id))
+                .where(TokenHistory.id > floor, TokenHistory.created_at >= cutoff)
+                .scalar_subquery(),
+                select(func.max(TokenHistory.id) + 1)
+                .where(TokenHistory.id > floor)
+                .scalar_subquery()
+            ))
+        ).scalar_one()
+        if high_water is None:
+            return 0
+
+        new_rows = (
+            select(
+                TokenHistory.user_id,
+                func.sum(TokenHistory.tokens).label("delta"),
+                func.max(TokenHistory.id).label("last_history_id"),
+                func.max(TokenHistory.created_at).label("taken_at")
+            )
+            .where(TokenHistory.id > floor, TokenHistory.id < high_water)
+            .group_by(TokenHistory.user_id)
+            .cte("new_rows")
+        )
+        latest = self._latest_snapshots()
+        result = db.execute(
+            insert(TokenBalanceSnapshot).from_select(
+                ["user_id", "balance", "last_history_id", "taken_at"],
+                select(
+                    new_rows.c.user_id,
+                    func.coalesce(latest.c.balance, OPENING_BALANCE) + new_rows.c.delta,
+                    new_rows.c.last_history_id,
+                    new_rows.c.taken_at
+                )
+                .select_from(new_rows)
+                .outerjoin(latest, latest.c.user_id == new_rows.c.user_id)
+            )
+        )
+        db.commit()
+        return result.rowcount
+
+    def find_drift(self, db: Session) -> List[Row]:
+        """Users whose stored balance differs from the ledger, in one set-based query.
+
+        Returns rows of ``(user_id, tokens, ledger_balance)``.
+        """
+        floor = self.snapshot_floor(db)
+        latest = self._latest_snapshots()
+        # Only rows past the snapshot floor can be missing from a snapshot
+        tail = (
+            select(TokenHistory.user_id, func.sum(TokenHistory.tokens).label("delta"))
+            .select_from(TokenHistory)
+            .outerjoin(latest, latest.c.user_id == TokenHistory.user_id)
+            .where(
+                TokenHistory.id > floor,
+                TokenHistory.id > func.coalesce(latest.c.last_history_id, 0)
+            )
+            .group_by(TokenHistory.user_id)
+            .cte("tail")
+        )
+        ledger_balance = (
+            func.coalesce(latest.c.balance, OPENING_BALANCE) + func.coalesce(tail.c.delta, literal(0))
+        ).label("ledger_balance")
+        return db.execute(
+            select(User.id.label("user_id"), User.tokens, ledger_balance)
+            .select_from(User)
+            .outerjoin(latest, latest.c.user_id == User.id)
+            .outerjoin(tail, tail.c.user_id == User.id)
+            .where(User.tokens != ledger_balance)
+            .order_by(User.id)
+        ).all()
+
+ledger_service = LedgerService()
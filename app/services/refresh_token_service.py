@@ -0,0 +1,104 @@
+import secrets
+from datetime import datetime, timedelta
+from typing import Optional, Tuple
+import pytz
+from sqlalchemy import delete, func, select, update
+from sqlalchemy.orm import Session
+from app.core.config import get_settings
+from app.models.refresh_token import RefreshToken
+from app.models.user import User
+from app.services.verification_service import hash_token
+
+settings = get_settings()
+
+class RefreshTokenService:
+    """Rotating refresh tokens.
+
+    Each refresh consumes the presented token and issues a new one in the
+    same family. Presenting a token that was already rotated means it was
+    copied, so the whole family is revoked and the client has to log in
+    again. Only SHA-256 digests are stored.
+    """
+
+    def issue(self, db: Session, user_id: int, family_id: Optional[bytes] = None) -> str:
+        """Add a refresh token for the user; the caller commits"""
+        token = secrets.token_urlsafe(32)
+        db.add(RefreshToken(
+            user_id=user_id,
+            token_hash=hash_token(token),
+            family_id=family_id or secrets.token_bytes(16),
+            expires_at=datetime.now(pytz.UTC) + timedelta(days=settings.REFRESH_TOKEN_EXPIRE_DAYS)
+        ))
+        return token
+
+    def rotate(self, db: Session, token: str) -> Optional[Tuple[int, str, str]]:
+        """Consume ``token``; returns (user_id, email, new token) or None if it is not usable.
+
+        Consuming is a single UPDATE on the token hash index that also reads
+        the user's email, so concurrent refreshes with the same token cannot
+        both succeed. Tokens of deactivated users are not usable. Commits.
+        """
+        token_hash = hash_token(token)
+        tokens, users = RefreshToken.__table__, User.__table__
+        row = db.execute(
+            update(tokens)
+            .where(
+                tokens.c.token_hash == token_hash,
+                tokens.c.used_at.is_(None),
+                tokens.c.expires_at > func.now(),
+                users.c.id == tokens.c.user_id,
+                users.c.is_active.is_(True)
+            )
+            .values(used_at=func.now(), updated_at=func.now())
+            .returning(tokens.c.user_id, tokens.c.family_id, users.c.email)
+        ).first()
+        if row is None:
+            self._revoke_if_reused(db, token_hash)
+            db.commit()
+            return None
+        new_token = self.issue(db, row.user_id, row.family_id)
+        db.commit()
+        return row.user_id, row.email, new_token
+
+    def _revoke_if_reused(self, db: Session, token_hash: bytes) -> None:
+        used = db.execute(
+            select(RefreshToken.user_id, RefreshToken.family_id)
+            .where(RefreshToken.token_hash == token_hash, RefreshToken.used_at.is_not(None))
+        ).first()
+        if used is not None:
+            print(f"Refresh token reuse for user {used.user_id}; revoking its family")
+            db.execute(
+                update(RefreshToken)
+                .where(
+                    RefreshToken.user_id == used.user_id,
+                    RefreshToken.family_id == used.family_id,
+                    RefreshToken.used_at.is_(None)
+                )
+                .values(used_at=func.now())
+                .execution_options(synchronize_session=False)
+            )
+
+    def purge_expired(self, db: Session, batch_size: int = 1000) -> int:
+        """Delete expired tokens in batches; returns the number deleted.
+
+        Rotated tokens are kept until they expire so reuse is still detected.
+        """
+        deleted = 0
+        while True:
+            batch = (
+                select(RefreshToken.id)
+                .where(RefreshToken.expires_at < datetime.now(pytz.UTC))
+                .limit(batch_size)
+                .scalar_subquery()
+            )
+            result = db.execute(
+                delete(RefreshToken)
+                .where(RefreshToken.id.in_(batch))
+                .execution_options(synchronize_session=False)
+            )
+            db.commit()
+            deleted += result.rowcount
+            if result.rowcount < batch_size:
+                return deleted
+
+refresh_token_service = RefreshTokenService()
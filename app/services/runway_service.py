@@ -1,8 +1,10 @@
 import os
 import base64
 import time
-from runwayml import RunwayML
 from app.core.config import get_settings
+from app.core.clients import clients
+from app.core.circuit_breaker import CircuitBreaker, CircuitOpenError
+from app.core.tracing import set_attribute, span
 from datetime import datetime
 import uuid
 import aiofiles
@@ -13,20 +15,19 @@ from typing import Optional
 import requests
 from sqlalchemy.orm import Session
 from app.models.generation import Generation, GenerationType
-from app.db.session import s3_client
-from app.models.user import User
+from app.db.session import get_s3_client
+from app.db.queries import change_token_balance, get_token_balance
 from app.services.token_history import token_history_service, TokenActionType
 
 settings = get_settings()
 
 class RunwayMLService:
     def __init__(self):
-        try:
-            self.client = RunwayML(api_key=settings.RUNWAY_API_KEY)
-            print(f"Initialized RunwayML client with API key: {settings.RUNWAY_API_KEY[:10]}...")
-        except Exception as e:
-            print(f"Error initializing RunwayML client: {str(e)}")
-            raise
+        self.breaker = CircuitBreaker("RunwayML")
+
+    @property
+    def client(self):
+        return clients.get("runway")
 
     async def generate_video(
         self, 
@@ -40,15 +41,15 @@ class RunwayMLService:
         """Generate video from image and prompt."""
         try:
             # Check if user has enough tokens
-            user = db.query(User).filter(User.id == user_id).first()
-            if not user:
+            balance = get_token_balance(db, user_id)
+            if balance is None:
                 raise HTTPException(status_code=404, detail="User not found")
             
             required_tokens = 35  # Cost for video generation
-            if user.tokens < required_tokens:
+            if balance < required_tokens:
                 raise HTTPException(
                     status_code=400,
-                    detail=f"Insufficient tokens. You need {required_tokens} tokens to generate a video, but you only have {user.tokens} tokens."
+                    detail=f"Insufficient tokens. You need {required_tokens} tokens to generate a video, but you only have {balance} tokens."
                 )
 
             if not reference_image:
@@ -73,7 +74,8 @@ class RunwayMLService:
             try:
                 print("Creating image-to-video task...")
                 # Create a new image-to-video task
-                task = self.client.image_to_video.create(
+                task = await self.breaker.call(
+                    self.client.image_to_video.create,
                     model='gen3a_turbo',
                     prompt_image=image_data_uri,
                     prompt_text=prompt
@@ -84,11 +86,20 @@ class RunwayMLService:
                 
                 # Poll the task until it's complete
                 print("Polling for task completion...")
+                attempt = 0
                 while True:
-                    # Wait for ten seconds before polling
-                    await asyncio.sleep(10)
-                    
-                    task = self.client.tasks.retrieve(task_id)
+                    attempt += 1
+                    with span("Runway poll", task_id=task_id, attempt=attempt) as poll_span:
+                        # Wait before polling
+                        await asyncio.sleep(settings.RUNWAY_POLL_INTERVAL)
+
+                        # Status polls are idempotent, so slow ones are hedged
+                        task = await self.breaker.call_hedged(
+                            settings.RUNWAY_POLL_HEDGE_DELAY,
+                            self.client.tasks.retrieve,
+                            task_id
+                        )
+                        set_attribute(poll_span, "task_status", task.status)
                     print(f"Task status: {task.status}")
                     
                     if task.status == 'FAILED':
@@ -107,7 +118,9 @@ class RunwayMLService:
                 
                 # Download video
                 print("Downloading video...")
-                video_response = requests.get(video_url)
+                with span("Download video") as download_span:
+                    video_response = requests.get(video_url)
+                    set_attribute(download_span, "bytes", len(video_response.content))
                 if video_response.status_code != 200:
                     raise HTTPException(status_code=500, detail="Failed to download generated video")
                 
@@ -115,7 +128,7 @@ class RunwayMLService:
                 print("Uploading video to S3...")
                 file_name = f"generated/{user_id}/{datetime.now().timestamp()}.mp4"
                 try:
-                    s3_client.put_object(
+                    get_s3_client().put_object(
                         Bucket=settings.S3_BUCKET_NAME,
                         Key=file_name,
                         Body=video_response.content,
@@ -139,15 +152,14 @@ class RunwayMLService:
                     db.add(generation)
 
                     # Deduct tokens and log token history
-                    user.tokens -= required_tokens
+                    change_token_balance(db, user_id, -required_tokens)
                     token_history_service.create_token_history(
                         db=db,
                         user_id=user_id,
                         tokens=-required_tokens,  # Negative value for consumption
                         action_type=TokenActionType.CONSUMED,
                         description="Video generation",
-                        extra_data={"prompt": prompt},
-                        generation_url=file_name
+                        generation_id=generation.id
                     )
                     
                     db.commit()
@@ -157,6 +169,8 @@ class RunwayMLService:
                 
                 return file_name
                 
+            except CircuitOpenError:
+                raise
             except Exception as e:
                 print(f"Error during video generation: {str(e)}")
                 raise HTTPException(status_code=500, detail=f"Video generation error: {str(e)}")
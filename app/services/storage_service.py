@@ -1,45 +1,72 @@
 from app.core.config import get_settings
-from app.db.session import s3_client
-from datetime import timedelta
+from app.db.session import get_s3_client
+from app.services.url_signer import SigV4QuerySigner
+from datetime import datetime, timedelta
+from typing import List, Optional, Sequence
 import os
-import urllib.parse
+import pytz
 from fastapi import HTTPException
 
 settings = get_settings()
 
 class StorageService:
     def __init__(self):
-        self.s3_client = s3_client
         self.bucket_name = settings.S3_BUCKET_NAME
         self.project_id = settings.S3_ENDPOINT.split('/')[2].split('.')[0]
+        # Sign against the public Supabase host directly instead of
+        # presigning through boto3 and rewriting the host afterwards
+        self.signer = SigV4QuerySigner(
+            access_key=settings.S3_ACCESS_KEY,
+            secret_key=settings.S3_SECRET_KEY,
+            region=settings.S3_REGION,
+            endpoint=f"https://{self.project_id}.supabase.co/storage/v1/s3",
+            bucket=self.bucket_name
+        )
+
+    @property
+    def s3_client(self):
+        return get_s3_client()
+
+    def signing_window(self) -> datetime:
+        """Start of the current URL signing window.
+
+        Batches signed at the window start yield the same URLs for every
+        request in the window, and those URLs stay valid for
+        SIGNED_URL_EXPIRATION - SIGNED_URL_WINDOW seconds after it ends.
+        """
+        now = int(datetime.now(pytz.UTC).timestamp())
+        return datetime.fromtimestamp(now - now % settings.SIGNED_URL_WINDOW, pytz.UTC)
 
     def get_signed_url(self, file_path: str, display_name: str = None, expiration: int = 3600) -> str:
         """Generate a signed URL with content disposition"""
         try:
-            params = {
-                "Bucket": self.bucket_name,
-                "Key": file_path,
-            }
-
-            if display_name:
-                encoded_display_name = urllib.parse.quote(display_name, encoding="utf-8")
-                params["ResponseContentDisposition"] = f"attachment; filename={encoded_display_name}"
-
-            url = self.s3_client.generate_presigned_url(
-                ClientMethod="get_object",
-                Params=params,
-                ExpiresIn=expiration
-            )
-
-            if not url:
-                raise HTTPException(status_code=500, detail="Failed to generate signed URL")
+            return self.signer.presign_get(file_path, display_name=display_name, expiration=expiration)
+        except Exception as e:
+            raise HTTPException(status_code=500, detail=f"Failed to generate signed URL: {str(e)}")
 
-            url = url.replace(
-                settings.S3_ENDPOINT,
-                f"https://{self.project_id}.supabase.co/storage/v1/s3"
-            )
+    def get_signed_urls(
+        self,
+        file_paths: Sequence[Optional[str]],
+        expiration: Optional[int] = None,
+        signed_at: Optional[datetime] = None
+    ) -> List[Optional[str]]:
+        """Generate signed URLs for a batch of paths, using each basename as display name.
 
-            return url
+        Empty entries are passed through as ``None`` so callers can sign
+        optional columns positionally. ``signed_at`` defaults to the start
+        of the current signing window.
+        """
+        try:
+            if signed_at is None:
+                signed_at = self.signing_window()
+            present = [path for path in file_paths if path]
+            signed = iter(self.signer.presign_get_many(
+                present,
+                [os.path.basename(path) for path in present],
+                expiration=expiration or settings.SIGNED_URL_EXPIRATION,
+                now=signed_at
+            ))
+            return [next(signed) if path else None for path in file_paths]
         except Exception as e:
             raise HTTPException(status_code=500, detail=f"Failed to generate signed URL: {str(e)}")
 
@@ -1,13 +1,35 @@
-import stripe
+import asyncio
+from collections import OrderedDict
+from typing import Dict
 from app.core.config import get_settings
+from app.core.clients import clients
+from app.core.tracing import span
 from fastapi import HTTPException, status
 
 settings = get_settings()
-stripe.api_key = settings.STRIPE_SECRET_KEY
+
+def is_final(session) -> bool:
+    """Whether a checkout session can no longer change.
+
+    A completed session may still be ``unpaid`` while an asynchronous
+    payment method settles, so only paid or expired sessions are final.
+    """
+    return session.get("status") == "expired" or (
+        session.get("status") == "complete"
+        and session.get("payment_status") in ("paid", "no_payment_required")
+    )
 
 class StripeService:
+    def __init__(self, cache_size: int = 1000):
+        self.cache_size = cache_size
+        # Sessions that can no longer change, most recently used last
+        self._final: "OrderedDict[str, dict]" = OrderedDict()
+        # One upstream retrieve per session id at a time
+        self._in_flight: Dict[str, asyncio.Future] = {}
+
     async def verify_payment_signature(self, payload: bytes, sig_header: str) -> dict:
         """Verify Stripe webhook signature"""
+        stripe = clients.get("stripe")
         try:
             event = stripe.Webhook.construct_event(
                 payload,
@@ -27,14 +49,41 @@ class StripeService:
             )
     
     async def get_session(self, session_id: str) -> dict:
-        """Get Stripe session details"""
-        try:
-            session = stripe.checkout.Session.retrieve(session_id)
+        """Get Stripe session details.
+
+        Concurrent calls for the same session share one upstream request,
+        and final sessions are answered from memory. The returned session is
+        shared between callers and must not be modified.
+        """
+        session = self._final.get(session_id)
+        if session is not None:
+            self._final.move_to_end(session_id)
             return session
+
+        pending = self._in_flight.get(session_id)
+        if pending is None:
+            pending = asyncio.ensure_future(self._retrieve(session_id))
+            self._in_flight[session_id] = pending
+            pending.add_done_callback(lambda done: self._finish(session_id, done))
+        # A caller that disconnects must not cancel the others' request
+        return await asyncio.shield(pending)
+
+    def _finish(self, session_id: str, done: asyncio.Future) -> None:
+        self._in_flight.pop(session_id, None)
+        if not done.cancelled() and done.exception() is None and is_final(done.result()):
+            self._final[session_id] = done.result()
+            if len(self._final) > self.cache_size:
+                self._final.popitem(last=False)
+
+    async def _retrieve(self, session_id: str) -> dict:
+        stripe = clients.get("stripe")
+        try:
+            with span("Stripe checkout.Session.retrieve", session_id=session_id):
+                return await asyncio.to_thread(stripe.checkout.Session.retrieve, session_id)
         except stripe.error.StripeError as e:
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
                 detail=str(e)
             )
 
-stripe_service = StripeService() 
\ No newline at end of file
+stripe_service = StripeService(settings.STRIPE_SESSION_CACHE_SIZE) 
\ No newline at end of file
@@ -1,8 +1,10 @@
 from sqlalchemy.orm import Session
+from datetime import datetime
+from uuid import UUID
+from app.models.generation import Generation
 from app.models.token_history import TokenHistory, TokenActionType
 from typing import Dict, Optional, List
 from app.services.storage_service import storage_service
-import os
 
 class TokenHistoryService:
     def create_token_history(
@@ -13,21 +15,20 @@ class TokenHistoryService:
         action_type: TokenActionType,
         description: str,
         extra_data: Optional[Dict] = None,
-        generation_url: Optional[str] = None
+        generation_id: Optional[UUID] = None,
+        subscription_id: Optional[str] = None,
+        amount_paid: Optional[float] = None
     ) -> TokenHistory:
         """Create a new token history record"""
-        if extra_data is None:
-            extra_data = {}
-            
-        if generation_url:
-            extra_data["generation_url"] = generation_url
-            
         token_history = TokenHistory(
             user_id=user_id,
             tokens=tokens,
             action_type=action_type,
             description=description,
-            extra_data=extra_data
+            extra_data=extra_data or {},
+            generation_id=generation_id,
+            subscription_id=subscription_id,
+            amount_paid=amount_paid
         )
         
         db.add(token_history)
@@ -41,25 +42,71 @@ class TokenHistoryService:
         db: Session,
         user_id: int,
         skip: int = 0,
-        limit: int = 100
-    ) -> List[TokenHistory]:
-        """Get token history for a user with signed URLs"""
-        histories = db.query(TokenHistory).filter(
+        limit: int = 100,
+        signed_at: Optional[datetime] = None,
+        legacy_extra_data: bool = False
+    ) -> List[Dict]:
+        """Get token history rows for a user with the generation's prompt and signed URL.
+
+        With ``legacy_extra_data`` the signed URL and prompt are also copied
+        into ``extra_data``, where clients read them before they became
+        top-level fields (see TOKEN_HISTORY_LEGACY_EXTRA_DATA).
+        """
+        rows = db.query(
+            TokenHistory.id,
+            TokenHistory.user_id,
+            TokenHistory.tokens,
+            TokenHistory.action_type,
+            TokenHistory.description,
+            TokenHistory.extra_data,
+            TokenHistory.generation_id,
+            TokenHistory.subscription_id,
+            TokenHistory.amount_paid,
+            TokenHistory.created_at,
+            TokenHistory.updated_at,
+            Generation.url.label("generation_url"),
+            Generation.prompt
+        ).outerjoin(
+            Generation, Generation.id == TokenHistory.generation_id
+        ).filter(
             TokenHistory.user_id == user_id
         ).order_by(
             TokenHistory.created_at.desc()
         ).offset(skip).limit(limit).all()
 
-        # Add signed URLs for generation URLs in extra_data
-        for history in histories:
-            if "generation_url" in history.extra_data:
-                file_path = history.extra_data["generation_url"]
-                filename = os.path.basename(file_path)
-                history.extra_data["generation_url"] = storage_service.get_signed_url(
-                    file_path=file_path,
-                    display_name=filename
-                )
+        # Sign all generation URLs in one batch
+        if not legacy_extra_data:
+            signed_urls = storage_service.get_signed_urls(
+                [row.generation_url for row in rows], signed_at=signed_at
+            )
+            return [
+                {**row._mapping, "generation_url": url}
+                for row, url in zip(rows, signed_urls)
+            ]
+
+        # Rows whose generation is gone still carry the URL in extra_data
+        signed_urls = storage_service.get_signed_urls(
+            [row.generation_url or row.extra_data.get("generation_url") for row in rows],
+            signed_at=signed_at
+        )
+        return [
+            {
+                **row._mapping,
+                "generation_url": url,
+                "extra_data": self._legacy_extra_data(row.extra_data, url, row.prompt)
+            }
+            for row, url in zip(rows, signed_urls)
+        ]
 
-        return histories
+    def _legacy_extra_data(self, extra_data: Dict, generation_url: Optional[str], prompt: Optional[str]) -> Dict:
+        """extra_data with the keys clients read before they became top-level fields"""
+        if generation_url is None and prompt is None:
+            return extra_data
+        legacy = dict(extra_data)
+        if generation_url is not None:
+            legacy["generation_url"] = generation_url
+        if prompt is not None:
+            legacy["prompt"] = prompt
+        return legacy
 
-token_history_service = TokenHistoryService() 
\ No newline at end of file
+token_history_service = TokenHistoryService()
@@ -0,0 +1,105 @@
+import hashlib
+import hmac
+import urllib.parse
+from datetime import datetime
+from functools import lru_cache
+from typing import List, Optional, Sequence
+
+import pytz
+
+ALGORITHM = "AWS4-HMAC-SHA256"
+UNSIGNED_PAYLOAD = "UNSIGNED-PAYLOAD"
+
+
+def _quote(value: str, safe: str = "-_.~") -> str:
+    return urllib.parse.quote(value, safe=safe)
+
+
+@lru_cache(maxsize=32)
+def _signing_key(secret_key: str, date_stamp: str, region: str, service: str) -> bytes:
+    """Derive the SigV4 signing key; it only changes once per day/region/service."""
+    key = hmac.new(f"AWS4{secret_key}".encode("utf-8"), date_stamp.encode("utf-8"), hashlib.sha256).digest()
+    key = hmac.new(key, region.encode("utf-8"), hashlib.sha256).digest()
+    key = hmac.new(key, service.encode("utf-8"), hashlib.sha256).digest()
+    return hmac.new(key, b"aws4_request", hashlib.sha256).digest()
+
+
+class SigV4QuerySigner:
+    """Local SigV4 query-string signer for path-style S3 GET URLs.
+
+    Produces the same URLs as boto3's ``generate_presigned_url`` for
+    ``get_object`` without going through endpoint resolution and the
+    event system, and signs directly against the public host.
+    """
+
+    def __init__(
+        self,
+        access_key: str,
+        secret_key: str,
+        region: str,
+        endpoint: str,
+        bucket: str,
+        service: str = "s3"
+    ):
+        parsed = urllib.parse.urlsplit(endpoint)
+        self.access_key = access_key
+        self.secret_key = secret_key
+        self.region = region
+        self.service = service
+        self.host = parsed.netloc
+        self.origin = f"{parsed.scheme}://{parsed.netloc}"
+        self.bucket_path = f"{parsed.path.rstrip('/')}/{_quote(bucket)}/"
+
+    def presign_get(
+        self,
+        file_path: str,
+        display_name: Optional[str] = None,
+        expiration: int = 3600,
+        now: Optional[datetime] = None
+    ) -> str:
+        """Sign a single GET URL"""
+        return self.presign_get_many([file_path], [display_name], expiration, now)[0]
+
+    def presign_get_many(
+        self,
+        file_paths: Sequence[str],
+        display_names: Optional[Sequence[Optional[str]]] = None,
+        expiration: int = 3600,
+        now: Optional[datetime] = None
+    ) -> List[str]:
+        """Sign GET URLs for a batch of keys sharing one timestamp and signing key"""
+        now = (now or datetime.now(pytz.UTC)).astimezone(pytz.UTC)
+        amz_date = now.strftime("%Y%m%dT%H%M%SZ")
+        date_stamp = amz_date[:8]
+        scope = f"{date_stamp}/{self.region}/{self.service}/aws4_request"
+        signing_key = _signing_key(self.secret_key, date_stamp, self.region, self.service)
+
+        # Everything except the key path and the disposition is shared by the
+        # whole batch, so build it once.
+        query_prefix = (
+            f"X-Amz-Algorithm={ALGORITHM}"
+            f"&X-Amz-Credential={_quote(f'{self.access_key}/{scope}')}"
+            f"&X-Amz-Date={amz_date}"
+            f"&X-Amz-Expires={int(expiration)}"
+            f"&X-Amz-SignedHeaders=host"
+        )
+        request_suffix = f"\nhost:{self.host}\n\nhost\n{UNSIGNED_PAYLOAD}"
+        sts_prefix = f"{ALGORITHM}\n{amz_date}\n{scope}\n"
+
+        if display_names is None:
+            display_names = [None] * len(file_paths)
+
+        urls = []
+        for file_path, display_name in zip(file_paths, display_names):
+            canonical_uri = self.bucket_path + _quote(file_path, safe="/~")
+            query = query_prefix
+            if display_name:
+                disposition = f"attachment; filename={urllib.parse.quote(display_name, encoding='utf-8')}"
+                query = f"{query}&response-content-disposition={_quote(disposition)}"
+
+            canonical_request = f"GET\n{canonical_uri}\n{query}{request_suffix}"
+            string_to_sign = sts_prefix + hashlib.sha256(canonical_request.encode("utf-8")).hexdigest()
+            signature = hmac.new(signing_key, string_to_sign.encode("utf-8"), hashlib.sha256).hexdigest()
+            urls.append(f"{self.origin}{canonical_uri}?{query}&X-Amz-Signature={signature}")
+
+        return urls
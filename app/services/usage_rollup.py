@@ -0,0 +1,207 @@
+from datetime import date, datetime, timedelta
+from typing import List, Set, Tuple
+import pytz
+from sqlalchemy import Column, func, select
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.engine import Row
+from sqlalchemy.orm import Session
+from app.models.generation import Generation
+from app.models.subscription import Subscription
+from app.models.token_history import TokenHistory
+from app.models.usage_rollup import DailyTotal, RollupWatermark, TokenUsageDaily, UsageDailyTotal
+
+def _utc_day(column: Column):
+    return func.date(func.timezone("UTC", column))
+
+class UsageRollupService:
+    """Daily usage and revenue aggregates, maintained incrementally.
+
+    Each run folds the source rows written since the table's watermark into
+    the rollups and advances the watermark in the same transaction, so a row
+    is counted exactly once and dashboards never scan token_history or
+    subscriptions.
+    """
+
+    def _claim(self, db: Session, name: str, model, lag_seconds: int) -> Tuple[int, int]:
+        """Lock the watermark and return the id range (floor, high_water) to process.
+
+        Rows newer than ``lag_seconds`` are left for the next run so that a
+        row whose id was allocated by a still-open transaction is never skipped.
+        """
+        db.execute(insert(RollupWatermark).values(name=name, last_id=0).on_conflict_do_nothing())
+        floor = db.execute(
+            select(RollupWatermark.last_id).where(RollupWatermark.name == name).with_for_update()
+        ).scalar_one()
+        cutoff = datetime.now(pytz.UTC) - timedelta(seconds=lag_seconds)
+        high_water = db.execute(select(func.coalesce(
+            select(func.min(model.id))
+            .where(model.id > floor, model.created_at >= cutoff)
+            .scalar_subquery(),
+            select(func.max(model.id) + 1)
+            .where(model.id > floor)
+            .scalar_subquery()
+        ))).scalar_one()
+        return floor, high_water if high_water is not None else floor + 1
+
+    def _advance(self, db: Session, name: str, high_water: int) -> None:
+        db.query(RollupWatermark).filter(RollupWatermark.name == name).update(
+            {"last_id": high_water - 1, "updated_at": func.now()}
+        )
+
+    def roll_up_usage(self, db: Session, lag_seconds: int = 300) -> int:
+        """Fold new token consumption into the usage rollups; returns the days touched"""
+        floor, high_water = self._claim(db, "token_history", TokenHistory, lag_seconds)
+        day = _utc_day(TokenHistory.created_at).label("day")
+        generation_type = func.coalesce(Generation.type, "other").label("generation_type")
+        new_usage = (
+            select(
+                TokenHistory.user_id,
+                day,
+                generation_type,
+                (-func.sum(TokenHistory.tokens)).label("tokens_consumed"),
+                func.count().label("generations")
+            )
+            .select_from(TokenHistory)
+            .outerjoin(Generation, Generation.id == TokenHistory.generation_id)
+            .where(TokenHistory.id > floor, TokenHistory.id < high_water, TokenHistory.tokens < 0)
+            .group_by(TokenHistory.user_id, day, generation_type)
+        )
+        upsert = insert(TokenUsageDaily).from_select(
+            ["user_id", "day", "generation_type", "tokens_consumed", "generations"], new_usage
+        )
+        days: Set[date] = set(db.execute(
+            upsert.on_conflict_do_update(
+                index_elements=["user_id", "day", "generation_type"],
+                set_={
+                    "tokens_consumed": TokenUsageDaily.tokens_consumed + upsert.excluded.tokens_consumed,
+                    "generations": TokenUsageDaily.generations + upsert.excluded.generations,
+                    "updated_at": func.now()
+                }
+            ).returning(TokenUsageDaily.day)
+        ).scalars())
+
+        if days:
+            # Global totals are recomputed for the touched days from the
+            # per-user rows, which also yields distinct active users
+            totals = insert(UsageDailyTotal).from_select(
+                ["day", "generation_type", "tokens_consumed", "generations", "active_users"],
+                select(
+                    TokenUsageDaily.day,
+                    TokenUsageDaily.generation_type,
+                    func.sum(TokenUsageDaily.tokens_consumed),
+                    func.sum(TokenUsageDaily.generations),
+                    func.count()
+                )
+                .where(TokenUsageDaily.day.in_(days))
+                .group_by(TokenUsageDaily.day, TokenUsageDaily.generation_type)
+            )
+            db.execute(totals.on_conflict_do_update(
+                index_elements=["day", "generation_type"],
+                set_={
+                    "tokens_consumed": totals.excluded.tokens_consumed,
+                    "generations": totals.excluded.generations,
+                    "active_users": totals.excluded.active_users,
+                    "updated_at": func.now()
+                }
+            ))
+            daily = insert(DailyTotal).from_select(
+                ["day", "tokens_consumed", "active_users"],
+                select(
+                    TokenUsageDaily.day,
+                    func.sum(TokenUsageDaily.tokens_consumed),
+                    func.count(func.distinct(TokenUsageDaily.user_id))
+                )
+                .where(TokenUsageDaily.day.in_(days))
+                .group_by(TokenUsageDaily.day)
+            )
+            db.execute(daily.on_conflict_do_update(
+                index_elements=["day"],
+                set_={
+                    "tokens_consumed": daily.excluded.tokens_consumed,
+                    "active_users": daily.excluded.active_users,
+                    "updated_at": func.now()
+                }
+            ))
+
+        self._advance(db, "token_history", high_water)
+        db.commit()
+        return len(days)
+
+    def roll_up_revenue(self, db: Session, lag_seconds: int = 300) -> int:
+        """Fold new paid subscriptions into the daily totals; returns the days touched"""
+        floor, high_water = self._claim(db, "subscriptions", Subscription, lag_seconds)
+        day = _utc_day(Subscription.created_at).label("day")
+        upsert = insert(DailyTotal).from_select(
+            ["day", "revenue", "purchases", "tokens_sold"],
+            select(
+                day,
+                func.sum(Subscription.amount_paid),
+                func.count(),
+                func.sum(Subscription.tokens_purchased)
+            )
+            .where(
+                Subscription.id > floor,
+                Subscription.id < high_water,
+                Subscription.payment_status == "paid"
+            )
+            .group_by(day)
+        )
+        result = db.execute(upsert.on_conflict_do_update(
+            index_elements=["day"],
+            set_={
+                "revenue": DailyTotal.revenue + upsert.excluded.revenue,
+                "purchases": DailyTotal.purchases + upsert.excluded.purchases,
+                "tokens_sold": DailyTotal.tokens_sold + upsert.excluded.tokens_sold,
+                "updated_at": func.now()
+            }
+        ))
+        self._advance(db, "subscriptions", high_water)
+        db.commit()
+        return result.rowcount
+
+    def _since(self, days: int) -> date:
+        return datetime.now(pytz.UTC).date() - timedelta(days=days - 1)
+
+    def user_usage(self, db: Session, user_id: int, days: int) -> List[Row]:
+        """Daily consumption of one user by generation type over the last ``days`` days"""
+        return db.execute(
+            select(
+                TokenUsageDaily.day,
+                TokenUsageDaily.generation_type,
+                TokenUsageDaily.tokens_consumed,
+                TokenUsageDaily.generations
+            )
+            .where(TokenUsageDaily.user_id == user_id, TokenUsageDaily.day >= self._since(days))
+            .order_by(TokenUsageDaily.day, TokenUsageDaily.generation_type)
+        ).all()
+
+    def global_usage(self, db: Session, days: int) -> List[Row]:
+        """Daily consumption of all users by generation type over the last ``days`` days"""
+        return db.execute(
+            select(
+                UsageDailyTotal.day,
+                UsageDailyTotal.generation_type,
+                UsageDailyTotal.tokens_consumed,
+                UsageDailyTotal.generations,
+                UsageDailyTotal.active_users
+            )
+            .where(UsageDailyTotal.day >= self._since(days))
+            .order_by(UsageDailyTotal.day, UsageDailyTotal.generation_type)
+        ).all()
+
+    def daily_totals(self, db: Session, days: int) -> List[Row]:
+        """Active users, consumption and revenue per day over the last ``days`` days"""
+        return db.execute(
+            select(
+                DailyTotal.day,
+                DailyTotal.active_users,
+                DailyTotal.tokens_consumed,
+                DailyTotal.revenue,
+                DailyTotal.purchases,
+                DailyTotal.tokens_sold
+            )
+            .where(DailyTotal.day >= self._since(days))
+            .order_by(DailyTotal.day)
+        ).all()
+
+usage_rollup_service = UsageRollupService()
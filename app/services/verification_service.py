@@ -0,0 +1,72 @@
+import hashlib
+import secrets
+from datetime import datetime, timedelta
+from typing import Optional, Tuple
+import pytz
+from sqlalchemy import delete, select
+from sqlalchemy.orm import Session, joinedload
+from app.core.config import get_settings
+from app.models.user_verification import UserVerification
+
+settings = get_settings()
+
+def hash_token(token: str) -> bytes:
+    """Fixed-length digest stored and indexed in place of a secret token"""
+    return hashlib.sha256(token.encode("utf-8")).digest()
+
+class VerificationService:
+    """Email verification tokens.
+
+    The emailed token is a short random secret; only its SHA-256 digest is
+    stored, so lookups are one probe on a compact unique index and a leaked
+    table does not expose usable links.
+    """
+
+    def new_token(self) -> Tuple[str, bytes, datetime]:
+        """A fresh token to email, the digest to store and its expiry"""
+        token = secrets.token_urlsafe(24)
+        expires_at = datetime.now(pytz.UTC) + timedelta(hours=settings.VERIFICATION_TOKEN_EXPIRE_HOURS)
+        return token, hash_token(token), expires_at
+
+    def issue(self, db: Session, user_id: int, verification: Optional[UserVerification] = None) -> str:
+        """Create or refresh a user's verification record; returns the token to email.
+
+        The caller commits.
+        """
+        token, token_hash, expires_at = self.new_token()
+        if verification is None:
+            db.add(UserVerification(user_id=user_id, token_hash=token_hash, expires_at=expires_at))
+        else:
+            verification.token_hash = token_hash
+            verification.expires_at = expires_at
+        return token
+
+    def find(self, db: Session, token: str) -> Optional[UserVerification]:
+        """Verification record (with its user) for an emailed token"""
+        return db.execute(
+            select(UserVerification)
+            .options(joinedload(UserVerification.user))
+            .where(UserVerification.token_hash == hash_token(token))
+        ).scalar_one_or_none()
+
+    def purge_expired(self, db: Session, batch_size: int = 1000) -> int:
+        """Delete expired, unverified records in batches; returns the number deleted"""
+        deleted = 0
+        while True:
+            batch = (
+                select(UserVerification.id)
+                .where(~UserVerification.is_verified, UserVerification.expires_at < datetime.now(pytz.UTC))
+                .limit(batch_size)
+                .scalar_subquery()
+            )
+            result = db.execute(
+                delete(UserVerification)
+                .where(UserVerification.id.in_(batch))
+                .execution_options(synchronize_session=False)
+            )
+            db.commit()
+            deleted += result.rowcount
+            if result.rowcount < batch_size:
+                return deleted
+
+verification_service = VerificationService()
@@ -0,0 +1,73 @@
+"""Measure per-request access token verification: python-jose vs the cache.
+
+Usage:
+    python scripts/bench_auth.py [requests] [sessions]
+
+Signs ``sessions`` distinct access tokens the way /auth/login does and
+verifies them round-robin ``requests`` times, once with ``jwt.decode`` on
+every request (the old path) and once through VerifiedTokenCache, reporting
+microseconds of auth overhead per request. Runs without a database.
+"""
+import os
+import sys
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bench_env import apply_dummy_env
+
+apply_dummy_env()
+
+from jose import jwt
+
+from app.api.v1.endpoints.auth import create_access_token
+from app.core.config import get_settings
+from app.core.jwt_cache import VerifiedTokenCache
+
+settings = get_settings()
+
+
+def measure(label, verify, tokens, requests):
+    for token in tokens:
+        verify(token)  # warm up (and fill the cache)
+    start = time.perf_counter()
+    for i in range(requests):
+        claims = verify(tokens[i % len(tokens)])
+    elapsed = time.perf_counter() - start
+    assert claims["sub"]
+    per_request = elapsed / requests * 1e6
+    print(f"{label:<32} {per_request:8.2f} us/request  {requests / elapsed:10.0f} req/s")
+    return per_request
+
+
+def main():
+    requests = int(sys.argv[1]) if len(sys.argv) > 1 else 50000
+    sessions = int(sys.argv[2]) if len(sys.argv) > 2 else 1000
+    tokens = [create_access_token({"sub": str(user_id)}) for user_id in range(1, sessions + 1)]
+    algorithms = [settings.ALGORITHM]
+    print(f"{requests} requests over {sessions} sessions, {settings.ALGORITHM}, token {len(tokens[0])} bytes")
+
+    uncached = measure(
+        "jwt.decode every request",
+        lambda token: jwt.decode(token, settings.JWT_SECRET, algorithms=algorithms),
+        tokens, requests
+    )
+    cache = VerifiedTokenCache(maxsize=sessions)
+    cached = measure(
+        "verified-claims cache",
+        lambda token: cache.decode(token, settings.JWT_SECRET, algorithms),
+        tokens, requests
+    )
+    # Cache smaller than the working set: every request misses and evicts
+    small = VerifiedTokenCache(maxsize=max(1, sessions // 2))
+    thrashing = measure(
+        "cache at half the sessions",
+        lambda token: small.decode(token, settings.JWT_SECRET, algorithms),
+        tokens, requests
+    )
+    print(f"speedup {uncached / cached:.1f}x; hit rate {cache.hits / (cache.hits + cache.misses):.1%}; "
+          f"thrashing cache costs {thrashing - uncached:+.2f} us/request")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,122 @@
+"""Fault-injection harness for the provider circuit breaker and hedged polls.
+
+Usage:
+    python scripts/bench_circuit_breaker.py
+
+Drives a local fake provider (blocking calls with configurable latency,
+outage window and slow tail) with an open-loop request stream and reports
+latency percentiles:
+
+* outage: the provider hangs until the client timeout for part of the run;
+  compares calls made directly against calls made through CircuitBreaker.
+* slow tail: a status poll that occasionally stalls; compares plain polls
+  against hedged polls.
+
+Times are scaled down (milliseconds instead of seconds) so it runs quickly.
+"""
+import asyncio
+import os
+import random
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bench_env import apply_dummy_env
+
+apply_dummy_env()
+
+from app.core.circuit_breaker import CircuitBreaker, CircuitOpenError
+
+
+class FakeProviderTimeout(TimeoutError):
+    pass
+
+
+class FakeProvider:
+    """Blocking stand-in for an SDK call"""
+
+    def __init__(self, latency=0.02, timeout=0.5, outage=None, tail_rate=0.0, tail_latency=0.0, seed=7):
+        self.latency = latency
+        self.timeout = timeout
+        self.outage = outage  # (start, end) seconds after start()
+        self.tail_rate = tail_rate
+        self.tail_latency = tail_latency
+        self.random = random.Random(seed)
+        self.started = time.monotonic()
+        self.calls = 0
+
+    def start(self):
+        self.started = time.monotonic()
+
+    def __call__(self):
+        self.calls += 1
+        elapsed = time.monotonic() - self.started
+        if self.outage and self.outage[0] <= elapsed < self.outage[1]:
+            time.sleep(self.timeout)
+            raise FakeProviderTimeout("provider timed out")
+        if self.random.random() < self.tail_rate:
+            time.sleep(self.tail_latency)
+        else:
+            time.sleep(self.latency)
+        return "ok"
+
+
+def percentiles(samples):
+    ordered = sorted(samples)
+    pick = lambda q: ordered[min(len(ordered) - 1, int(q * len(ordered)))] * 1000
+    return f"p50 {pick(0.50):7.1f} ms  p95 {pick(0.95):7.1f} ms  p99 {pick(0.99):7.1f} ms  max {ordered[-1] * 1000:7.1f} ms"
+
+
+async def drive(call, requests, interval):
+    """Open-loop load: start a request every ``interval`` seconds"""
+    latencies, outcomes = [], {"ok": 0, "failed": 0, "fast_failed": 0}
+
+    async def one():
+        start = time.monotonic()
+        try:
+            await call()
+            outcomes["ok"] += 1
+        except CircuitOpenError:
+            outcomes["fast_failed"] += 1
+        except Exception:
+            outcomes["failed"] += 1
+        latencies.append(time.monotonic() - start)
+
+    tasks = []
+    for _ in range(requests):
+        tasks.append(asyncio.create_task(one()))
+        await asyncio.sleep(interval)
+    await asyncio.gather(*tasks)
+    return latencies, outcomes
+
+
+async def outage_scenario():
+    print("Outage (provider hangs until timeout between 0.5s and 2.0s)")
+    for label, use_breaker in (("direct", False), ("breaker", True)):
+        provider = FakeProvider(outage=(0.5, 2.0))
+        breaker = CircuitBreaker("fake", failure_rate=0.5, min_calls=5, window_seconds=1.0, open_seconds=0.3)
+        call = (lambda: breaker.call(provider)) if use_breaker else (lambda: asyncio.to_thread(provider))
+        provider.start()
+        latencies, outcomes = await drive(call, requests=300, interval=0.01)
+        print(f"  {label:<8} {percentiles(latencies)}  provider calls {provider.calls:4d}  {outcomes}")
+
+
+async def tail_scenario():
+    print("Slow tail (5% of polls stall for 300ms)")
+    for label, delay in (("plain", 0), ("hedged", 0.05)):
+        provider = FakeProvider(latency=0.01, tail_rate=0.05, tail_latency=0.3)
+        breaker = CircuitBreaker("fake", min_calls=1000)
+        latencies, outcomes = await drive(lambda: breaker.call_hedged(delay, provider), requests=300, interval=0.005)
+        print(f"  {label:<8} {percentiles(latencies)}  provider calls {provider.calls:4d}")
+
+
+async def main():
+    asyncio.get_running_loop().set_default_executor(ThreadPoolExecutor(max_workers=64))
+    await outage_scenario()
+    await tail_scenario()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
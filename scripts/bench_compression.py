@@ -0,0 +1,104 @@
+"""Measure response compression on history pages: bytes on the wire and CPU.
+
+Usage:
+    python scripts/bench_compression.py [rounds]
+
+Builds token history pages of several sizes the way the endpoint does
+(ListSerializer over column rows) with real, distinct SigV4 signed URLs, then
+reports the body size and CPU time per response for identity, gzip and
+brotli at the configured level, plus the full middleware round trip.
+Runs without a database or network.
+"""
+import asyncio
+import os
+import sys
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bench_env import apply_dummy_env
+
+apply_dummy_env()
+
+from bench_serialization import token_history_data
+
+from app.core.compression import CompressionMiddleware, brotli, make_encoder
+from app.core.config import get_settings
+from app.core.serialization import ListSerializer
+from app.schemas.token_history import TokenHistoryResponse
+from app.services.url_signer import SigV4QuerySigner
+
+settings = get_settings()
+PAGE_SIZES = (10, 50, 100, 500, 1000)
+
+
+def page_body(rows):
+    signer = SigV4QuerySigner("AKIDEXAMPLE", "secret", "ap-southeast-1", "https://project.supabase.co/storage/v1/s3", "media")
+    keys = [f"generated/2/{1739000000 + i}.{i:06d}.png" for i in range(rows)]
+    urls = signer.presign_get_many(keys, [os.path.basename(key) for key in keys], expiration=3600)
+    data = token_history_data(rows)
+    for item, url in zip(data, urls):
+        item["generation_url"] = url
+    return ListSerializer(TokenHistoryResponse).response(data).body
+
+
+def cpu_per_call(fn, rounds):
+    fn()  # warm up
+    start = time.process_time()
+    for _ in range(rounds):
+        result = fn()
+    return (time.process_time() - start) / rounds * 1e3, result
+
+
+def encode(encoding, body):
+    encoder = make_encoder(encoding, settings.COMPRESSION_GZIP_LEVEL, settings.COMPRESSION_BROTLI_QUALITY)
+    return encoder.compress(body) + encoder.finish()
+
+
+def through_middleware(body, accept_encoding):
+    async def endpoint(scope, receive, send):
+        await send({"type": "http.response.start", "status": 200, "headers": [
+            (b"content-type", b"application/json"), (b"content-length", str(len(body)).encode())
+        ]})
+        await send({"type": "http.response.body", "body": body})
+
+    middleware = CompressionMiddleware(endpoint, brotli_quality=settings.COMPRESSION_BROTLI_QUALITY,
+                                       gzip_level=settings.COMPRESSION_GZIP_LEVEL)
+    scope = {"type": "http", "headers": [(b"accept-encoding", accept_encoding)]}
+    sent = []
+
+    async def send(message):
+        sent.append(message)
+
+    async def receive():
+        return {"type": "http.request"}
+
+    def run():
+        sent.clear()
+        asyncio.run(middleware(scope, receive, send))
+        return sent[-1]["body"]
+    return run
+
+
+def main():
+    rounds = int(sys.argv[1]) if len(sys.argv) > 1 else 50
+    encodings = ["gzip"] + (["br"] if brotli is not None else [])
+    print(f"gzip level {settings.COMPRESSION_GZIP_LEVEL}, brotli quality {settings.COMPRESSION_BROTLI_QUALITY}, {rounds} rounds")
+    print(f"{'rows':>5} {'identity':>10} " + " ".join(f"{name + ' bytes':>11} {'ratio':>6} {'cpu ms':>7}" for name in encodings))
+    for rows in PAGE_SIZES:
+        body = page_body(rows)
+        line = f"{rows:5d} {len(body):10d} "
+        for encoding in encodings:
+            ms, compressed = cpu_per_call(lambda: encode(encoding, body), rounds)
+            line += f"{len(compressed):11d} {len(body) / len(compressed):5.1f}x {ms:7.2f} "
+        print(line)
+
+    print("Middleware round trip, 1000 rows (includes event loop setup per call)")
+    body = page_body(1000)
+    for encoding in ["identity"] + encodings:
+        ms, sent = cpu_per_call(through_middleware(body, encoding.encode()), rounds)
+        print(f"  {encoding:<8} {len(sent):9d} bytes {ms:7.2f} cpu ms")
+
+
+if __name__ == "__main__":
+    main()
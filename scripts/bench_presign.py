@@ -0,0 +1,80 @@
+"""Benchmark local SigV4 presigning against boto3's generate_presigned_url.
+
+Usage:
+    python scripts/bench_presign.py [rows] [rounds]
+
+Runs without network access or application settings; credentials and
+endpoint are dummies since presigning is pure computation.
+"""
+import os
+import sys
+import time
+import urllib.parse
+
+import boto3
+from botocore.config import Config
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.services.url_signer import SigV4QuerySigner
+
+ENDPOINT = "https://project.supabase.co/storage/v1/s3"
+BUCKET = "media"
+REGION = "ap-southeast-1"
+
+
+def boto3_path(client, keys):
+    urls = []
+    for key in keys:
+        filename = urllib.parse.quote(os.path.basename(key), encoding="utf-8")
+        url = client.generate_presigned_url(
+            ClientMethod="get_object",
+            Params={
+                "Bucket": BUCKET,
+                "Key": key,
+                "ResponseContentDisposition": f"attachment; filename={filename}"
+            },
+            ExpiresIn=3600
+        )
+        urls.append(url)
+    return urls
+
+
+def local_path(signer, keys):
+    return signer.presign_get_many(keys, [os.path.basename(key) for key in keys], expiration=3600)
+
+
+def measure(label, fn, rows, rounds):
+    fn()  # warm up
+    start = time.perf_counter()
+    for _ in range(rounds):
+        fn()
+    elapsed = time.perf_counter() - start
+    per_url = elapsed / (rows * rounds) * 1e6
+    print(f"{label:<8} {per_url:8.2f} us/url  {elapsed / rounds * 1e3:8.2f} ms/page")
+    return per_url
+
+
+def main():
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 500
+    rounds = int(sys.argv[2]) if len(sys.argv) > 2 else 20
+    keys = [f"generated/{i % 50}/{1739000000 + i}.123456.png" for i in range(rows)]
+
+    client = boto3.client(
+        "s3",
+        aws_access_key_id="AKIDEXAMPLE",
+        aws_secret_access_key="secret",
+        region_name=REGION,
+        endpoint_url=ENDPOINT,
+        config=Config(signature_version="s3v4")
+    )
+    signer = SigV4QuerySigner("AKIDEXAMPLE", "secret", REGION, ENDPOINT, BUCKET)
+
+    print(f"Signing {rows} URLs x {rounds} rounds")
+    slow = measure("boto3", lambda: boto3_path(client, keys), rows, rounds)
+    fast = measure("local", lambda: local_path(signer, keys), rows, rounds)
+    print(f"speedup  {slow / fast:8.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+"""Startup-time regression guard for importing app.main.
+
+Usage:
+    python scripts/bench_startup.py [--runs N] [--budget-ms MS]
+
+Runs ``python -X importtime -c "import app.main"`` in fresh interpreters and
+reports the median cumulative import time. Exits non-zero when the median
+exceeds the budget or when a provider SDK is imported eagerly (provider
+clients are created lazily through app.core.clients).
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+
+from bench_env import DUMMY_ENV
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Provider SDKs that must not be imported while importing app.main
+LAZY_MODULES = ("openai", "runwayml", "stripe", "boto3", "mailjet_rest")
+
+
+
+def run_once(env):
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import app.main"],
+        cwd=ROOT,
+        env=env,
+        capture_output=True,
+        text=True,
+        check=True
+    )
+    modules = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, cumulative, name = line.split("|")
+        cumulative = cumulative.strip()
+        if cumulative.isdigit():
+            modules[name.strip()] = int(cumulative)
+    return modules
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--budget-ms", type=float, default=1500.0)
+    args = parser.parse_args()
+
+    env = {**DUMMY_ENV, **os.environ}
+    samples = []
+    eager = set()
+    for _ in range(args.runs):
+        modules = run_once(env)
+        samples.append(modules["app.main"] / 1000)
+        eager.update(name for name in modules if name in LAZY_MODULES)
+
+    median = statistics.median(samples)
+    print(f"import app.main: median {median:.1f} ms, min {min(samples):.1f} ms over {args.runs} runs")
+
+    failed = False
+    if eager:
+        print(f"FAIL: provider SDKs imported eagerly: {', '.join(sorted(eager))}")
+        failed = True
+    if median > args.budget_ms:
+        print(f"FAIL: median exceeds budget of {args.budget_ms:.0f} ms")
+        failed = True
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
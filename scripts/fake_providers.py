@@ -0,0 +1,247 @@
+"""Local stand-ins for OpenAI, RunwayML, Stripe, Mailjet and S3.
+
+Usage:
+    python scripts/fake_providers.py [--port 9100] [--latency openai=2.0] [--failure-rate runway=0.05]
+
+Serves just enough of each provider's HTTP API for the app's SDK calls,
+with configurable latency (seconds, +/- jitter) and failure rate per
+provider, so load tests cost nothing and are repeatable. Point the app at it
+with the environment from ``provider_env(port)``:
+
+    /openai/v1/images/generations        image generation (returns a /files URL)
+    /runway/v1/image_to_video            creates a task that succeeds after --runway-task-seconds
+    /runway/v1/tasks/{id}                task status
+    /stripe/v1/checkout/sessions/{id}    a paid session; ids look like cs_fake_<user_id>_<anything>
+    /mailjet/v3.1/send                   accepts mail and keeps verification links in an inbox
+    /s3/{bucket}/{key}                   in-memory object store (PUT, GET, HEAD, list)
+    /files/{name}                        generated media downloads
+    /_fake/inbox?email=...               verification tokens sent to an address
+    /_fake/stats                         request counts per provider
+"""
+import argparse
+import asyncio
+import hashlib
+import random
+import re
+import time
+import uuid
+from collections import Counter, defaultdict
+from dataclasses import dataclass
+from datetime import datetime, timezone
+
+import uvicorn
+from starlette.applications import Starlette
+from starlette.requests import Request
+from starlette.responses import JSONResponse, Response
+from starlette.routing import Route
+
+PROVIDERS = ("openai", "runway", "stripe", "mailjet", "s3", "files")
+DEFAULT_LATENCY = {"openai": 1.0, "runway": 0.2, "stripe": 0.15, "mailjet": 0.1, "s3": 0.03, "files": 0.05}
+TOKEN_PATTERN = re.compile(r"verify-email\?token=([A-Za-z0-9_\-.]+)")
+
+
+def provider_env(port: int, host: str = "127.0.0.1") -> dict:
+    """App settings that route every provider call to the fakes"""
+    base = f"http://{host}:{port}"
+    return {
+        "OPENAI_BASE_URL": f"{base}/openai/v1",
+        "RUNWAY_BASE_URL": f"{base}/runway",
+        "STRIPE_API_BASE": f"{base}/stripe",
+        "MAILJET_API_URL": f"{base}/mailjet/",
+        "S3_ENDPOINT": f"{base}/s3",
+    }
+
+
+@dataclass
+class Profile:
+    latency: float
+    jitter: float = 0.3
+    failure_rate: float = 0.0
+
+    async def delay(self, rng: random.Random) -> None:
+        await asyncio.sleep(max(0.0, self.latency * rng.uniform(1 - self.jitter, 1 + self.jitter)))
+
+    def fails(self, rng: random.Random) -> bool:
+        return rng.random() < self.failure_rate
+
+
+class FakeProviders:
+    def __init__(self, profiles, runway_task_seconds=3.0, image_bytes=256 * 1024, video_bytes=2 * 1024 * 1024, seed=7):
+        self.profiles = profiles
+        self.runway_task_seconds = runway_task_seconds
+        self.rng = random.Random(seed)
+        self.media = {"image.png": bytes(image_bytes), "video.mp4": bytes(video_bytes)}
+        self.tasks = {}
+        self.objects = {}
+        self.inbox = defaultdict(list)
+        self.stats = Counter()
+        self.base_url = ""
+
+    async def _enter(self, provider: str):
+        """Apply latency; returns an error response when this call is chosen to fail"""
+        self.stats[provider] += 1
+        profile = self.profiles[provider]
+        await profile.delay(self.rng)
+        if profile.fails(self.rng):
+            self.stats[f"{provider}_failed"] += 1
+            return JSONResponse({"error": {"message": f"fake {provider} failure"}}, status_code=500)
+        return None
+
+    async def openai_images(self, request: Request):
+        error = await self._enter("openai")
+        if error:
+            return error
+        return JSONResponse({"created": int(time.time()), "data": [{"url": f"{self.base_url}/files/image.png"}]})
+
+    async def runway_create(self, request: Request):
+        error = await self._enter("runway")
+        if error:
+            return error
+        task_id = str(uuid.uuid4())
+        self.tasks[task_id] = time.monotonic()
+        return JSONResponse({"id": task_id, "estimatedCost": {"credits": 25}})
+
+    async def runway_task(self, request: Request):
+        error = await self._enter("runway")
+        if error:
+            return error
+        task_id = request.path_params["task_id"]
+        if task_id not in self.tasks:
+            return JSONResponse({"error": "Task not found"}, status_code=404)
+        body = {"id": task_id, "createdAt": datetime.now(timezone.utc).isoformat()}
+        if time.monotonic() - self.tasks[task_id] < self.runway_task_seconds:
+            body.update(status="RUNNING", progress=0.5, estimatedCost={"credits": 25})
+        else:
+            body.update(status="SUCCEEDED", output=[f"{self.base_url}/files/video.mp4"], cost={"credits": 25})
+        return JSONResponse(body)
+
+    async def stripe_session(self, request: Request):
+        error = await self._enter("stripe")
+        if error:
+            return error
+        session_id = request.path_params["session_id"]
+        match = re.match(r"cs_fake_(\d+)_", session_id)
+        if not match:
+            return JSONResponse({"error": {"message": f"No such checkout.session: '{session_id}'", "type": "invalid_request_error"}}, status_code=404)
+        return JSONResponse(checkout_session(session_id, int(match[1])))
+
+    async def mailjet_send(self, request: Request):
+        error = await self._enter("mailjet")
+        if error:
+            return error
+        payload = await request.json()
+        for message in payload.get("Messages", []):
+            token = TOKEN_PATTERN.search(message.get("HTMLPart", ""))
+            for recipient in message.get("To", []):
+                if token:
+                    self.inbox[recipient["Email"]].append(token[1])
+        return JSONResponse({"Messages": [{"Status": "success"} for _ in payload.get("Messages", [])]})
+
+    async def s3_object(self, request: Request):
+        error = await self._enter("s3")
+        if error:
+            return Response(b"<Error><Code>InternalError</Code></Error>", status_code=500, media_type="application/xml")
+        key = (request.path_params["bucket"], request.path_params["key"])
+        if request.method == "PUT":
+            body = await request.body()
+            self.objects[key] = body
+            return Response(headers={"ETag": f'"{hashlib.md5(body).hexdigest()}"'})
+        body = self.objects.get(key)
+        if body is None:
+            return Response(b"<Error><Code>NoSuchKey</Code></Error>", status_code=404, media_type="application/xml")
+        headers = {"ETag": f'"{hashlib.md5(body).hexdigest()}"', "Content-Length": str(len(body))}
+        if request.method == "HEAD":
+            return Response(headers=headers)
+        return Response(body, headers=headers, media_type="application/octet-stream")
+
+    async def s3_bucket(self, request: Request):
+        error = await self._enter("s3")
+        if error:
+            return Response(b"<Error><Code>InternalError</Code></Error>", status_code=500, media_type="application/xml")
+        bucket = request.path_params["bucket"]
+        return Response(
+            f'<?xml version="1.0" encoding="UTF-8"?><ListBucketResult><Name>{bucket}</Name>'
+            f"<KeyCount>0</KeyCount><MaxKeys>1</MaxKeys><IsTruncated>false</IsTruncated></ListBucketResult>",
+            media_type="application/xml"
+        )
+
+    async def files(self, request: Request):
+        error = await self._enter("files")
+        if error:
+            return error
+        body = self.media.get(request.path_params["name"])
+        if body is None:
+            return Response(status_code=404)
+        return Response(body, media_type="application/octet-stream")
+
+    async def fake_inbox(self, request: Request):
+        return JSONResponse({"tokens": self.inbox.get(request.query_params["email"], [])})
+
+    async def fake_stats(self, request: Request):
+        return JSONResponse(dict(self.stats))
+
+    def app(self) -> Starlette:
+        return Starlette(routes=[
+            Route("/openai/v1/images/generations", self.openai_images, methods=["POST"]),
+            Route("/runway/v1/image_to_video", self.runway_create, methods=["POST"]),
+            Route("/runway/v1/tasks/{task_id}", self.runway_task, methods=["GET"]),
+            Route("/stripe/v1/checkout/sessions/{session_id}", self.stripe_session, methods=["GET"]),
+            Route("/mailjet/v3.1/send", self.mailjet_send, methods=["POST"]),
+            Route("/s3/{bucket}", self.s3_bucket, methods=["GET"]),
+            Route("/s3/{bucket}/{key:path}", self.s3_object, methods=["GET", "HEAD", "PUT"]),
+            Route("/files/{name}", self.files, methods=["GET"]),
+            Route("/_fake/inbox", self.fake_inbox, methods=["GET"]),
+            Route("/_fake/stats", self.fake_stats, methods=["GET"]),
+        ])
+
+
+def checkout_session(session_id: str, user_id: int, tokens: int = 100, amount_total: int = 999) -> dict:
+    """A paid checkout.session as the app's webhook and verify endpoints expect it"""
+    return {
+        "id": session_id,
+        "object": "checkout.session",
+        "client_reference_id": str(user_id),
+        "metadata": {"application_slug": "vidgen", "tokens": str(tokens)},
+        "amount_total": amount_total,
+        "currency": "usd",
+        "payment_status": "paid",
+        "status": "complete",
+    }
+
+
+def parse_overrides(values, cast=float) -> dict:
+    overrides = {}
+    for value in values or []:
+        name, _, number = value.partition("=")
+        if name not in PROVIDERS:
+            raise SystemExit(f"Unknown provider {name!r}; expected one of {', '.join(PROVIDERS)}")
+        overrides[name] = cast(number)
+    return overrides
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Local fake providers for load tests")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=9100)
+    parser.add_argument("--latency", action="append", metavar="PROVIDER=SECONDS",
+                        help="Mean latency per provider (repeatable)")
+    parser.add_argument("--failure-rate", action="append", metavar="PROVIDER=RATE",
+                        help="Fraction of calls answered with a 500 (repeatable)")
+    parser.add_argument("--jitter", type=float, default=0.3, help="Latency varies by +/- this fraction")
+    parser.add_argument("--runway-task-seconds", type=float, default=3.0,
+                        help="Time a Runway task takes to succeed")
+    args = parser.parse_args(argv)
+
+    latency = {**DEFAULT_LATENCY, **parse_overrides(args.latency)}
+    failure_rate = parse_overrides(args.failure_rate)
+    profiles = {
+        name: Profile(latency[name], args.jitter, failure_rate.get(name, 0.0))
+        for name in PROVIDERS
+    }
+    fakes = FakeProviders(profiles, runway_task_seconds=args.runway_task_seconds)
+    fakes.base_url = f"http://{args.host}:{args.port}"
+    uvicorn.run(fakes.app(), host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
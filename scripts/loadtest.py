@@ -0,0 +1,517 @@
+"""Offline load test of the API against local fake providers.
+
+Usage:
+    python scripts/loadtest.py [--scenario NAME ...] [--users 20] [--workers 1]
+                               [--output results.json] [--baseline previous.json]
+
+Starts scripts/fake_providers.py and the app (uvicorn) as subprocesses, with
+every provider pointed at the fakes and dummy provider credentials, then
+drives scripted scenarios with httpx:
+
+    auth      signup, email verification and login storm (also creates the
+              users the other scenarios run as)
+    images    image generation burst, several requests per user at once
+    videos    video generations with long Runway status polls
+    history   heavy users paging through token and generation history
+    webhooks  flood of signed Stripe webhooks, with duplicates, followed by
+              payment verifications against the fake Stripe API
+
+Throughput and p50/p99 latency per endpoint are printed and written as JSON,
+together with the app's event loop lag and the loop stalls per route that
+happened during each scenario (from its /metrics). With --baseline, exits
+with status 1 when an endpoint's p99 grew, its throughput fell or its error
+count (anything but 2xx, 3xx and 429) rose by more than --max-regression
+compared to an earlier report, or when a route blocked the loop more often.
+
+The app reads its database settings as usual (.env or environment) and
+writes users, generations and payments to that database, so point it at a
+scratch database. Test users are loadtest+<run>-<n>@example.com.
+"""
+import argparse
+import asyncio
+import hashlib
+import hmac
+import json
+import os
+import random
+import re
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from collections import Counter, defaultdict
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional
+
+import httpx
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fake_providers import checkout_session, provider_env
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SCENARIOS = ("auth", "images", "videos", "history", "webhooks")
+WEBHOOK_SECRET = "whsec_loadtest"
+METRICS_TOKEN = "loadtest"
+PASSWORD = "loadtest-password"
+# Smallest valid PNG, used as the video reference image
+PNG = bytes.fromhex(
+    "89504e470d0a1a0a0000000d4948445200000001000000010806000000"
+    "1f15c4890000000d49444154789c6360000002000154a24f5d0000000049454e44ae426082"
+)
+
+
+@dataclass
+class User:
+    id: int
+    email: str
+    access_token: str
+
+    @property
+    def headers(self) -> dict:
+        return {"Authorization": f"Bearer {self.access_token}"}
+
+
+class Recorder:
+    """Latency samples and status codes per endpoint"""
+
+    def __init__(self):
+        self.samples: Dict[str, List[float]] = defaultdict(list)
+        self.statuses: Dict[str, Counter] = defaultdict(Counter)
+
+    async def request(self, client: httpx.AsyncClient, endpoint: str, method: str, url: str, **kwargs) -> Optional[httpx.Response]:
+        start = time.perf_counter()
+        try:
+            response = await client.request(method, url, **kwargs)
+            outcome = str(response.status_code)
+        except httpx.HTTPError as e:
+            response, outcome = None, type(e).__name__
+        self.samples[endpoint].append(time.perf_counter() - start)
+        self.statuses[endpoint][outcome] += 1
+        return response
+
+    def report(self, duration: float) -> dict:
+        endpoints = {}
+        for endpoint, samples in sorted(self.samples.items()):
+            ordered = sorted(samples)
+            pick = lambda q: round(ordered[min(len(ordered) - 1, int(q * len(ordered)))] * 1000, 1)
+            statuses = self.statuses[endpoint]
+            # 429 admission rejections are an expected outcome under load
+            errors = sum(count for outcome, count in statuses.items() if outcome[0] not in "23" and outcome != "429")
+            endpoints[endpoint] = {
+                "requests": len(ordered),
+                "errors": errors,
+                "throughput_rps": round(len(ordered) / duration, 2),
+                "p50_ms": pick(0.50),
+                "p99_ms": pick(0.99),
+                "max_ms": round(ordered[-1] * 1000, 1),
+                "status": dict(statuses),
+            }
+        return {"duration_s": round(duration, 2), "endpoints": endpoints}
+
+
+@dataclass
+class Context:
+    args: argparse.Namespace
+    client: httpx.AsyncClient
+    fakes: httpx.AsyncClient
+    run_id: str
+    users: List[User] = field(default_factory=list)
+    rng: random.Random = field(default_factory=lambda: random.Random(7))
+
+
+def ok(response: Optional[httpx.Response]) -> bool:
+    return response is not None and response.status_code < 300
+
+
+async def gather_limited(limit: int, coroutines):
+    semaphore = asyncio.Semaphore(limit)
+
+    async def run(coroutine):
+        async with semaphore:
+            return await coroutine
+    return await asyncio.gather(*(run(coroutine) for coroutine in coroutines))
+
+
+async def auth_storm(ctx: Context, recorder: Recorder) -> None:
+    async def one(index: int) -> Optional[User]:
+        email = f"loadtest+{ctx.run_id}-{index}@example.com"
+        credentials = {"email": email, "password": PASSWORD}
+        response = await recorder.request(ctx.client, "POST /auth/signup", "POST", "/api/v1/auth/signup",
+                                          json={**credentials, "full_name": f"Load Test {index}"})
+        if not ok(response):
+            return None
+        # Mailjet is faked; the link lands in the fake's inbox
+        for _ in range(50):
+            tokens = (await ctx.fakes.get("/_fake/inbox", params={"email": email})).json()["tokens"]
+            if tokens:
+                break
+            await asyncio.sleep(0.1)
+        else:
+            return None
+        response = await recorder.request(ctx.client, "POST /auth/verify-email", "POST", "/api/v1/auth/verify-email",
+                                          params={"token": tokens[-1]})
+        if not ok(response):
+            return None
+        response = await recorder.request(ctx.client, "POST /auth/login", "POST", "/api/v1/auth/login", json=credentials)
+        if not ok(response):
+            return None
+        body = response.json()
+        return User(body["user"]["id"], email, body["access_token"])
+
+    users = await gather_limited(ctx.args.concurrency, (one(i) for i in range(ctx.args.users)))
+    ctx.users = [user for user in users if user]
+
+
+async def image_burst(ctx: Context, recorder: Recorder) -> None:
+    await asyncio.gather(*(
+        recorder.request(ctx.client, "POST /generation/generate-image", "POST", "/api/v1/generation/generate-image",
+                         headers=user.headers, json={"prompt": f"Load test image {i}"})
+        for user in ctx.users
+        for i in range(ctx.args.images_per_user)
+    ))
+
+
+async def video_generations(ctx: Context, recorder: Recorder) -> None:
+    await asyncio.gather(*(
+        recorder.request(ctx.client, "POST /generation/generate-video", "POST", "/api/v1/generation/generate-video",
+                         headers=user.headers, data={"prompt": "Load test video"},
+                         files={"reference_image": ("reference.png", PNG, "image/png")})
+        for user in ctx.users[:ctx.args.video_users]
+    ))
+
+
+def seed_history(users: List[User], rows: int) -> None:
+    """Give heavy users ``rows`` generations and matching token history rows"""
+    from sqlalchemy import text
+    from app.db.session import SessionLocal, get_engine
+
+    db = SessionLocal(bind=get_engine())
+    try:
+        for user in users:
+            db.execute(text(
+                "WITH gen AS ("
+                " INSERT INTO generations (id, user_id, prompt, type, url, status, created_at, updated_at)"
+                " SELECT gen_random_uuid(), :user_id, 'Load test prompt ' || g, 'image',"
+                " 'generated/' || :user_id || '/' || g || '.png', 'success',"
+                " now() - g * interval '1 second', now() - g * interval '1 second'"
+                " FROM generate_series(1, :rows) g"
+                " RETURNING id, created_at)"
+                " INSERT INTO token_history (user_id, tokens, action_type, description, extra_data, generation_id, created_at, updated_at)"
+                " SELECT :user_id, -15, 'consumed', 'Image generation', '{}', id, created_at, created_at FROM gen"
+            ), {"user_id": user.id, "rows": rows})
+        db.commit()
+    finally:
+        db.close()
+
+
+async def history_browsing(ctx: Context, recorder: Recorder) -> None:
+    heavy = ctx.users[:ctx.args.heavy_users]
+    pages = max(1, ctx.args.history_rows // 100)
+
+    async def browse(user: User) -> None:
+        for i in range(ctx.args.history_requests):
+            await recorder.request(ctx.client, "GET /tokens/history", "GET", "/api/v1/tokens/history",
+                                   headers=user.headers, params={"skip": (i % pages) * 100, "limit": 100})
+            await recorder.request(ctx.client, "GET /generation/history", "GET", "/api/v1/generation/history",
+                                   headers=user.headers)
+            await recorder.request(ctx.client, "GET /tokens/balance", "GET", "/api/v1/tokens/balance",
+                                   headers=user.headers)
+
+    await asyncio.gather(*(browse(user) for user in heavy))
+
+
+def sign_webhook(payload: bytes, secret: str = WEBHOOK_SECRET) -> str:
+    timestamp = int(time.time())
+    signature = hmac.new(secret.encode(), f"{timestamp}.".encode() + payload, hashlib.sha256).hexdigest()
+    return f"t={timestamp},v1={signature}"
+
+
+async def webhook_flood(ctx: Context, recorder: Recorder) -> None:
+    events = []
+    for i in range(ctx.args.webhooks):
+        if events and ctx.rng.random() < 0.1:
+            events.append(ctx.rng.choice(events))  # Stripe redelivers
+            continue
+        user = ctx.rng.choice(ctx.users)
+        session = checkout_session(f"cs_fake_{user.id}_{ctx.run_id}_{i}", user.id)
+        events.append(json.dumps({
+            "id": f"evt_{ctx.run_id}_{i}",
+            "object": "event",
+            "type": "checkout.session.completed",
+            "data": {"object": session},
+        }).encode())
+
+    async def deliver(payload: bytes):
+        return await recorder.request(ctx.client, "POST /subscription/webhook", "POST", "/api/v1/subscription/webhook",
+                                      content=payload, headers={"stripe-signature": sign_webhook(payload)})
+
+    await gather_limited(ctx.args.concurrency, (deliver(payload) for payload in events))
+    # Verification after checkout fetches the session from (fake) Stripe
+    await gather_limited(ctx.args.concurrency, (
+        recorder.request(ctx.client, "GET /subscription/verify/{session_id}", "GET",
+                         f"/api/v1/subscription/verify/cs_fake_{user.id}_{ctx.run_id}_verify",
+                         headers=user.headers)
+        for user in ctx.users
+    ))
+
+
+SCENARIO_FUNCTIONS = {
+    "auth": auth_storm,
+    "images": image_burst,
+    "videos": video_generations,
+    "history": history_browsing,
+    "webhooks": webhook_flood,
+}
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def start(command: List[str], env: dict, log_path: str) -> subprocess.Popen:
+    log = open(log_path, "wb")
+    return subprocess.Popen(command, cwd=ROOT, env=env, stdout=log, stderr=subprocess.STDOUT)
+
+
+async def wait_ready(url: str, process: subprocess.Popen, timeout: float = 60) -> None:
+    deadline = time.monotonic() + timeout
+    async with httpx.AsyncClient() as client:
+        while time.monotonic() < deadline:
+            if process.poll() is not None:
+                raise SystemExit(f"{' '.join(process.args)} exited with status {process.returncode}")
+            try:
+                await client.get(url)
+                return
+            except httpx.HTTPError:
+                await asyncio.sleep(0.2)
+    raise SystemExit(f"Timed out waiting for {url}")
+
+
+def app_env(args, fakes_port: int) -> dict:
+    env = dict(os.environ)
+    # Dummy credentials so nothing can reach a real provider
+    env.update({
+        "AI_MODEL_KEY": "loadtest",
+        "RUNWAY_API_KEY": "loadtest",
+        "STRIPE_SECRET_KEY": "sk_test_loadtest",
+        "STRIPE_WEBHOOK_SECRET": WEBHOOK_SECRET,
+        "MAILJET_API_KEY": "loadtest",
+        "MAILJET_SECRET_KEY": "loadtest",
+        "S3_ACCESS_KEY": "loadtest",
+        "S3_SECRET_KEY": "loadtest",
+        "RUNWAY_POLL_INTERVAL": str(args.poll_interval),
+        "METRICS_TOKEN": METRICS_TOKEN,
+    })
+    env.update(provider_env(fakes_port))
+    for override in args.env or []:
+        name, _, value = override.partition("=")
+        env[name] = value
+    return env
+
+
+METRIC_LINE = re.compile(r'^(event_loop_\w+)\{pid="(\d+)"(?:,route="([^"]*)")?(?:,le="([^"]*)")?\} (\S+)$')
+
+async def loop_metrics(url: str, workers: int) -> dict:
+    """Event loop lag and stalls per route, summed over the app's workers.
+
+    Each worker keeps its own counters, so /metrics is fetched on fresh
+    connections until every worker has answered (or enough attempts failed).
+    """
+    per_pid: Dict[str, dict] = {}
+    for _ in range(workers * 20):
+        if len(per_pid) >= workers:
+            break
+        async with httpx.AsyncClient() as client:
+            text = (await client.get(url, headers={"Authorization": f"Bearer {METRICS_TOKEN}"})).text
+        values = {"lag_max_s": 0.0, "lag_buckets": Counter(), "blocked": Counter(), "blocked_s": Counter()}
+        for line in text.splitlines():
+            match = METRIC_LINE.match(line)
+            if not match:
+                continue
+            name, pid, route, le, value = match.groups()
+            if name == "event_loop_lag_seconds_bucket":
+                values["lag_buckets"][float(le)] = int(float(value))
+            elif name == "event_loop_lag_max_seconds":
+                values["lag_max_s"] = float(value)
+            elif name == "event_loop_blocked_total":
+                values["blocked"][route] = int(float(value))
+            elif name == "event_loop_blocked_seconds_total":
+                values["blocked_s"][route] = float(value)
+            per_pid[pid] = values
+    total = {"workers_seen": len(per_pid), "lag_max_s": 0.0, "lag_buckets": Counter(), "blocked": Counter(), "blocked_s": Counter()}
+    for values in per_pid.values():
+        total["lag_max_s"] = max(total["lag_max_s"], values["lag_max_s"])
+        total["lag_buckets"].update(values["lag_buckets"])
+        total["blocked"].update(values["blocked"])
+        total["blocked_s"].update(values["blocked_s"])
+    return total
+
+def loop_report(before: dict, after: dict) -> dict:
+    """Loop lag and stalls per route between two loop_metrics() snapshots"""
+    # p99 lag as the upper bound of the histogram bucket it falls in
+    bounds = sorted(after["lag_buckets"])
+    samples = after["lag_buckets"][float("inf")] - before["lag_buckets"][float("inf")]
+    lag_p99 = None
+    for bound in bounds:
+        if samples and after["lag_buckets"][bound] - before["lag_buckets"][bound] >= samples * 0.99:
+            lag_p99 = bound
+            break
+    routes = sorted(set(after["blocked"]) | set(before["blocked"]))
+    blocked = {
+        route: {
+            "count": after["blocked"][route] - before["blocked"][route],
+            "seconds": round(after["blocked_s"][route] - before["blocked_s"][route], 3),
+        }
+        for route in routes
+        if after["blocked"][route] > before["blocked"][route]
+    }
+    return {
+        "lag_samples": samples,
+        "lag_p99_le_ms": None if lag_p99 in (None, float("inf")) else round(lag_p99 * 1000, 1),
+        "lag_max_since_start_ms": round(after["lag_max_s"] * 1000, 1),
+        "blocked": blocked,
+    }
+
+
+def regressions(report: dict, baseline: dict, tolerance: float) -> List[str]:
+    problems = []
+    for scenario, result in report["scenarios"].items():
+        before_blocked = baseline.get("scenarios", {}).get(scenario, {}).get("event_loop", {}).get("blocked", {})
+        for route, now in result.get("event_loop", {}).get("blocked", {}).items():
+            before = before_blocked.get(route, {"count": 0})
+            if now["count"] > before["count"] * (1 + tolerance):
+                problems.append(f"{scenario} {route}: event loop blocked {before['count']} -> {now['count']} times")
+        before_endpoints = baseline.get("scenarios", {}).get(scenario, {}).get("endpoints", {})
+        for endpoint, now in result["endpoints"].items():
+            before = before_endpoints.get(endpoint)
+            if not before:
+                continue
+            if before["p99_ms"] and now["p99_ms"] > before["p99_ms"] * (1 + tolerance):
+                problems.append(f"{scenario} {endpoint}: p99 {before['p99_ms']} -> {now['p99_ms']} ms")
+            if now["throughput_rps"] < before["throughput_rps"] * (1 - tolerance):
+                problems.append(f"{scenario} {endpoint}: throughput {before['throughput_rps']} -> {now['throughput_rps']} req/s")
+            if now["errors"] > before["errors"] * (1 + tolerance):
+                problems.append(f"{scenario} {endpoint}: errors {before['errors']} -> {now['errors']}")
+    return problems
+
+
+def print_report(report: dict) -> None:
+    for scenario, result in report["scenarios"].items():
+        print(f"{scenario} ({result['duration_s']} s)")
+        for endpoint, stats in result["endpoints"].items():
+            print(f"  {endpoint:<40} {stats['requests']:6d} req {stats['throughput_rps']:8.2f} req/s"
+                  f"  p50 {stats['p50_ms']:8.1f} ms  p99 {stats['p99_ms']:8.1f} ms  errors {stats['errors']}")
+        loop = result.get("event_loop")
+        if loop:
+            print(f"  event loop: p99 lag <= {loop['lag_p99_le_ms']} ms, max since start {loop['lag_max_since_start_ms']} ms")
+            for route, blocked in loop["blocked"].items():
+                print(f"    blocked {blocked['count']:4d}x {blocked['seconds']:7.3f} s  {route}")
+
+
+async def run(args) -> dict:
+    log_dir = tempfile.mkdtemp(prefix="loadtest-")
+    fakes_port, app_port = free_port(), free_port()
+    fakes = start(
+        [sys.executable, "scripts/fake_providers.py", "--port", str(fakes_port),
+         "--runway-task-seconds", str(args.runway_task_seconds)] + args.fake_args,
+        dict(os.environ), os.path.join(log_dir, "fake_providers.log")
+    )
+    app = start(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--host", "127.0.0.1", "--port", str(app_port),
+         "--workers", str(args.workers), "--log-level", "warning"],
+        app_env(args, fakes_port), os.path.join(log_dir, "app.log")
+    )
+    report = {
+        "run": {
+            "started_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+            "workers": args.workers,
+            "users": args.users,
+            "logs": log_dir,
+        },
+        "scenarios": {},
+    }
+    try:
+        await wait_ready(f"http://127.0.0.1:{fakes_port}/_fake/stats", fakes)
+        await wait_ready(f"http://127.0.0.1:{app_port}/", app)
+        limits = httpx.Limits(max_connections=None, max_keepalive_connections=None)
+        async with httpx.AsyncClient(base_url=f"http://127.0.0.1:{app_port}", timeout=args.timeout, limits=limits) as client, \
+                httpx.AsyncClient(base_url=f"http://127.0.0.1:{fakes_port}") as fakes_client:
+            ctx = Context(args, client, fakes_client, run_id=str(int(time.time())))
+            metrics_url = f"http://127.0.0.1:{app_port}/metrics"
+            loop_before = await loop_metrics(metrics_url, args.workers)
+            # Every scenario needs users, so the auth storm always runs first
+            for scenario in ["auth"] + [name for name in args.scenario if name != "auth"]:
+                if scenario == "history":
+                    await asyncio.to_thread(seed_history, ctx.users[:args.heavy_users], args.history_rows)
+                recorder = Recorder()
+                start_time = time.perf_counter()
+                await SCENARIO_FUNCTIONS[scenario](ctx, recorder)
+                if not ctx.users:
+                    raise SystemExit(f"No users could sign up; see {log_dir}/app.log")
+                duration = time.perf_counter() - start_time
+                loop_after = await loop_metrics(metrics_url, args.workers)
+                if scenario in args.scenario:
+                    report["scenarios"][scenario] = recorder.report(duration)
+                    report["scenarios"][scenario]["event_loop"] = loop_report(loop_before, loop_after)
+                loop_before = loop_after
+            report["provider_calls"] = (await fakes_client.get("/_fake/stats")).json()
+    finally:
+        for process in (app, fakes):
+            process.terminate()
+            try:
+                process.wait(timeout=30)
+            except subprocess.TimeoutExpired:
+                process.kill()
+    return report
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Offline load test against fake providers")
+    parser.add_argument("--scenario", action="append", choices=SCENARIOS,
+                        help="Scenario to run (repeatable; default all)")
+    parser.add_argument("--users", type=int, default=20, help="Users created by the auth storm")
+    parser.add_argument("--concurrency", type=int, default=20, help="Concurrent requests in storms and floods")
+    parser.add_argument("--workers", type=int, default=1, help="uvicorn workers for the app")
+    parser.add_argument("--images-per-user", type=int, default=2)
+    parser.add_argument("--video-users", type=int, default=5)
+    parser.add_argument("--runway-task-seconds", type=float, default=3.0)
+    parser.add_argument("--poll-interval", type=float, default=0.5, help="RUNWAY_POLL_INTERVAL for the app")
+    parser.add_argument("--heavy-users", type=int, default=5)
+    parser.add_argument("--history-rows", type=int, default=2000, help="History rows seeded per heavy user")
+    parser.add_argument("--history-requests", type=int, default=10, help="Page views per heavy user")
+    parser.add_argument("--webhooks", type=int, default=200)
+    parser.add_argument("--timeout", type=float, default=300)
+    parser.add_argument("--env", action="append", metavar="NAME=VALUE",
+                        help="Extra app setting, e.g. GENERATION_USER_BURST=10 (repeatable)")
+    parser.add_argument("--fake-args", default="",
+                        help="Extra fake_providers.py arguments, e.g. \"--failure-rate openai=0.1\"")
+    parser.add_argument("--output", help="Write the JSON report here (default: in the log directory)")
+    parser.add_argument("--baseline", help="Earlier JSON report to compare against")
+    parser.add_argument("--max-regression", type=float, default=0.25,
+                        help="Allowed relative change before --baseline fails the run")
+    args = parser.parse_args(argv)
+    args.scenario = args.scenario or list(SCENARIOS)
+    args.fake_args = args.fake_args.split()
+
+    report = asyncio.run(run(args))
+    print_report(report)
+    output = args.output or os.path.join(report["run"]["logs"], "results.json")
+    with open(output, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"Report written to {output}")
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            problems = regressions(report, json.load(f), args.max_regression)
+        for problem in problems:
+            print(f"REGRESSION {problem}")
+        return 1 if problems else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,81 @@
+"""Production server launcher.
+
+Runs uvicorn with one process per available CPU (as limited by the
+container's cgroup quota), uvloop and httptools, and no file watcher.
+
+Environment:
+    WEB_CONCURRENCY            explicit worker count (overrides CPU sizing)
+    WORKERS_PER_CPU            workers per available CPU (default 2)
+    API_HOST / API_PORT        bind address (default 0.0.0.0:8000)
+    GRACEFUL_SHUTDOWN_TIMEOUT  seconds to let in-flight requests, including
+                               long video generations, finish after SIGTERM
+                               (default 300)
+"""
+import math
+import os
+from typing import Optional
+
+import uvicorn
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def cgroup_cpu_limit() -> Optional[float]:
+    """CPU quota of the current cgroup, or None when unlimited"""
+    try:
+        # cgroup v2: "<quota> <period>" or "max <period>"
+        with open("/sys/fs/cgroup/cpu.max") as f:
+            quota, period = f.read().split()
+        if quota != "max":
+            return int(quota) / int(period)
+        return None
+    except (OSError, ValueError):
+        pass
+    try:
+        # cgroup v1
+        with open("/sys/fs/cgroup/cpu/cpu.cfs_quota_us") as f:
+            quota = int(f.read())
+        with open("/sys/fs/cgroup/cpu/cpu.cfs_period_us") as f:
+            period = int(f.read())
+        if quota > 0:
+            return quota / period
+    except (OSError, ValueError):
+        pass
+    return None
+
+
+def available_cpus() -> int:
+    try:
+        cpus = len(os.sched_getaffinity(0))
+    except AttributeError:
+        cpus = os.cpu_count() or 1
+    limit = cgroup_cpu_limit()
+    if limit is not None:
+        cpus = min(cpus, math.ceil(limit))
+    return max(1, cpus)
+
+
+def worker_count() -> int:
+    if os.getenv("WEB_CONCURRENCY"):
+        return max(1, int(os.environ["WEB_CONCURRENCY"]))
+    return available_cpus() * int(os.getenv("WORKERS_PER_CPU", "2"))
+
+
+def main():
+    workers = worker_count()
+    print(f"Starting {workers} worker(s)")
+    uvicorn.run(
+        "app.main:app",
+        app_dir=ROOT,
+        host=os.getenv("API_HOST", "0.0.0.0"),
+        port=int(os.getenv("API_PORT", "8000")),
+        workers=workers,
+        loop="uvloop",
+        http="httptools",
+        proxy_headers=True,
+        timeout_graceful_shutdown=int(os.getenv("GRACEFUL_SHUTDOWN_TIMEOUT", "300")),
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -1,7 +1,12 @@
 #!/bin/bash
+set -e
 
-# Run migrations
-alembic upgrade head
+# Run migrations once per deployment. Replicas started with
+# RUN_MIGRATIONS=false skip this; concurrent runs are serialized by an
+# advisory lock in alembic/env.py.
+if [ "${RUN_MIGRATIONS:-true}" = "true" ]; then
+    alembic upgrade head
+fi
 
-# Start the FastAPI application
-uvicorn app.main:app --host 0.0.0.0 --port 8000 --reload 
\ No newline at end of file
+# Start the FastAPI application; exec so uvicorn receives SIGTERM directly
+exec python scripts/serve.py
@@ -0,0 +1,133 @@
+"""Foreign keys and hot query predicates must be backed by indexes.
+
+Runs against the database the app is configured for (.env or environment),
+migrated to head, and is skipped when it is not reachable. A local scratch
+database is enough since it only reads the catalog and plans queries,
+nothing is executed.
+
+* Every foreign key must be the leading column(s) of a valid, non-partial
+  index on its table, otherwise ON DELETE CASCADE from users and per-user
+  lookups scan the whole table.
+* Every hot query below is planned with sequential scans disabled; a
+  sequential scan still showing up means no index can serve its predicate.
+  Table sizes don't matter this way, so an empty database works.
+"""
+from datetime import datetime, timezone
+
+import pytest
+from sqlalchemy import text
+
+NOW = datetime.now(timezone.utc)
+DIGEST = b"\0" * 32
+
+# (name, statement, parameters) for the queries behind the busiest endpoints
+# and the purge jobs; keep in sync with the services
+HOT_QUERIES = [
+    ("current user by id", "SELECT * FROM users WHERE id = :user_id", {}),
+    ("login by email", "SELECT * FROM users WHERE email = :email", {}),
+    ("verification by token", "SELECT * FROM user_verifications WHERE token_hash = :digest", {}),
+    ("verification at login", "SELECT * FROM user_verifications WHERE user_id = :user_id LIMIT 1", {}),
+    ("purge verifications",
+     "SELECT id FROM user_verifications WHERE NOT is_verified AND expires_at < :now LIMIT 1000", {}),
+    ("refresh token rotation",
+     "UPDATE refresh_tokens SET used_at = now() FROM users "
+     "WHERE token_hash = :digest AND used_at IS NULL AND expires_at > now() AND users.id = refresh_tokens.user_id "
+     "AND users.is_active RETURNING users.email", {}),
+    ("refresh token family revoke",
+     "UPDATE refresh_tokens SET used_at = now() WHERE user_id = :user_id AND family_id = :family AND used_at IS NULL",
+     {"family": b"\0" * 16}),
+    ("purge refresh tokens", "SELECT id FROM refresh_tokens WHERE expires_at < :now LIMIT 1000", {}),
+    ("payment by session", "SELECT payment_status FROM subscriptions WHERE transaction_id = :session_id", {}),
+    ("subscription history",
+     "SELECT * FROM subscriptions WHERE user_id = :user_id ORDER BY created_at DESC LIMIT 100", {}),
+    ("token history page",
+     "SELECT * FROM token_history WHERE user_id = :user_id ORDER BY created_at DESC LIMIT 50", {}),
+    ("ledger balance delta",
+     "SELECT coalesce(sum(tokens), 0) FROM token_history WHERE user_id = :user_id AND id > 0 AND created_at <= :now",
+     {}),
+    ("balance snapshot",
+     "SELECT balance FROM token_balance_snapshots WHERE user_id = :user_id AND taken_at <= :now "
+     "ORDER BY taken_at DESC LIMIT 1", {}),
+    ("generation history", "SELECT * FROM generations WHERE user_id = :user_id ORDER BY created_at DESC", {}),
+    ("user usage", "SELECT * FROM token_usage_daily WHERE user_id = :user_id AND day >= :now", {}),
+    ("idempotency key", "SELECT * FROM idempotency_keys WHERE user_id = :user_id AND key = :key", {}),
+    ("purge idempotency keys", "SELECT id FROM idempotency_keys WHERE expires_at < :now LIMIT 1000", {}),
+]
+DEFAULT_PARAMETERS = {
+    "user_id": 1,
+    "email": "user@example.com",
+    "digest": DIGEST,
+    "now": NOW,
+    "session_id": "cs_test",
+    "key": "retry-1",
+}
+
+# Foreign keys without a valid, non-partial index leading with their columns.
+# Partitions are skipped; their parent's partitioned index covers them.
+UNINDEXED_FOREIGN_KEYS = """
+SELECT c.conrelid::regclass::text AS table_name, c.conname,
+       array_agg(a.attname ORDER BY a.attnum)::text[] AS columns
+FROM pg_constraint c
+JOIN pg_class t ON t.oid = c.conrelid
+JOIN pg_namespace n ON n.oid = t.relnamespace
+JOIN pg_attribute a ON a.attrelid = c.conrelid AND a.attnum = ANY (c.conkey)
+WHERE c.contype = 'f'
+  AND n.nspname = current_schema()
+  AND NOT t.relispartition
+  AND NOT EXISTS (
+      SELECT 1 FROM pg_index i
+      WHERE i.indrelid = c.conrelid
+        AND i.indisvalid
+        AND i.indpred IS NULL
+        AND (i.indkey::int2[])[0:cardinality(c.conkey) - 1] @> c.conkey
+        AND (i.indkey::int2[])[0:cardinality(c.conkey) - 1] <@ c.conkey
+  )
+GROUP BY 1, 2
+ORDER BY 1, 2
+"""
+
+def sequential_scans(plan: dict):
+    """Relations read with a sequential scan anywhere in an EXPLAIN plan"""
+    if plan.get("Node Type") == "Seq Scan":
+        yield plan["Relation Name"]
+    for child in plan.get("Plans", []):
+        yield from sequential_scans(child)
+
+
+@pytest.fixture(scope="module")
+def connection():
+    try:
+        from app.db.session import get_engine
+        connection = get_engine().connect()
+    except Exception as e:
+        pytest.skip(f"No database reachable: {e}")
+    with connection:
+        yield connection
+
+
+def test_foreign_keys_are_indexed(connection):
+    unindexed = [
+        f"{constraint} on {table} ({', '.join(columns)})"
+        for table, constraint, columns in connection.execute(text(UNINDEXED_FOREIGN_KEYS))
+    ]
+    connection.rollback()
+    assert not unindexed, f"foreign keys without an index: {unindexed}"
+
+
+@pytest.mark.parametrize(
+    "statement,parameters",
+    [(statement, parameters) for _, statement, parameters in HOT_QUERIES],
+    ids=[name for name, _, _ in HOT_QUERIES]
+)
+def test_hot_query_uses_index(connection, statement, parameters):
+    # SET LOCAL lasts until the rollback that ends the plan
+    connection.execute(text("SET LOCAL enable_seqscan = off"))
+    try:
+        plan = connection.execute(
+            text(f"EXPLAIN (FORMAT JSON) {statement}"),
+            {**DEFAULT_PARAMETERS, **parameters}
+        ).scalar()[0]["Plan"]
+    finally:
+        connection.rollback()
+    scans = sorted(set(sequential_scans(plan)))
+    assert not scans, f"sequential scan on {', '.join(scans)}"